@@ -0,0 +1,321 @@
+"""Request handling shared by the WSGI (app.py) and ASGI (asgi_app.py) apps.
+
+Flask and Quart both turn a returned (body, status[, headers]) tuple into a
+response, so everything here works on plain values: parse_* functions take
+the decoded request and return validated arguments or raise ApiError, and
+*_response functions take state results and return such tuples. The apps
+only read the request and call state and the blockchain handler, directly
+or awaited.
+"""
+
+import hmac
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+from werkzeug.http import quote_etag
+
+from config import Config
+from elections import parse_time
+from ratelimit import AdmissionControl
+from metrics import record_outcome
+from bulk import EXPORT_FIELDS, CONTENT_TYPES
+
+logger = logging.getLogger(__name__)
+
+ELECTION_ACTIONS = ("open", "close")
+
+
+class ApiError(Exception):
+    """A request answered with an error status and {"success": False, "error": ...}.
+
+    Raised from request validation and admission; both apps register an
+    error handler that returns response().
+    """
+
+    def __init__(self, status, error, headers=None):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+        self.headers = headers or {}
+
+    def response(self):
+        return {"success": False, "error": self.error}, self.status, self.headers
+
+
+def json_object(data):
+    """The request body as a dict, or a 400"""
+    if not isinstance(data, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return data
+
+
+def check_token(expected, token, name):
+    """Hide an endpoint (404) unless `expected` is configured, and require it (403)"""
+    if not expected:
+        raise ApiError(404, "Endpoint not found")
+    if not hmac.compare_digest((token or '').encode(), expected.encode()):
+        raise ApiError(403, f"Invalid {name} token")
+
+
+def client_address(remote_addr, forwarded_for):
+    """The client's address, as seen by the outermost of TRUSTED_PROXY_HOPS reverse proxies"""
+    hops = Config.TRUSTED_PROXY_HOPS
+    if hops and forwarded_for:
+        route = [address.strip() for address in forwarded_for.split(',')]
+        if len(route) >= hops:
+            return route[-hops]
+    return remote_addr
+
+
+@contextmanager
+def admitted(admission, operation, client, voter_addresses):
+    """Run a validated write request under admission control, or shed it with a 429.
+
+    `voter_addresses` has one entry per row; the client is charged for
+    every row and each voter for its own.
+    """
+    rejection = admission.admit(
+        client, [address for address in voter_addresses if isinstance(address, str)], len(voter_addresses)
+    )
+    if rejection is not None:
+        reason, retry_after = rejection
+        result = {
+            "success": False,
+            "error": AdmissionControl.REJECTIONS[reason]
+        }
+        record_outcome(operation, result)
+        raise ApiError(429, result["error"], {"Retry-After": AdmissionControl.retry_after_header(retry_after)})
+    try:
+        yield
+    finally:
+        admission.release()
+
+
+def result_response(result, failure_status=400, success_status=200):
+    return result, success_status if result["success"] else failure_status
+
+
+def election_result_response(result):
+    """Like result_response, with a 404 for an unknown election"""
+    if not result["success"] and result["error"] == "Election not found":
+        return result, 404
+    return result_response(result)
+
+
+def parse_registration(data):
+    """(voter_address, nid, election_id) from a register-voter body"""
+    data = json_object(data)
+    voter_address = data.get('voter_address')
+    nid = data.get('nid')
+    if not voter_address or not nid:
+        raise ApiError(400, "Voter address and NID are required")
+    return voter_address, nid, data.get('election_id', 1)
+
+
+def parse_vote(data):
+    """(voter_address, election_id, candidate_name) from a cast-vote body"""
+    data = json_object(data)
+    voter_address = data.get('voter_address')
+    candidate_name = data.get('candidate_name')
+    if not voter_address or not candidate_name:
+        raise ApiError(400, "Voter address and candidate name are required")
+    return voter_address, data.get('election_id', 1), candidate_name
+
+
+def row_voters(records):
+    """The voter address of each row of a bulk request, for admission"""
+    return [record.get('voter_address') for record in records]
+
+
+def vote_args(record):
+    """submit_vote arguments for an accepted vote record"""
+    return record["voter_address"], record.get("election_id", 1), record["candidate_name"]
+
+
+def parse_batch(body, ndjson=False):
+    """Records of a bulk request body sent as a JSON array or as NDJSON"""
+    try:
+        if ndjson:
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+    except ValueError:
+        raise ApiError(400, "Request body must be a JSON array or NDJSON")
+
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ApiError(400, "Request body must be a list of objects")
+    if len(records) > Config.MAX_BATCH_SIZE:
+        raise ApiError(400, f"Batch exceeds maximum size of {Config.MAX_BATCH_SIZE}")
+    return records
+
+
+def batch_response(results):
+    """Summarise per-item results of a bulk request"""
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "success": True,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+
+def record_outcomes(operation, results):
+    for result in results:
+        record_outcome(operation, result)
+    return results
+
+
+def reserve_submission(blockchain_handler, count=1):
+    """Claim on-chain submission space for `count` votes before accepting them.
+
+    Returns how many slots were reserved (none without a contract); the
+    caller hands each to submit_vote or gives it back with unreserve().
+    Raises a 503 if submission is saturated.
+    """
+    if not blockchain_handler.contract:
+        return 0
+    if not blockchain_handler.pipeline.reserve(count):
+        result = {
+            "success": False,
+            "error": "Vote submission queue is full, please retry"
+        }
+        record_outcome("vote", result)
+        raise ApiError(503, result["error"], {"Retry-After": str(Config.TX_RETRY_AFTER)})
+    return count
+
+
+def tx_status_response(ticket, status):
+    if status is None:
+        raise ApiError(404, "Unknown ticket")
+    return {
+        "success": True,
+        "ticket": ticket,
+        **status
+    }
+
+
+def parse_results_time(args):
+    """The ?at= time of a results request, or None for the current results"""
+    if not args.get('at'):
+        return None
+    try:
+        return parse_time(args['at'])
+    except ValueError:
+        raise ApiError(400, "at must be epoch seconds or ISO 8601")
+
+
+def cached_results_response(election_id, cached, if_none_match):
+    """Serve a (version, JSON) results body with an ETag, or 304 if the client has it"""
+    version, body = cached
+    etag = f"{election_id}-{version}"
+    headers = {"ETag": quote_etag(etag)}
+    if if_none_match.contains(etag):
+        return "", 304, headers
+    return body, 200, dict(headers, **{"Content-Type": "application/json"})
+
+
+def parse_timeline_args(args):
+    """(start, end, step) of a timeline request"""
+    try:
+        start = parse_time(args.get('from'))
+        end = parse_time(args.get('to'))
+    except ValueError:
+        raise ApiError(400, "from and to must be epoch seconds or ISO 8601")
+    return start, end, args.get('step', 60, type=int)
+
+
+def parse_election(data):
+    """(name, candidates, start_time, end_time, open) from a create-election body"""
+    data = json_object(data)
+    name = data.get('name')
+    candidates = data.get('candidates')
+    if not name or not isinstance(candidates, list) or not candidates:
+        raise ApiError(400, "Election name and candidates are required")
+    try:
+        start_time = parse_time(data.get('start_time'))
+        end_time = parse_time(data.get('end_time'))
+    except ValueError:
+        raise ApiError(400, "Start and end times must be epoch seconds or ISO 8601")
+    return name, candidates, start_time, end_time, bool(data.get('open'))
+
+
+def check_election_action(action):
+    if action not in ELECTION_ACTIONS:
+        raise ApiError(404, "Endpoint not found")
+
+
+def parse_eligibility(data):
+    """Voter addresses of an eligibility request: voter_address, or a voter_addresses list"""
+    data = json_object(data)
+    voter_addresses = data.get('voter_addresses')
+    if voter_addresses is None:
+        voter_address = data.get('voter_address')
+        if not isinstance(voter_address, str) or not voter_address:
+            raise ApiError(400, "Voter address is required")
+        return [voter_address]
+    if not isinstance(voter_addresses, list) or not voter_addresses:
+        raise ApiError(400, "voter_addresses must be a non-empty list")
+    if len(voter_addresses) > Config.MAX_BATCH_SIZE:
+        raise ApiError(400, f"Batch exceeds maximum size of {Config.MAX_BATCH_SIZE}")
+    if not all(isinstance(address, str) and address for address in voter_addresses):
+        raise ApiError(400, "Voter addresses must be non-empty strings")
+    return voter_addresses
+
+
+def eligibility_response(results):
+    if len(results) == 1:
+        return result_response(results[0])
+    return batch_response(results)
+
+
+def audit_root_response(result, audit_anchor):
+    """The audit log root with its latest on-chain anchor"""
+    result["anchored"] = audit_anchor.last if audit_anchor else None
+    return result
+
+
+def parse_export(kind, args):
+    """(format, election_id) of an export request"""
+    if kind not in EXPORT_FIELDS:
+        raise ApiError(404, "Unknown export, expected voters, votes or results")
+    fmt = args.get('format', 'ndjson')
+    if fmt not in CONTENT_TYPES:
+        raise ApiError(400, "Format must be ndjson or csv")
+    return fmt, args.get('election_id', type=int)
+
+
+def export_headers(kind, fmt):
+    return {"Content-Disposition": f'attachment; filename="{kind}.{fmt}"'}
+
+
+def health(blockchain_handler):
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "blockchain_status": blockchain_handler.get_connection_state(),
+        "blockchain_error": blockchain_handler.connect_error,
+        "blockchain_connected": blockchain_handler.is_connected(),
+        "latest_block": blockchain_handler.get_latest_block()
+    }
+
+
+def blockchain_info(blockchain_handler):
+    return {
+        "success": True,
+        "info": {
+            "connected": blockchain_handler.is_connected(),
+            "latest_block": blockchain_handler.get_latest_block(),
+            "network_url": Config.BLOCKCHAIN_URL,
+            "circuit": blockchain_handler.breaker.state,
+            "submission": blockchain_handler.pipeline.stats()
+        }
+    }
+
+
+def internal_error(endpoint, error):
+    """Log an unexpected error raised while handling `endpoint` and answer 500"""
+    logger.error(f"{endpoint} endpoint error: {str(error)}")
+    return {"success": False, "error": "Internal server error"}, 500
@@ -1,11 +1,19 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+import functools
+import time
 import logging
-from datetime import datetime
 
+import api
 from config import Config
 from blockchain import BlockchainHandler
-from smart_contract import SmartContractInterface
+from state_backend import create_state_backend
+from results_stream import ResultsBroadcaster
+from merkle import RootAnchor
+from ratelimit import AdmissionControl
+from metrics import REGISTRY, REQUEST_LATENCY, SamplingProfiler, record_outcome
+from bulk import CONTENT_TYPES, export_stream
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -18,125 +26,315 @@ CORS(app)
 
 # Initialize blockchain components
 blockchain_handler = BlockchainHandler()
-smart_contract = SmartContractInterface(blockchain_handler)
+smart_contract = create_state_backend(blockchain_handler)
+results_broadcaster = ResultsBroadcaster(smart_contract, interval=Config.RESULTS_STREAM_INTERVAL)
+audit_anchor = None
+if Config.AUDIT_ANCHOR_INTERVAL > 0:
+    audit_anchor = RootAnchor(
+        smart_contract.get_audit_root,
+        blockchain_handler.anchor_audit_root,
+        interval=Config.AUDIT_ANCHOR_INTERVAL
+    )
+admission = AdmissionControl(
+    Config.RATE_LIMIT_CLIENT_RATE,
+    Config.RATE_LIMIT_CLIENT_BURST,
+    Config.RATE_LIMIT_VOTER_RATE,
+    Config.RATE_LIMIT_VOTER_BURST,
+    Config.MAX_CONCURRENT_WRITES
+)
+profiler = SamplingProfiler(
+    interval=Config.PROFILER_INTERVAL,
+    min_interval=Config.PROFILER_MIN_INTERVAL,
+    max_stacks=Config.PROFILER_MAX_STACKS
+)
+
+REGISTRY.gauge(
+    "ballot_tx_queue_depth", "Vote transactions by submission stage",
+    lambda: {("queued",): blockchain_handler.pipeline.queue.qsize(), ("in_flight",): len(blockchain_handler.pipeline.in_flight)},
+    ("stage",)
+)
+REGISTRY.gauge("ballot_active_writes", "Write requests in progress", lambda: admission.writes.active)
+REGISTRY.gauge(
+    "ballot_stream_subscribers", "Open results streams",
+    lambda: sum(len(subscribers) for subscribers in list(results_broadcaster.subscribers.values()))
+)
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def observe_latency(response):
+    started = g.get('started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, endpoint, response.status_code)
+    return response
+
+def client_address():
+    return api.client_address(request.remote_addr, request.headers.get('X-Forwarded-For'))
+
+def admitted(operation, voter_addresses):
+    """Admission control for this request's client: shed it over the client, voter or concurrency limits with a 429"""
+    return api.admitted(admission, operation, client_address(), voter_addresses)
+
+def admin_access(view):
+    """Hide election administration unless ADMIN_TOKEN is set, and require that token"""
+    
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        api.check_token(Config.ADMIN_TOKEN, request.headers.get('X-Admin-Token'), "admin")
+        return view(*args, **kwargs)
+    return wrapper
+
+def profiler_access(view):
+    """Hide the profiler unless PROFILER_TOKEN is set, and require that token"""
+    
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        api.check_token(Config.PROFILER_TOKEN, request.headers.get('X-Profiler-Token'), "profiler")
+        return view(*args, **kwargs)
+    return wrapper
+
+def read_batch():
+    """Read a bulk request body sent as a JSON array or as NDJSON"""
+    return api.parse_batch(request.get_data(as_text=True), ndjson=request.mimetype == 'application/x-ndjson')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "blockchain_connected": blockchain_handler.is_connected(),
-        "latest_block": blockchain_handler.get_latest_block()
-    })
+    return api.health(blockchain_handler)
 
 @app.route('/api/register-voter', methods=['POST'])
 def register_voter():
     """Register a new voter"""
-    try:
-        data = request.get_json()
-        voter_address = data.get('voter_address')
-        nid = data.get('nid')
-        election_id = data.get('election_id', 1)
-        
-        if not voter_address or not nid:
-            return jsonify({
-                "success": False,
-                "error": "Voter address and NID are required"
-            }), 400
-        
+    voter_address, nid, election_id = api.parse_registration(request.get_json(silent=True))
+    
+    with admitted("register", [voter_address]):
         # Register voter in smart contract
         result = smart_contract.register_voter(voter_address, nid, election_id)
-        
-        if result["success"]:
-            return jsonify(result)
-        else:
-            return jsonify(result), 400
-            
-    except Exception as e:
-        logger.error(f"Registration endpoint error: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+        record_outcome("register", result)
+        return api.result_response(result)
 
 @app.route('/api/cast-vote', methods=['POST'])
 def cast_vote():
     """Cast a vote"""
-    try:
-        data = request.get_json()
-        voter_address = data.get('voter_address')
-        election_id = data.get('election_id', 1)
-        candidate_name = data.get('candidate_name')
-        
-        if not voter_address or not candidate_name:
-            return jsonify({
-                "success": False,
-                "error": "Voter address and candidate name are required"
-            }), 400
-        
-        # Cast vote in smart contract
-        result = smart_contract.cast_vote(voter_address, election_id, candidate_name)
-        
-        if result["success"]:
-            return jsonify(result)
-        else:
-            return jsonify(result), 400
+    voter_address, election_id, candidate_name = api.parse_vote(request.get_json(silent=True))
+    
+    with admitted("vote", [voter_address]):
+        # Claim on-chain submission space before accepting the vote and push
+        # back if submission is saturated. A vote whose transaction cannot be
+        # prepared (node unreachable, node cannot sign) is still counted here;
+        # on_chain reports the error and the vote is not submitted later
+        reserved = api.reserve_submission(blockchain_handler)
+        try:
+            # Cast vote in smart contract
+            result = smart_contract.cast_vote(voter_address, election_id, candidate_name)
+            record_outcome("vote", result)
             
-    except Exception as e:
-        logger.error(f"Voting endpoint error: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+            if result["success"] and reserved:
+                reserved = 0
+                result["on_chain"] = blockchain_handler.submit_vote(
+                    voter_address, election_id, candidate_name, reserved=True
+                )
+            return api.result_response(result)
+        finally:
+            blockchain_handler.pipeline.unreserve(reserved)
+
+@app.route('/api/tx-status/<int:ticket>', methods=['GET'])
+def get_tx_status(ticket):
+    """Get the on-chain submission status of a queued vote transaction"""
+    return api.tx_status_response(ticket, blockchain_handler.pipeline.status(ticket))
+
+@app.route('/api/register-voters', methods=['POST'])
+def register_voters():
+    """Register a batch of voters"""
+    records = read_batch()
+    with admitted("register", api.row_voters(records)):
+        return api.batch_response(api.record_outcomes("register", smart_contract.register_voters(records)))
+
+@app.route('/api/cast-votes', methods=['POST'])
+def cast_votes():
+    """Cast a batch of votes"""
+    records = read_batch()
+    
+    with admitted("vote", api.row_voters(records)):
+        # Room for every vote in the batch is claimed before any is accepted
+        reserved = api.reserve_submission(blockchain_handler, len(records))
+        try:
+            results = api.record_outcomes("vote", smart_contract.cast_votes(records))
+            if reserved:
+                for record, result in zip(records, results):
+                    if result["success"]:
+                        reserved -= 1
+                        result["on_chain"] = blockchain_handler.submit_vote(*api.vote_args(record), reserved=True)
+            return api.batch_response(results)
+        finally:
+            blockchain_handler.pipeline.unreserve(reserved)
 
 @app.route('/api/election-results/<int:election_id>', methods=['GET'])
 def get_election_results(election_id):
-    """Get election results"""
-    try:
-        result = smart_contract.get_election_results(election_id)
-        return jsonify(result)
-        
-    except Exception as e:
-        logger.error(f"Results endpoint error: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    """Get election results, or with ?at= the results as of that time"""
+    at = api.parse_results_time(request.args)
+    if at is not None:
+        return api.result_response(smart_contract.get_election_results_at(election_id, at), 404)
+    
+    cached = smart_contract.get_election_results_json(election_id)
+    if cached is None:
+        return smart_contract.get_election_results(election_id)
+    return api.cached_results_response(election_id, cached, request.if_none_match)
+
+@app.route('/api/election-results/<int:election_id>/timeline', methods=['GET'])
+def get_turnout_timeline(election_id):
+    """Get votes, turnout and running results per ?step= seconds between ?from= and ?to="""
+    start, end, step = api.parse_timeline_args(request.args)
+    result = smart_contract.get_turnout_timeline(election_id, start, end, step)
+    return api.election_result_response(result)
+
+@app.route('/api/stream/results/<int:election_id>', methods=['GET'])
+def stream_election_results(election_id):
+    """Stream live election results as Server-Sent Events"""
+    result = smart_contract.get_election_results(election_id)
+    if not result["success"]:
+        return result, 404
+    
+    subscriber = results_broadcaster.subscribe(election_id)
+    return Response(
+        stream_with_context(results_broadcaster.stream(election_id, subscriber)),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.route('/api/elections', methods=['GET'])
+def list_elections():
+    """List every election"""
+    return smart_contract.list_elections()
+
+@app.route('/api/elections', methods=['POST'])
+@admin_access
+def create_election():
+    """Create an election"""
+    name, candidates, start_time, end_time, open_now = api.parse_election(request.get_json(silent=True))
+    
+    result = smart_contract.create_election(name, candidates, start_time, end_time)
+    if result["success"] and open_now:
+        result = dict(result, **smart_contract.open_election(result["election_id"]))
+    return api.result_response(result, success_status=201)
+
+@app.route('/api/elections/<int:election_id>', methods=['GET'])
+def get_election(election_id):
+    """Get an election's definition and state"""
+    return api.result_response(smart_contract.get_election(election_id), 404)
+
+@app.route('/api/elections/<int:election_id>/<action>', methods=['POST'])
+@admin_access
+def change_election_status(election_id, action):
+    """Open or close an election"""
+    api.check_election_action(action)
+    result = getattr(smart_contract, f"{action}_election")(election_id)
+    return api.election_result_response(result)
+
+@app.route('/api/elections/<int:election_id>/eligibility', methods=['POST'])
+@admin_access
+def grant_eligibility(election_id):
+    """Make registered voters eligible for an election"""
+    voter_addresses = api.parse_eligibility(request.get_json(silent=True))
+    return api.eligibility_response(smart_contract.grant_eligibilities(voter_addresses, election_id))
 
 @app.route('/api/voter-status/<voter_address>', methods=['GET'])
 def get_voter_status(voter_address):
     """Get voter registration and voting status"""
-    try:
-        result = smart_contract.get_voter_status(voter_address)
-        return jsonify(result)
-        
-    except Exception as e:
-        logger.error(f"Voter status endpoint error: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return smart_contract.get_voter_status(voter_address, request.args.get('election_id', type=int))
+
+@app.route('/api/on-chain/election-results/<int:election_id>', methods=['GET'])
+def get_on_chain_results(election_id):
+    """Get election results as recorded on-chain, from the event-log index"""
+    return api.result_response(blockchain_handler.get_election_results(election_id), 503)
+
+@app.route('/api/on-chain/voter-status/<voter_address>', methods=['GET'])
+def get_on_chain_voter_status(voter_address):
+    """Get a voter's on-chain registration and voting status, from the event-log index"""
+    return api.result_response(blockchain_handler.get_voter_status(voter_address), 503)
+
+@app.route('/api/audit/root', methods=['GET'])
+def get_audit_root():
+    """Get the current ballot audit log root and its latest on-chain anchor"""
+    return api.audit_root_response(smart_contract.get_audit_root(), audit_anchor)
+
+@app.route('/api/audit/proof/<int:ballot_id>', methods=['GET'])
+def get_ballot_proof(ballot_id):
+    """Get a ballot's Merkle inclusion proof and the current audit log root"""
+    return api.result_response(smart_contract.get_ballot_proof(ballot_id), 404)
+
+@app.route('/api/export/<kind>', methods=['GET'])
+def export_data(kind):
+    """Stream every voter, vote or result as NDJSON or CSV"""
+    fmt, election_id = api.parse_export(kind, request.args)
+    if election_id is not None:
+        result = smart_contract.get_election(election_id)
+        if not result["success"]:
+            return result, 404
+    
+    # Rows are read a page at a time while the response is being sent
+    return Response(
+        export_stream(smart_contract, kind, fmt, election_id),
+        mimetype=CONTENT_TYPES[fmt],
+        headers=api.export_headers(kind, fmt)
+    )
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    remote = ()
+    if Config.STATE_BACKEND == 'shared':
+        # State-side metrics (results cache, journal) live in the state server
+        try:
+            remote = smart_contract.collect_metrics()
+        except Exception as e:
+            logger.error(f"State server metrics unavailable: {str(e)}")
+    return Response(REGISTRY.render(remote), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiler', methods=['GET'])
+@profiler_access
+def get_profile():
+    """Sampled stacks in collapsed (flame graph) format, or the profiler status as JSON"""
+    if request.args.get('format') == 'status':
+        return jsonify({"success": True, **profiler.status()})
+    return Response(profiler.collapsed(), mimetype='text/plain')
+
+@app.route('/api/profiler/<action>', methods=['POST'])
+@profiler_access
+def control_profiler(action):
+    """Start, stop or reset the sampling profiler"""
+    if action == 'start':
+        interval = request.args.get('interval', type=float)
+        changed = profiler.start(interval)
+    elif action == 'stop':
+        changed = profiler.stop()
+    elif action == 'reset':
+        profiler.reset()
+        changed = True
+    else:
+        return not_found(None)
+    return jsonify({"success": True, "changed": changed, **profiler.status()})
 
 @app.route('/api/blockchain-info', methods=['GET'])
 def get_blockchain_info():
     """Get blockchain information"""
-    try:
-        return jsonify({
-            "success": True,
-            "info": {
-                "connected": blockchain_handler.is_connected(),
-                "latest_block": blockchain_handler.get_latest_block(),
-                "network_url": Config.BLOCKCHAIN_URL
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Blockchain info endpoint error: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return api.blockchain_info(blockchain_handler)
+
+@app.errorhandler(api.ApiError)
+def api_error(error):
+    return error.response()
+
+@app.errorhandler(Exception)
+def unexpected_error(error):
+    if isinstance(error, HTTPException):
+        return error
+    return api.internal_error(request.endpoint, error)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -155,6 +353,6 @@ def internal_error(error):
 if __name__ == '__main__':
     logger.info("Starting Digital Ballot System Backend...")
     logger.info(f"Blockchain URL: {Config.BLOCKCHAIN_URL}")
-    logger.info(f"Blockchain Connected: {blockchain_handler.is_connected()}")
+    logger.info(f"Blockchain: {blockchain_handler.get_connection_state()}")
     
-    app.run(host='0.0.0.0', port=5000, debug=Config.DEBUG)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=Config.DEBUG)
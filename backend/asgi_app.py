@@ -0,0 +1,459 @@
+import asyncio
+import functools
+import queue
+import time
+import logging
+
+from quart import Quart, Response, request, jsonify, g
+from quart_cors import cors
+from werkzeug.exceptions import HTTPException
+
+import api
+from config import Config
+from async_blockchain import AsyncBlockchainHandler
+from state_backend import create_state_backend
+from results_stream import ResultsBroadcaster
+from merkle import RootAnchor
+from ratelimit import AdmissionControl
+from metrics import REGISTRY, REQUEST_LATENCY, SamplingProfiler, record_outcome
+from bulk import CONTENT_TYPES, export_stream
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Initialize Quart app; serve with `hypercorn asgi_app:app`
+app = Quart(__name__)
+app.config.from_object(Config)
+app = cors(app)
+
+# Initialize blockchain components
+blockchain_handler = AsyncBlockchainHandler()
+smart_contract = create_state_backend(blockchain_handler)
+results_broadcaster = ResultsBroadcaster(smart_contract, interval=Config.RESULTS_STREAM_INTERVAL)
+# Started with the event loop, which anchoring transactions are prepared on
+audit_anchor = None
+admission = AdmissionControl(
+    Config.RATE_LIMIT_CLIENT_RATE,
+    Config.RATE_LIMIT_CLIENT_BURST,
+    Config.RATE_LIMIT_VOTER_RATE,
+    Config.RATE_LIMIT_VOTER_BURST,
+    Config.MAX_CONCURRENT_WRITES
+)
+profiler = SamplingProfiler(
+    interval=Config.PROFILER_INTERVAL,
+    min_interval=Config.PROFILER_MIN_INTERVAL,
+    max_stacks=Config.PROFILER_MAX_STACKS
+)
+
+REGISTRY.gauge(
+    "ballot_tx_queue_depth", "Vote transactions by submission stage",
+    lambda: {("queued",): blockchain_handler.pipeline.queue.qsize(), ("in_flight",): len(blockchain_handler.pipeline.in_flight)},
+    ("stage",)
+)
+REGISTRY.gauge("ballot_active_writes", "Write requests in progress", lambda: admission.writes.active)
+REGISTRY.gauge(
+    "ballot_stream_subscribers", "Open results streams",
+    lambda: sum(len(subscribers) for subscribers in list(results_broadcaster.subscribers.values()))
+)
+
+# Shared-state proxy calls are a socket round trip, and journaled writes wait
+# for the group commit; both would stall the event loop if called inline
+REMOTE_STATE = Config.STATE_BACKEND == 'shared'
+DURABLE_WRITES = REMOTE_STATE or bool(Config.JOURNAL_DIR)
+
+
+async def run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+async def state_read(method, *args):
+    """Call a read-only state method without blocking the event loop"""
+    if REMOTE_STATE:
+        return await run_blocking(method, *args)
+    return method(*args)
+
+
+async def state_write(method, *args):
+    """Call a mutating state method without blocking the event loop"""
+    if DURABLE_WRITES:
+        return await run_blocking(method, *args)
+    return method(*args)
+
+
+def client_address():
+    return api.client_address(request.remote_addr, request.headers.get('X-Forwarded-For'))
+
+
+def admitted(operation, voter_addresses):
+    """Admission control for this request's client: shed it over the client, voter or concurrency limits with a 429"""
+    return api.admitted(admission, operation, client_address(), voter_addresses)
+
+
+def admin_access(view):
+    """Hide election administration unless ADMIN_TOKEN is set, and require that token"""
+
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        api.check_token(Config.ADMIN_TOKEN, request.headers.get('X-Admin-Token'), "admin")
+        return await view(*args, **kwargs)
+    return wrapper
+
+
+def profiler_access(view):
+    """Hide the profiler unless PROFILER_TOKEN is set, and require that token"""
+
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        api.check_token(Config.PROFILER_TOKEN, request.headers.get('X-Profiler-Token'), "profiler")
+        return await view(*args, **kwargs)
+    return wrapper
+
+
+async def read_batch():
+    """Read a bulk request body sent as a JSON array or as NDJSON"""
+    body = await request.get_data(as_text=True)
+    return api.parse_batch(body, ndjson=request.mimetype == 'application/x-ndjson')
+
+
+@app.before_request
+async def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+async def observe_latency(response):
+    started = g.get('started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, endpoint, response.status_code)
+    return response
+
+
+@app.before_serving
+async def start_blockchain():
+    global audit_anchor
+    await blockchain_handler.start()
+    if Config.AUDIT_ANCHOR_INTERVAL > 0:
+        loop = asyncio.get_running_loop()
+        audit_anchor = RootAnchor(
+            smart_contract.get_audit_root,
+            lambda root, tree_size: asyncio.run_coroutine_threadsafe(
+                blockchain_handler.anchor_audit_root(root, tree_size), loop
+            ).result(),
+            interval=Config.AUDIT_ANCHOR_INTERVAL
+        )
+
+
+@app.after_serving
+async def stop_blockchain():
+    await blockchain_handler.stop()
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    return api.health(blockchain_handler)
+
+@app.route('/api/register-voter', methods=['POST'])
+async def register_voter():
+    """Register a new voter"""
+    voter_address, nid, election_id = api.parse_registration(await request.get_json(silent=True))
+
+    with admitted("register", [voter_address]):
+        # Register voter in smart contract
+        result = await state_write(smart_contract.register_voter, voter_address, nid, election_id)
+        record_outcome("register", result)
+        return api.result_response(result)
+
+@app.route('/api/cast-vote', methods=['POST'])
+async def cast_vote():
+    """Cast a vote"""
+    voter_address, election_id, candidate_name = api.parse_vote(await request.get_json(silent=True))
+
+    with admitted("vote", [voter_address]):
+        # Claim on-chain submission space before accepting the vote and push
+        # back if submission is saturated. A vote whose transaction cannot be
+        # prepared (node unreachable, node cannot sign) is still counted here;
+        # on_chain reports the error and the vote is not submitted later
+        reserved = api.reserve_submission(blockchain_handler)
+        try:
+            # Cast vote in smart contract
+            result = await state_write(smart_contract.cast_vote, voter_address, election_id, candidate_name)
+            record_outcome("vote", result)
+
+            if result["success"] and reserved:
+                reserved = 0
+                result["on_chain"] = await blockchain_handler.submit_vote(
+                    voter_address, election_id, candidate_name, reserved=True
+                )
+            return api.result_response(result)
+        finally:
+            blockchain_handler.pipeline.unreserve(reserved)
+
+@app.route('/api/tx-status/<int:ticket>', methods=['GET'])
+async def get_tx_status(ticket):
+    """Get the on-chain submission status of a queued vote transaction"""
+    return api.tx_status_response(ticket, blockchain_handler.pipeline.status(ticket))
+
+@app.route('/api/register-voters', methods=['POST'])
+async def register_voters():
+    """Register a batch of voters"""
+    records = await read_batch()
+    with admitted("register", api.row_voters(records)):
+        # Hashing a large batch is CPU work; keep it off the event loop
+        results = await run_blocking(smart_contract.register_voters, records)
+        return api.batch_response(api.record_outcomes("register", results))
+
+@app.route('/api/cast-votes', methods=['POST'])
+async def cast_votes():
+    """Cast a batch of votes"""
+    records = await read_batch()
+
+    with admitted("vote", api.row_voters(records)):
+        # Room for every vote in the batch is claimed before any is accepted
+        reserved = api.reserve_submission(blockchain_handler, len(records))
+        try:
+            results = api.record_outcomes("vote", await run_blocking(smart_contract.cast_votes, records))
+            if reserved:
+                accepted = [(record, result) for record, result in zip(records, results) if result["success"]]
+                # Each submit_vote uses or gives back one reserved slot
+                reserved -= len(accepted)
+                submissions = await asyncio.gather(*(
+                    blockchain_handler.submit_vote(*api.vote_args(record), reserved=True)
+                    for record, _ in accepted
+                ))
+                for (_, result), on_chain in zip(accepted, submissions):
+                    result["on_chain"] = on_chain
+            return api.batch_response(results)
+        finally:
+            blockchain_handler.pipeline.unreserve(reserved)
+
+@app.route('/api/election-results/<int:election_id>', methods=['GET'])
+async def get_election_results(election_id):
+    """Get election results, or with ?at= the results as of that time"""
+    at = api.parse_results_time(request.args)
+    if at is not None:
+        return api.result_response(await state_read(smart_contract.get_election_results_at, election_id, at), 404)
+
+    cached = await state_read(smart_contract.get_election_results_json, election_id)
+    if cached is None:
+        return await state_read(smart_contract.get_election_results, election_id)
+    return api.cached_results_response(election_id, cached, request.if_none_match)
+
+@app.route('/api/election-results/<int:election_id>/timeline', methods=['GET'])
+async def get_turnout_timeline(election_id):
+    """Get votes, turnout and running results per ?step= seconds between ?from= and ?to="""
+    start, end, step = api.parse_timeline_args(request.args)
+    result = await state_read(smart_contract.get_turnout_timeline, election_id, start, end, step)
+    return api.election_result_response(result)
+
+async def stream_subscriber(election_id, subscriber):
+    """Async version of ResultsBroadcaster.stream for one subscriber.
+
+    Waiting on the subscriber queue would tie up an executor thread per
+    open stream, so the queue is drained once per broadcast interval instead.
+    """
+    try:
+        results = await state_read(smart_contract.get_election_results, election_id)
+        yield results_broadcaster._format("snapshot", results["version"], {
+            "version": results["version"],
+            "total_votes": results["total_votes"],
+            "results": results["results"]
+        })
+
+        last_sent = time.monotonic()
+        while True:
+            await asyncio.sleep(results_broadcaster.interval)
+            try:
+                while True:
+                    yield subscriber.get_nowait()
+                    last_sent = time.monotonic()
+            except queue.Empty:
+                pass
+
+            if time.monotonic() - last_sent >= results_broadcaster.heartbeat:
+                if not results_broadcaster.is_subscribed(election_id, subscriber):
+                    # Dropped for falling behind; the client reconnects and resyncs
+                    return
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+    finally:
+        results_broadcaster.unsubscribe(election_id, subscriber)
+
+@app.route('/api/stream/results/<int:election_id>', methods=['GET'])
+async def stream_election_results(election_id):
+    """Stream live election results as Server-Sent Events"""
+    result = await state_read(smart_contract.get_election_results, election_id)
+    if not result["success"]:
+        return result, 404
+
+    subscriber = results_broadcaster.subscribe(election_id)
+    response = Response(
+        stream_subscriber(election_id, subscriber),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+    response.timeout = None
+    return response
+
+@app.route('/api/elections', methods=['GET'])
+async def list_elections():
+    """List every election"""
+    return await state_read(smart_contract.list_elections)
+
+@app.route('/api/elections', methods=['POST'])
+@admin_access
+async def create_election():
+    """Create an election"""
+    name, candidates, start_time, end_time, open_now = api.parse_election(await request.get_json(silent=True))
+
+    result = await state_write(smart_contract.create_election, name, candidates, start_time, end_time)
+    if result["success"] and open_now:
+        result = dict(result, **await state_write(smart_contract.open_election, result["election_id"]))
+    return api.result_response(result, success_status=201)
+
+@app.route('/api/elections/<int:election_id>', methods=['GET'])
+async def get_election(election_id):
+    """Get an election's definition and state"""
+    return api.result_response(await state_read(smart_contract.get_election, election_id), 404)
+
+@app.route('/api/elections/<int:election_id>/<action>', methods=['POST'])
+@admin_access
+async def change_election_status(election_id, action):
+    """Open or close an election"""
+    api.check_election_action(action)
+    result = await state_write(getattr(smart_contract, f"{action}_election"), election_id)
+    return api.election_result_response(result)
+
+@app.route('/api/elections/<int:election_id>/eligibility', methods=['POST'])
+@admin_access
+async def grant_eligibility(election_id):
+    """Make registered voters eligible for an election"""
+    voter_addresses = api.parse_eligibility(await request.get_json(silent=True))
+    results = await state_write(smart_contract.grant_eligibilities, voter_addresses, election_id)
+    return api.eligibility_response(results)
+
+@app.route('/api/voter-status/<voter_address>', methods=['GET'])
+async def get_voter_status(voter_address):
+    """Get voter registration and voting status"""
+    election_id = request.args.get('election_id', type=int)
+    return await state_read(smart_contract.get_voter_status, voter_address, election_id)
+
+@app.route('/api/on-chain/election-results/<int:election_id>', methods=['GET'])
+async def get_on_chain_results(election_id):
+    """Get election results as recorded on-chain, from the event-log index"""
+    return api.result_response(blockchain_handler.get_election_results(election_id), 503)
+
+@app.route('/api/on-chain/voter-status/<voter_address>', methods=['GET'])
+async def get_on_chain_voter_status(voter_address):
+    """Get a voter's on-chain registration and voting status, from the event-log index"""
+    return api.result_response(blockchain_handler.get_voter_status(voter_address), 503)
+
+@app.route('/api/audit/root', methods=['GET'])
+async def get_audit_root():
+    """Get the current ballot audit log root and its latest on-chain anchor"""
+    return api.audit_root_response(await state_read(smart_contract.get_audit_root), audit_anchor)
+
+@app.route('/api/audit/proof/<int:ballot_id>', methods=['GET'])
+async def get_ballot_proof(ballot_id):
+    """Get a ballot's Merkle inclusion proof and the current audit log root"""
+    return api.result_response(await state_read(smart_contract.get_ballot_proof, ballot_id), 404)
+
+@app.route('/api/export/<kind>', methods=['GET'])
+async def export_data(kind):
+    """Stream every voter, vote or result as NDJSON or CSV"""
+    fmt, election_id = api.parse_export(kind, request.args)
+    if election_id is not None:
+        result = await state_read(smart_contract.get_election, election_id)
+        if not result["success"]:
+            return result, 404
+
+    # Quart iterates a plain generator in the executor, so page reads never block the loop
+    response = Response(
+        export_stream(smart_contract, kind, fmt, election_id),
+        mimetype=CONTENT_TYPES[fmt],
+        headers=api.export_headers(kind, fmt)
+    )
+    response.timeout = None
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+async def get_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    remote = ()
+    if REMOTE_STATE:
+        # State-side metrics (results cache, journal) live in the state server
+        try:
+            remote = await state_read(smart_contract.collect_metrics)
+        except Exception as e:
+            logger.error(f"State server metrics unavailable: {str(e)}")
+    return Response(REGISTRY.render(remote), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiler', methods=['GET'])
+@profiler_access
+async def get_profile():
+    """Sampled stacks in collapsed (flame graph) format, or the profiler status as JSON"""
+    if request.args.get('format') == 'status':
+        return jsonify({"success": True, **profiler.status()})
+    return Response(profiler.collapsed(), mimetype='text/plain')
+
+@app.route('/api/profiler/<action>', methods=['POST'])
+@profiler_access
+async def control_profiler(action):
+    """Start, stop or reset the sampling profiler"""
+    if action == 'start':
+        interval = request.args.get('interval', type=float)
+        changed = profiler.start(interval)
+    elif action == 'stop':
+        # Joins the sampler thread, which sleeps up to one interval
+        changed = await run_blocking(profiler.stop)
+    elif action == 'reset':
+        profiler.reset()
+        changed = True
+    else:
+        return await not_found(None)
+    return jsonify({"success": True, "changed": changed, **profiler.status()})
+
+@app.route('/api/blockchain-info', methods=['GET'])
+async def get_blockchain_info():
+    """Get blockchain information"""
+    return api.blockchain_info(blockchain_handler)
+
+@app.errorhandler(api.ApiError)
+async def api_error(error):
+    return error.response()
+
+@app.errorhandler(Exception)
+async def unexpected_error(error):
+    if isinstance(error, HTTPException):
+        return error
+    return api.internal_error(request.endpoint, error)
+
+@app.errorhandler(404)
+async def not_found(error):
+    return jsonify({
+        "success": False,
+        "error": "Endpoint not found"
+    }), 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+    return jsonify({
+        "success": False,
+        "error": "Internal server error"
+    }), 500
+
+if __name__ == '__main__':
+    import hypercorn.asyncio
+    from hypercorn.config import Config as HypercornConfig
+
+    logger.info("Starting Digital Ballot System Backend (ASGI)...")
+    logger.info(f"Blockchain URL: {Config.BLOCKCHAIN_URL}")
+
+    server_config = HypercornConfig()
+    server_config.bind = ["0.0.0.0:5000"]
+    asyncio.run(hypercorn.asyncio.serve(app, server_config))
@@ -0,0 +1,356 @@
+import asyncio
+import importlib
+import time
+import logging
+
+import aiohttp
+
+from config import Config
+from metrics import CACHE_REQUESTS, instrument_provider
+from rpc import CircuitBreaker, TRANSPORT_ERRORS, create_session
+from tx_pipeline import SubmissionPipeline, NODE_CANNOT_SIGN
+
+logger = logging.getLogger(__name__)
+
+# aiohttp's own errors and asyncio's timeout (not an OSError before Python 3.11)
+ASYNC_TRANSPORT_ERRORS = TRANSPORT_ERRORS + (aiohttp.ClientError, asyncio.TimeoutError)
+
+class AsyncNonceManager:
+    """Async counterpart of transactions.NonceManager for one event loop"""
+
+    def __init__(self, fetch_count):
+        self.fetch_count = fetch_count
+        self.next_nonce = {}
+        self.locks = {}
+
+    async def reserve(self, address):
+        nonce = self.next_nonce.get(address)
+        if nonce is None:
+            CACHE_REQUESTS.inc("nonce", "miss")
+            lock = self.locks.setdefault(address, asyncio.Lock())
+            async with lock:
+                nonce = self.next_nonce.get(address)
+                if nonce is None:
+                    nonce = await self.fetch_count(address)
+        else:
+            CACHE_REQUESTS.inc("nonce", "hit")
+        # No await between the read above and this write, so it is atomic on the loop
+        nonce = max(nonce, self.next_nonce.get(address, 0))
+        self.next_nonce[address] = nonce + 1
+        return nonce
+
+    def release(self, address, nonce):
+        if self.next_nonce.get(address) == nonce + 1:
+            self.next_nonce[address] = nonce
+        else:
+            self.next_nonce.pop(address, None)
+
+    def resync(self, address):
+        """Forget the local nonce; called from the pipeline's sender thread"""
+        self.next_nonce.pop(address, None)
+        logger.info(f"Nonce for {address} will be resynchronized with the node")
+
+
+class AsyncBlockchainHandler:
+    """Non-blocking blockchain access for the ASGI app.
+
+    Uses AsyncWeb3 over one shared aiohttp connection pool. web3 is
+    imported and the node first reached from a background task that
+    retries with backoff, so serving starts at once. Connection
+    status, latest block and gas price are then refreshed by that task,
+    so request handlers only ever await RPCs they genuinely need (a
+    sender's first nonce). Prepared vote transactions go through the same
+    batched SubmissionPipeline as the WSGI app, and likewise need a node
+    that holds the voters' keys (see BlockchainHandler).
+
+    On-chain reads come from the same EventIndexer as in the WSGI app. It
+    polls on its own thread, so it gets a synchronous web3 client over the
+    pipeline's HTTP session and shares this handler's circuit breaker.
+    """
+
+    def __init__(self):
+        self.w3 = None
+        self.contract = None
+        self.indexer = None
+        self.account = None
+        self.chain_id = None
+        self.connecting = True
+        # Why the last connection attempt failed, while still connecting
+        self.connect_error = None
+        self.node_signs = False
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=Config.CIRCUIT_RESET_TIMEOUT
+        )
+        self.status = {"connected": False, "latest_block": 0, "checked_at": None}
+        self.gas_price = Config.DEFAULT_GAS_PRICE_GWEI * 10 ** 9
+        self.nonces = AsyncNonceManager(self._fetch_nonce)
+        self.rpc_session = create_session(Config.RPC_POOL_SIZE)
+        self.pipeline = SubmissionPipeline(
+            Config.BLOCKCHAIN_URL,
+            self.rpc_session,
+            self.nonces,
+            self.breaker,
+            queue_size=Config.TX_QUEUE_SIZE,
+            batch_size=Config.TX_BATCH_SIZE,
+            max_in_flight=Config.TX_MAX_IN_FLIGHT,
+            poll_interval=Config.TX_RECEIPT_POLL_INTERVAL,
+            timeout=Config.RPC_TIMEOUT,
+            receipt_timeout=Config.TX_RECEIPT_TIMEOUT,
+            send_attempts=Config.TX_SEND_ATTEMPTS,
+            retry_delay=Config.TX_RETRY_DELAY
+        )
+        self.session = None
+        self.poller = None
+
+    async def start(self):
+        """Open the connection pool and start connecting in the background"""
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=Config.RPC_POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(total=Config.RPC_TIMEOUT)
+        )
+        self.pipeline.start()
+        self.poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def connect(self):
+        """Create the AsyncWeb3 client; web3's slow import runs off the event loop"""
+        web3 = await asyncio.get_running_loop().run_in_executor(None, importlib.import_module, 'web3')
+        provider = instrument_provider(web3.AsyncHTTPProvider(Config.BLOCKCHAIN_URL))
+        await provider.cache_async_session(self.session)
+        # The circuit breaker handles failures; skip the provider's retries
+        provider.middlewares = ()
+        self.w3 = web3.AsyncWeb3(provider)
+
+    async def stop(self):
+        if self.poller:
+            self.poller.cancel()
+        if self.session:
+            await self.session.close()
+
+    async def _call(self, awaitable_fn):
+        """Await an RPC through the circuit breaker; only transport errors count as failures"""
+        if not self.breaker.allow():
+            raise ConnectionError("Blockchain node unavailable")
+        try:
+            result = await awaitable_fn()
+        except ASYNC_TRANSPORT_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_unrelated()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _call_blocking(self, fn):
+        """Run a blocking RPC through the circuit breaker, from the indexer's thread"""
+        if not self.breaker.allow():
+            raise ConnectionError("Blockchain node unavailable")
+        try:
+            result = fn()
+        except TRANSPORT_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_unrelated()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _create_indexer(self):
+        """Build the event indexer and its synchronous client; runs in the executor"""
+        from web3 import Web3
+        from indexer import EventIndexer
+
+        w3 = Web3(Web3.HTTPProvider(
+            Config.BLOCKCHAIN_URL,
+            request_kwargs={'timeout': Config.RPC_TIMEOUT},
+            session=self.rpc_session
+        ))
+        w3.provider.middlewares = ()
+        return EventIndexer(
+            w3,
+            w3.eth.contract(address=Config.CONTRACT_ADDRESS, abi=Config.CONTRACT_ABI),
+            Config.INDEXER_CHECKPOINT,
+            self._call_blocking,
+            start_block=Config.INDEXER_START_BLOCK,
+            chunk_size=Config.INDEXER_CHUNK_SIZE,
+            reorg_depth=Config.INDEXER_REORG_DEPTH,
+            poll_interval=Config.INDEXER_POLL_INTERVAL,
+            checkpoint_interval=Config.INDEXER_CHECKPOINT_INTERVAL
+        )
+
+    async def _fetch_nonce(self, address):
+        return await self._call(lambda: self.w3.eth.get_transaction_count(address, 'pending'))
+
+    async def refresh(self):
+        """Refresh cached status, chain id and gas price"""
+        try:
+            if self.w3 is None:
+                await self.connect()
+            block_number = await self._call(lambda: self.w3.eth.block_number)
+            if self.chain_id is None:
+                self.chain_id = await self._call(lambda: self.w3.eth.chain_id)
+            self.gas_price = await self._call(lambda: self.w3.eth.gas_price)
+            self.status = {"connected": True, "latest_block": block_number, "checked_at": time.time()}
+        except Exception as e:
+            logger.debug(f"Chain status poll failed: {str(e)}")
+            self.status = {"connected": False, "latest_block": self.status["latest_block"], "checked_at": time.time()}
+
+    async def _set_up(self):
+        """Set up the account, contract and indexer once the node answers; False to retry later"""
+        accounts = []
+        try:
+            accounts = await self._call(lambda: self.w3.eth.accounts)
+        except Exception as e:
+            logger.error(f"Could not list node accounts: {str(e)}")
+        try:
+            self.node_signs = bool(accounts)
+            if Config.PRIVATE_KEY:
+                self.account = self.w3.eth.account.from_key(Config.PRIVATE_KEY)
+            elif accounts:
+                self.account = accounts[0]
+            if Config.CONTRACT_ADDRESS:
+                if not self.node_signs:
+                    logger.error(
+                        "The node manages no accounts, so it cannot sign vote transactions "
+                        "(sent from each voter's address); on-chain vote submission is disabled"
+                    )
+                contract = self.w3.eth.contract(address=Config.CONTRACT_ADDRESS, abi=Config.CONTRACT_ABI)
+                indexer = await asyncio.get_running_loop().run_in_executor(None, self._create_indexer)
+                indexer.start()
+                self.indexer = indexer
+                # Published last: request handlers take a contract to mean "ready"
+                self.contract = contract
+        except Exception as e:
+            logger.error(f"Blockchain connection error: {str(e)}")
+            self.connect_error = str(e)
+            return False
+        self.connect_error = None
+        return True
+
+    async def _poll(self):
+        delay = Config.CONNECT_RETRY_INITIAL
+        while self.connecting:
+            await self.refresh()
+            if self.status["connected"] and await self._set_up():
+                self.connecting = False
+                break
+            logger.info(f"Retrying blockchain connection in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, Config.CONNECT_RETRY_MAX)
+
+        while True:
+            await asyncio.sleep(Config.CHAIN_STATUS_INTERVAL)
+            await self.refresh()
+
+    def is_connected(self):
+        return self.status["connected"]
+
+    def get_connection_state(self):
+        """Connection state: connecting (never connected yet), connected or disconnected"""
+        if self.connecting:
+            return "connecting"
+        return "connected" if self.is_connected() else "disconnected"
+
+    def get_latest_block(self):
+        return self.status["latest_block"] if self.status["connected"] else 0
+
+    async def submit_vote(self, voter_address, election_id, candidate, reserved=False):
+        """Prepare a vote transaction and queue it for batched submission.
+
+        With `reserved` the caller already claimed queue space through
+        pipeline.reserve(); it is used, or given back if the vote cannot
+        be prepared.
+        """
+        if not reserved and not self.pipeline.reserve():
+            return {"success": False, "error": "Submission queue full"}
+
+        transaction = None
+        try:
+            if not self.contract:
+                return {"success": False, "error": "Contract not initialized"}
+            if not self.node_signs:
+                return {"success": False, "error": NODE_CANNOT_SIGN}
+            transaction = await self._build_transaction(
+                self.contract.functions.castVote(election_id, candidate), voter_address
+            )
+        except Exception as e:
+            logger.error(f"Vote casting error: {str(e)}")
+            return {"success": False, "error": str(e)}
+        finally:
+            if transaction is None:
+                self.pipeline.unreserve()
+
+        ticket = self.pipeline.submit(transaction, reserved=True)
+        return {"success": True, "ticket": ticket, "message": "Vote transaction queued"}
+
+    async def _build_transaction(self, function, sender):
+        """Build a contract transaction with a locally allocated nonce; the sender is checksummed first"""
+        sender = self.w3.to_checksum_address(sender)
+        nonce = await self.nonces.reserve(sender)
+        try:
+            return await function.build_transaction({
+                'from': sender,
+                'gas': Config.GAS_LIMIT,
+                'gasPrice': self.gas_price,
+                'chainId': self.chain_id,
+                'nonce': nonce
+            })
+        except Exception:
+            self.nonces.release(sender, nonce)
+            raise
+
+    async def anchor_audit_root(self, root, tree_size):
+        """Queue a transaction recording the ballot audit log root on-chain"""
+        if not self.contract:
+            return {"success": False, "error": "Contract not initialized"}
+        if not self.account:
+            return {"success": False, "error": "No admin account configured"}
+
+        # A local account (PRIVATE_KEY) signs here; otherwise the node signs for its account
+        sender = getattr(self.account, 'address', self.account)
+        try:
+            transaction = await self._build_transaction(
+                self.contract.functions.anchorAuditRoot(bytes.fromhex(root), tree_size), sender
+            )
+        except Exception as e:
+            logger.error(f"Audit root anchoring error: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+        raw = None
+        if hasattr(self.account, 'key'):
+            try:
+                raw = self.w3.to_hex(self.account.sign_transaction(transaction).rawTransaction)
+            except Exception as e:
+                self.nonces.release(sender, transaction["nonce"])
+                logger.error(f"Audit root signing error: {str(e)}")
+                return {"success": False, "error": str(e)}
+
+        ticket = self.pipeline.submit(transaction, raw=raw)
+        if ticket is None:
+            self.nonces.release(sender, transaction["nonce"])
+            return {"success": False, "error": "Submission queue full"}
+
+        return {"success": True, "ticket": ticket, "message": "Audit root anchoring transaction queued"}
+
+    def get_election_results(self, election_id=1):
+        """Get election results from the event-log index"""
+        if not self.indexer:
+            return {"success": False, "error": "Contract not initialized"}
+        return {
+            "success": True,
+            "results": self.indexer.get_election_results(election_id),
+            "indexed_block": self.indexer.next_block - 1
+        }
+
+    def get_voter_status(self, voter_address):
+        """Get voter registration and voting status from the event-log index"""
+        if not self.indexer:
+            return {"success": False, "error": "Contract not initialized"}
+        registered, voted = self.indexer.get_voter_status(voter_address)
+        return {
+            "success": True,
+            "registered": registered,
+            "voted": voted
+        }
@@ -0,0 +1,150 @@
+"""WSGI (Flask) vs ASGI (Quart) load test against a slow node.
+
+Usage: python benchmarks/bench_async.py [votes] [concurrency] [latency]
+
+Starts benchmarks/fake_node.py with `latency` seconds (default 0.1) added
+to every RPC, then for each server - app.py on Werkzeug's threaded server
+and asgi_app.py on Hypercorn - registers `votes` fresh voters (default
+2,000) through /api/register-voters and fires one /api/cast-vote per voter
+from `concurrency` (default 100) concurrent clients. Every voter is a new
+sender, so each vote needs a pending-nonce RPC before its transaction can
+be queued. Reports p50/p99 request latency and requests/sec.
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import asyncio
+import logging
+import tempfile
+import subprocess
+
+import aiohttp
+from web3 import Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tx_pipeline import percentile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BATCH = 1000
+
+SERVERS = {
+    "flask": lambda port: [
+        sys.executable, "-c",
+        f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"
+    ],
+    "asgi": lambda port: [
+        sys.executable, "-m", "hypercorn", "-b", f"127.0.0.1:{port}", "asgi_app:app"
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+async def load(url, votes, concurrency):
+    addresses = [Web3.to_checksum_address(f"0x{i + 1:040x}") for i in range(votes)]
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for first in range(0, votes, BATCH):
+            records = [
+                {"voter_address": address, "nid": f"NID{first + i:013d}"}
+                for i, address in enumerate(addresses[first:first + BATCH])
+            ]
+            async with session.post(f"{url}/api/register-voters", json=records) as response:
+                assert (await response.json())["succeeded"] == len(records)
+
+        pending = iter(addresses)
+        latencies = []
+        failures = 0
+
+        async def client():
+            nonlocal failures
+            for address in pending:
+                started = time.perf_counter()
+                async with session.post(f"{url}/api/cast-vote", json={
+                    "voter_address": address,
+                    "candidate_name": "Jatiya Party"
+                }) as response:
+                    result = await response.json()
+                latencies.append(time.perf_counter() - started)
+                if not result.get("on_chain", {}).get("success"):
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, failures, elapsed
+
+
+def run(name, node_url, votes, concurrency, directory):
+    port = free_port()
+    env = dict(
+        os.environ,
+        BLOCKCHAIN_URL=node_url,
+        CONTRACT_ADDRESS="0x2222222222222222222222222222222222222222",
+        JOURNAL_DIR="",
+        INDEXER_CHECKPOINT=os.path.join(directory, f"{name}-indexer.json"),
+        RPC_POOL_SIZE=str(concurrency),
+        # Bulk registration is charged per row; measure the servers, not the limiter
+        RATE_LIMIT_CLIENT_RATE="0",
+        RATE_LIMIT_VOTER_RATE="0"
+    )
+    server = subprocess.Popen(
+        SERVERS[name](port), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        # Let the chain status and gas price caches warm up
+        time.sleep(1.0)
+        latencies, failures, elapsed = asyncio.run(load(f"http://127.0.0.1:{port}", votes, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+    return percentile(latencies, 0.50), percentile(latencies, 0.99), votes / elapsed, failures
+
+
+def main():
+    logging.disable(logging.INFO)
+    votes = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+    node_port = free_port()
+    node = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_node.py"), str(node_port), "0.2", str(latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    directory = tempfile.mkdtemp(prefix="ballot-async-")
+    print(f"{votes:,} votes, {concurrency} clients, {latency * 1000:.0f} ms per RPC")
+    print(f"{'server':>8} {'p50 ms':>9} {'p99 ms':>9} {'req/sec':>9}  failed")
+    try:
+        wait_for_port(node_port)
+        for name in SERVERS:
+            p50, p99, rate, failures = run(name, f"http://127.0.0.1:{node_port}", votes, concurrency, directory)
+            print(f"{name:>8} {p50 * 1000:>9.1f} {p99 * 1000:>9.1f} {rate:>9,.0f}  {failures}")
+    finally:
+        node.terminate()
+        node.wait()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Merkle audit log throughput benchmark.
+
+Usage: python benchmarks/bench_audit.py [ballots] [proofs]
+
+Appends `ballots` (default 10,000,000) synthetic ballot records to a
+MerkleLog, then generates and verifies `proofs` (default 100,000)
+inclusion proofs for random ballots against the final root. Reports
+appends/sec, proofs/sec, verifications/sec, proof length and the memory
+held by the cached tree levels.
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from merkle import MerkleLog, leaf_hash, verify_inclusion
+from smart_contract import BALLOT_RECORD
+
+CANDIDATES = 5
+
+
+def ballot_record(ballot_id):
+    """Stand-in for SmartContractInterface._ballot_record"""
+    return BALLOT_RECORD.pack(ballot_id, 1, ballot_id % CANDIDATES, 1700000000 + ballot_id) + f"0x{ballot_id:040x}".encode()
+
+
+def main():
+    logging.disable(logging.INFO)
+    ballots = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    proofs = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    log = MerkleLog(ballot_record)
+    start = time.perf_counter()
+    for ballot_id in range(ballots):
+        log.add(ballot_id, ballot_record(ballot_id))
+    append_time = time.perf_counter() - start
+    cached = sum(len(level) for level in log.levels)
+
+    start = time.perf_counter()
+    root = log.root()
+    root_time = time.perf_counter() - start
+
+    indexes = [random.randrange(ballots) for _ in range(proofs)]
+    start = time.perf_counter()
+    paths = [log.proof(index, ballots) for index in indexes]
+    proof_time = time.perf_counter() - start
+
+    leaves = [leaf_hash(ballot_record(index)) for index in indexes]
+    start = time.perf_counter()
+    for index, leaf, path in zip(indexes, leaves, paths):
+        assert verify_inclusion(leaf, index, ballots, path, root)
+    verify_time = time.perf_counter() - start
+
+    print(f"ballots          {ballots:>14,}")
+    print(f"appends/sec      {ballots / append_time:>14,.0f}")
+    print(f"root             {root_time * 1000:>13.2f}ms")
+    print(f"proofs/sec       {proofs / proof_time:>14,.0f}")
+    print(f"verifies/sec     {proofs / verify_time:>14,.0f}")
+    print(f"proof length     {max(len(path) for path in paths):>14} hashes")
+    print(f"cached levels    {cached / 2 ** 20:>12.1f}MB ({cached / ballots:.1f} bytes/ballot)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Multi-threaded stress test for SmartContractInterface.
+
+Usage: python benchmarks/bench_concurrency.py [voters]
+
+For 1, 2, 4, 8 and 16 worker threads, registers the given number of
+voters (default 100,000) and then has every thread try to cast a vote
+for *every* voter, so each ballot is contested by all workers. Checks
+that each voter was counted exactly once and that the tally equals the
+number of voters, and reports accepted-vote throughput.
+
+Under CPython's GIL the work is interleaved rather than parallel, so
+throughput stays roughly flat; on a free-threaded build it scales with
+the number of stripes actually contended.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smart_contract import SmartContractInterface
+
+logging.disable(logging.INFO)
+
+CANDIDATES = [
+    "National Citizen Party",
+    "Bangladesh Nationalist Party",
+    "Bangladesh Jamate Islam",
+    "Jatiya Party",
+    "Independent Candidates"
+]
+
+
+def run(workers, voters):
+    contract = SmartContractInterface(None)
+    addresses = [f"0x{i:040x}" for i in range(voters)]
+
+    def register(offset):
+        for i in range(offset, voters, workers):
+            contract.register_voter(addresses[i], f"NID{i:013d}")
+            # Contend on the NID index with a duplicate from another address
+            contract.register_voter(addresses[i] + "dup", f"NID{i:013d}")
+
+    def vote(worker):
+        offset = worker * voters // workers
+        accepted = 0
+        for step in range(voters):
+            i = (step + offset) % voters
+            if contract.cast_vote(addresses[i], 1, CANDIDATES[i % len(CANDIDATES)])["success"]:
+                accepted += 1
+        counts[worker] = accepted
+
+    counts = [0] * workers
+    threads = [threading.Thread(target=register, args=(w,)) for w in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=vote, args=(w,)) for w in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = contract.get_election_results(1)
+    assert len(contract.voters) == voters, "duplicate NID registered"
+    assert sum(counts) == voters, f"{sum(counts)} votes accepted for {voters} voters"
+    assert results["total_votes"] == voters
+    assert sum(results["results"].values()) == voters
+    assert len(contract.votes) == voters
+    return voters / elapsed, workers * voters / elapsed
+
+
+def main():
+    voters = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{'threads':>8} {'votes/sec':>12} {'attempts/sec':>14}  totals")
+    for workers in (1, 2, 4, 8, 16):
+        accepted, attempts = run(workers, voters)
+        print(f"{workers:>8} {accepted:>12,.0f} {attempts:>14,.0f}  ok")
+
+
+if __name__ == '__main__':
+    main()
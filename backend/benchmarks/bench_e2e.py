@@ -0,0 +1,373 @@
+"""End-to-end benchmark suite: realistic load through the HTTP API.
+
+Usage: python benchmarks/bench_e2e.py [voters] [concurrency] [output]
+       python benchmarks/bench_e2e.py compare BASE.json NEW.json
+
+Runs three scenarios against app.py with a contract configured, so
+BlockchainHandler prepares and submits every vote to
+benchmarks/fake_node.py (the eth-tester/Ganache stand-in):
+
+- registration rush: `voters` (default 5,000) /api/register-voter calls
+  from `concurrency` (default 32) clients
+- voting peak: nine in ten registered voters cast /api/cast-vote at once.
+  The run then waits for the submission pipeline to confirm them on chain.
+- polling storm: `concurrency` clients poll /api/election-results/1 with
+  If-None-Match for 5 seconds while the remaining voters trickle in votes
+
+Each scenario runs twice, each time against a fresh app process. First
+through Flask's test client, then through Werkzeug's threaded server
+over real HTTP keep-alive connections. Reports requests/sec, p50/p95/p99/max latency,
+errors and resident memory per registered voter. The results are written
+as JSON (default benchmarks/e2e-<commit>.json) tagged with the git
+commit. `compare` prints the change between two such files.
+
+Rate limits are disabled: every client shares one loopback address.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import logging
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timezone
+
+from web3 import Web3
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from tx_pipeline import percentile
+
+CANDIDATES = ["National Citizen Party", "Bangladesh Nationalist Party", "Jatiya Party"]
+STORM_SECONDS = 5.0
+CONFIRM_TIMEOUT = 60.0
+ENVIRONMENT = {
+    "CONTRACT_ADDRESS": "0x2222222222222222222222222222222222222222",
+    "JOURNAL_DIR": "",
+    "RATE_LIMIT_CLIENT_RATE": "0",
+    "RATE_LIMIT_VOTER_RATE": "0",
+    "MAX_CONCURRENT_WRITES": "0"
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def rss_bytes(pid="self"):
+    """Resident set size of a process, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+class TestClientSession:
+    """One client of the in-process Flask app"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers.get("ETag"), response.get_json(silent=True)
+
+
+class HTTPSession:
+    """One keep-alive connection to the server process"""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        self.connection.request(method, path, payload, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, response.getheader("ETag"), json.loads(data) if data else None
+
+
+def drive(new_session, requests, concurrency):
+    """Send `requests` (method, path, body) from `concurrency` sessions; return (latencies, errors, seconds)"""
+    pending = iter(requests)
+    latencies = []
+    errors = [0]
+
+    def client():
+        session = new_session()
+        for method, path, body in pending:
+            started = time.perf_counter()
+            status, _, _ = session.request(method, path, body)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def summarize(latencies, errors, seconds):
+    latency_ms = {
+        name: round(percentile(latencies, fraction) * 1000, 2)
+        for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+    }
+    latency_ms["max"] = round(max(latencies) * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(latencies) / seconds, 1),
+        "latency_ms": latency_ms
+    }
+
+
+def wait_until_connected(session):
+    while session.request("GET", "/api/health")[2]["blockchain_status"] != "connected":
+        time.sleep(0.1)
+
+
+def wait_for_confirmations(session, expected):
+    """Wait for `expected` confirmed transactions; return the pipeline's stats and the seconds waited"""
+    start = time.perf_counter()
+    while True:
+        submission = session.request("GET", "/api/blockchain-info")[2]["info"]["submission"]
+        waited = time.perf_counter() - start
+        if submission["confirmed"] >= expected or waited > CONFIRM_TIMEOUT:
+            return submission, round(waited, 3)
+        time.sleep(0.1)
+
+
+def polling_storm(new_session, trickle, concurrency):
+    """Poll results with ETags while `trickle` votes arrive; return the summary"""
+    deadline = time.monotonic() + STORM_SECONDS
+    latencies = []
+    counts = {"errors": 0, "not_modified": 0}
+
+    def poller():
+        session = new_session()
+        etag = None
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status, new_etag, _ = session.request(
+                "GET", "/api/election-results/1", headers={"If-None-Match": etag} if etag else None
+            )
+            latencies.append(time.perf_counter() - started)
+            if status == 304:
+                counts["not_modified"] += 1
+            elif status >= 400:
+                counts["errors"] += 1
+            etag = new_etag or etag
+
+    def voter():
+        session = new_session()
+        interval = STORM_SECONDS / max(len(trickle), 1)
+        for method, path, body in trickle:
+            if time.monotonic() >= deadline:
+                break
+            session.request(method, path, body)
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=poller) for _ in range(concurrency)] + [threading.Thread(target=voter)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    summary = summarize(latencies, counts["errors"], time.perf_counter() - start)
+    summary["not_modified_ratio"] = round(counts["not_modified"] / max(len(latencies), 1), 3)
+    return summary
+
+
+def run_scenarios(new_session, voters, concurrency, rss):
+    addresses = [Web3.to_checksum_address(f"0x{i + 1:040x}") for i in range(voters)]
+    registrations = [
+        ("POST", "/api/register-voter", {"voter_address": address, "nid": f"NID{i:013d}"})
+        for i, address in enumerate(addresses)
+    ]
+    votes = [
+        ("POST", "/api/cast-vote", {"voter_address": address, "candidate_name": CANDIDATES[i % len(CANDIDATES)]})
+        for i, address in enumerate(addresses)
+    ]
+    peak, trickle = votes[:voters * 9 // 10], votes[voters * 9 // 10:]
+    control = new_session()
+
+    results = {}
+    before = rss()
+    results["registration_rush"] = summarize(*drive(new_session, registrations, concurrency))
+    after = rss()
+    results["memory"] = {
+        "rss_bytes": after,
+        "rss_per_voter_bytes": round((after - before) / voters, 1) if before and after else None
+    }
+
+    results["voting_peak"] = summarize(*drive(new_session, peak, concurrency))
+    submission, waited = wait_for_confirmations(control, len(peak))
+    results["voting_peak"]["on_chain"] = {
+        "confirmed": submission["confirmed"],
+        "failed": submission["failed"],
+        "seconds_to_confirm_after_peak": waited,
+        "submit_to_confirm_ms": {
+            name: round((submission[f"latency_{name}"] or 0) * 1000, 1) for name in ("p50", "p95", "p99")
+        }
+    }
+
+    results["polling_storm"] = polling_storm(new_session, trickle, concurrency)
+    return results
+
+
+def test_client_worker(voters, concurrency):
+    """Run in the child interpreter: print the scenario results as JSON"""
+    logging.disable(logging.INFO)
+    from app import app
+
+    wait_until_connected(TestClientSession(app))
+    print(json.dumps(run_scenarios(lambda: TestClientSession(app), voters, concurrency, rss_bytes)))
+
+
+def run_test_client(node_url, directory, voters, concurrency):
+    # Config is read at import, so the app gets a fresh interpreter with the environment set
+    env = dict(os.environ, **ENVIRONMENT, BLOCKCHAIN_URL=node_url, INDEXER_CHECKPOINT=os.path.join(directory, "client.json"))
+    output = subprocess.run(
+        [sys.executable, "-c", f"from benchmarks.bench_e2e import test_client_worker; test_client_worker({voters}, {concurrency})"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_server(node_url, directory, voters, concurrency):
+    port = free_port()
+    env = dict(os.environ, **ENVIRONMENT, BLOCKCHAIN_URL=node_url, INDEXER_CHECKPOINT=os.path.join(directory, "server.json"))
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        wait_until_connected(HTTPSession(port))
+        return run_scenarios(lambda: HTTPSession(port), voters, concurrency, lambda: rss_bytes(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(base_path, new_path):
+    with open(base_path) as base_file, open(new_path) as new_file:
+        base, new = json.load(base_file), json.load(new_file)
+    print(f"{base['commit']} -> {new['commit']}")
+    print(f"{'driver':>12} {'scenario':>18} {'req/sec':>18} {'p99 ms':>20}")
+    for driver, scenarios in new["results"].items():
+        for scenario, result in scenarios.items():
+            old = base["results"].get(driver, {}).get(scenario)
+            if old is None or "throughput_rps" not in result:
+                continue
+            rate_change = (result["throughput_rps"] / old["throughput_rps"] - 1) * 100
+            p99_change = (result["latency_ms"]["p99"] / old["latency_ms"]["p99"] - 1) * 100
+            print(
+                f"{driver:>12} {scenario:>18} {result['throughput_rps']:>9,.0f} {rate_change:>+7.1f}% "
+                f"{result['latency_ms']['p99']:>11.1f} {p99_change:>+7.1f}%"
+            )
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        compare(sys.argv[2], sys.argv[3])
+        return
+
+    logging.disable(logging.INFO)
+    voters = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    commit, dirty = git_commit()
+    output = sys.argv[3] if len(sys.argv) > 3 else os.path.join(
+        BACKEND_DIR, "benchmarks", f"e2e-{commit or 'unknown'}{'-dirty' if dirty else ''}.json"
+    )
+
+    node_port = free_port()
+    node = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_node.py"), str(node_port), "0.2"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    node_url = f"http://127.0.0.1:{node_port}"
+    directory = tempfile.mkdtemp(prefix="ballot-e2e-")
+    report = {
+        "benchmark": "e2e",
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": {"voters": voters, "concurrency": concurrency, "storm_seconds": STORM_SECONDS},
+        "results": {}
+    }
+    try:
+        wait_for_port(node_port)
+        report["results"]["test_client"] = run_test_client(node_url, directory, voters, concurrency)
+        report["results"]["server"] = run_server(node_url, directory, voters, concurrency)
+    finally:
+        node.terminate()
+        node.wait()
+        shutil.rmtree(directory)
+
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+
+    print(f"{voters:,} voters, {concurrency} clients -> {output}")
+    print(f"{'driver':>12} {'scenario':>18} {'req/sec':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for driver, scenarios in report["results"].items():
+        for scenario, result in scenarios.items():
+            if "throughput_rps" in result:
+                print(
+                    f"{driver:>12} {scenario:>18} {result['throughput_rps']:>9,.0f} "
+                    f"{result['latency_ms']['p50']:>8.1f} {result['latency_ms']['p99']:>8.1f} {result['errors']:>7}"
+                )
+        memory = scenarios["memory"]["rss_per_voter_bytes"]
+        print(f"{driver:>12} {'memory':>18} {memory if memory is not None else 'n/a':>9} bytes/voter (RSS)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Many concurrent elections benchmark.
+
+Usage: python benchmarks/bench_elections.py [elections] [candidates] [voters] [threads]
+
+Creates `elections` (default 1,000) open elections of `candidates`
+(default 200) each plus one national election, registers `voters`
+(default 200,000) spread over the local elections and makes every voter
+eligible for the national one. `threads` (default 8) threads then cast
+each voter's local and national vote while a reader polls random
+elections' results. Then every election is closed and the frozen results
+are read back. Reports setup, votes/sec, results reads/sec before and
+after closing, close time and the per-election counters and bitsets
+held in memory while open and once closed.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smart_contract import SmartContractInterface
+
+
+def election_bytes(election):
+    """Approximate bytes of per-election counters and per-voter bitsets"""
+    shards = sum(len(shard) * shard.itemsize for shard in election.tally.shards if shard is not None)
+    return shards + len(election.eligible.bits) + len(election.voted.bits)
+
+
+def main():
+    logging.disable(logging.INFO)
+    elections = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    candidates = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    voters = int(sys.argv[3]) if len(sys.argv) > 3 else 200_000
+    threads = int(sys.argv[4]) if len(sys.argv) > 4 else 8
+
+    contract = SmartContractInterface(None)
+    start = time.perf_counter()
+    local_ids = []
+    for index in range(elections):
+        result = contract.create_election(f"Election {index}", [f"Candidate {i}" for i in range(candidates)])
+        contract.open_election(result["election_id"])
+        local_ids.append(result["election_id"])
+    national = contract.create_election("National", [f"Party {i}" for i in range(candidates)])["election_id"]
+    contract.open_election(national)
+    created = time.perf_counter() - start
+
+    rng = random.Random(1)
+    roll = [(f"0x{i:040x}", local_ids[i % elections]) for i in range(voters)]
+    start = time.perf_counter()
+    contract.register_voters([
+        {"voter_address": address, "nid": str(i), "election_id": election_id}
+        for i, (address, election_id) in enumerate(roll)
+    ])
+    for address, _ in roll:
+        contract.grant_eligibility(address, national)
+    registered = time.perf_counter() - start
+
+    ballots = [
+        (address, election_id, f"Candidate {rng.randrange(candidates)}")
+        for address, election_id in roll
+    ] + [(address, national, f"Party {rng.randrange(candidates)}") for address, _ in roll]
+    rng.shuffle(ballots)
+
+    done = threading.Event()
+    reads = 0
+
+    def voter(chunk):
+        for address, election_id, candidate in chunk:
+            assert contract._cast_vote(address, election_id, candidate)["success"]
+
+    def reader():
+        nonlocal reads
+        reader_rng = random.Random(2)
+        while not done.is_set():
+            contract.get_election_results_json(reader_rng.choice(local_ids))
+            reads += 1
+
+    workers = [threading.Thread(target=voter, args=(ballots[i::threads],)) for i in range(threads)]
+    poller = threading.Thread(target=reader)
+    start = time.perf_counter()
+    poller.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    voting = time.perf_counter() - start
+    done.set()
+    poller.join()
+
+    live_state = sum(election_bytes(contract.elections[election_id]) for election_id in local_ids + [national])
+    start = time.perf_counter()
+    for election_id in local_ids + [national]:
+        assert contract.close_election(election_id)["success"]
+    closing = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frozen_reads = 0
+    while time.perf_counter() - start < 1.0:
+        for election_id in local_ids[:100]:
+            contract.get_election_results_json(election_id)
+        frozen_reads += 100
+    frozen = time.perf_counter() - start
+
+    total = sum(contract.get_election_results(election_id)["total_votes"] for election_id in local_ids)
+    assert total == voters and contract.get_election_results(national)["total_votes"] == voters
+    closed_state = sum(election_bytes(contract.elections[election_id]) for election_id in local_ids + [national])
+
+    print(f"{elections:,} elections x {candidates} candidates, {voters:,} voters, {threads} threads")
+    print(f"{'create + open':>22} {created:>9.2f}s")
+    print(f"{'register + eligibility':>22} {registered:>9.2f}s")
+    print(f"{'votes/sec':>22} {len(ballots) / voting:>10,.0f}")
+    print(f"{'live reads/sec':>22} {reads / voting:>10,.0f}")
+    print(f"{'close all':>22} {closing:>9.2f}s")
+    print(f"{'frozen reads/sec':>22} {frozen_reads / frozen:>10,.0f}")
+    print(f"{'state while open':>22} {live_state / 2**20:>8.1f}MB")
+    print(f"{'state once closed':>22} {closed_state / 2**20:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Bulk voter roll import and streaming export benchmark.
+
+Usage: python benchmarks/bench_import.py [rows] [workers] [import_rows]
+
+Writes a CSV roll of `rows` (default 20,000,000) voters to a temp dir.
+It then times these stages:
+
+- parse + hash: bulk.read_roll over the whole file with 1 and then
+  `workers` (default: one per CPU) processes, without applying anything.
+  This stage runs in constant memory, whatever the file size.
+- import: bulk.import_roll of the first `import_rows` (default: all) rows
+  into an in-memory SmartContractInterface. Reports rows/sec and resident
+  memory per voter. At ~400 bytes per voter, 20M voters need ~8 GB, so
+  pass a smaller `import_rows` on small machines.
+- export: streaming the imported voters back out as NDJSON and as CSV
+  through bulk.export_stream. The RSS change shows that the export does
+  not build the payload in memory.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bulk import read_roll, import_roll, export_stream
+from smart_contract import SmartContractInterface
+
+
+def rss_bytes():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+
+
+def write_roll(path, rows):
+    with open(path, "w") as roll:
+        roll.write("voter_address,nid\n")
+        for start in range(0, rows, 100_000):
+            roll.write("".join(f"0x{i:040x},NID{i:013d}\n" for i in range(start, min(rows, start + 100_000))))
+
+
+def main():
+    logging.disable(logging.INFO)
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    import_rows = int(sys.argv[3]) if len(sys.argv) > 3 else rows
+
+    directory = tempfile.mkdtemp(prefix="ballot-import-")
+    try:
+        path = os.path.join(directory, "roll.csv")
+        start = time.perf_counter()
+        write_roll(path, rows)
+        print(f"{rows:,} rows, {os.path.getsize(path) / 1e6:,.0f} MB written in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'stage':>22} {'rows/sec':>11} {'seconds':>8}")
+        for count in sorted({1, workers}):
+            start = time.perf_counter()
+            parsed = sum(len(records) for records, _ in read_roll(path, count))
+            elapsed = time.perf_counter() - start
+            print(f"{f'parse + hash, {count} proc':>22} {parsed / elapsed:>11,.0f} {elapsed:>8.1f}")
+
+        if import_rows < rows:
+            write_roll(path, import_rows)
+        contract = SmartContractInterface(None)
+        before = rss_bytes()
+        result = import_roll(contract, path, workers)
+        imported = result["imported"]
+        print(f"{'import':>22} {imported / result['seconds']:>11,.0f} {result['seconds']:>8.1f}")
+
+        after = rss_bytes()
+        for fmt in ("ndjson", "csv"):
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in export_stream(contract, "voters", fmt))
+            elapsed = time.perf_counter() - start
+            print(f"{f'export {fmt}':>22} {imported / elapsed:>11,.0f} {elapsed:>8.1f}  ({size / 1e6:,.0f} MB)")
+
+        print(f"imported {imported:,} voters, {(after - before) / imported:,.0f} bytes/voter RSS")
+        print(f"RSS change during export: {(rss_bytes() - after) / 1e6:+,.1f} MB")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Journal throughput and crash-recovery benchmark.
+
+Usage: python benchmarks/bench_journal.py [voters] [snapshot_every]
+
+Registers the given number of voters (default 1,000,000) and has each of
+them vote, journaling every change with group commit, in batches of 1,000
+like the bulk endpoints. Then rebuilds a fresh SmartContractInterface
+from the journal directory and reports how long recovery took. With
+10,000,000 voters there are 20M records, most of them covered by the
+latest snapshot.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from journal import VoteJournal
+from smart_contract import SmartContractInterface
+
+logging.disable(logging.INFO)
+
+BATCH = 1000
+
+
+def main():
+    voters = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    snapshot_every = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    directory = tempfile.mkdtemp(prefix="ballot-journal-")
+    try:
+        journal = VoteJournal(directory, snapshot_every=snapshot_every)
+        contract = SmartContractInterface(None, journal=journal)
+
+        start = time.perf_counter()
+        for first in range(0, voters, BATCH):
+            contract.register_voters([
+                {"voter_address": f"0x{i:040x}", "nid": f"NID{i:013d}"}
+                for i in range(first, min(first + BATCH, voters))
+            ])
+        for first in range(0, voters, BATCH):
+            contract.cast_votes([
+                {"voter_address": f"0x{i:040x}", "candidate_name": "Jatiya Party"}
+                for i in range(first, min(first + BATCH, voters))
+            ])
+        elapsed = time.perf_counter() - start
+        if journal.snapshot_thread is not None:
+            journal.snapshot_thread.join()
+
+        records = voters * 2
+        print(f"journaled records:  {records:,}")
+        print(f"durable writes/sec: {records / elapsed:,.0f}")
+        print(f"journal size:       {sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1e6:,.1f} MB")
+
+        journal.close()
+        start = time.perf_counter()
+        recovered = SmartContractInterface(None, journal=VoteJournal(directory, snapshot_every=snapshot_every))
+        elapsed = time.perf_counter() - start
+        assert len(recovered.voters) == voters and len(recovered.votes) == voters
+        print(f"recovery time:      {elapsed:.2f}s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Memory-per-voter benchmark for SmartContractInterface storage.
+
+Usage: python benchmarks/bench_memory.py [voters]
+
+Registers and votes for the given number of voters (default 200,000)
+twice: once into the original dict-per-voter layout, rebuilt here for
+comparison, and once into the columnar VoterStore/BallotStore used by
+SmartContractInterface. Reports traced bytes per voter for each.
+"""
+import os
+import sys
+import hashlib
+import logging
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smart_contract import SmartContractInterface
+
+logging.disable(logging.INFO)
+
+CANDIDATES = [
+    "National Citizen Party",
+    "Bangladesh Nationalist Party",
+    "Bangladesh Jamate Islam",
+    "Jatiya Party",
+    "Independent Candidates"
+]
+
+
+def legacy_layout(count):
+    """Build the previous dict-per-voter and dict-per-ballot layout"""
+    voters = {}
+    nid_index = {}
+    votes = {}
+    for i in range(count):
+        address = f"0x{i:040x}"
+        nid_hash = hashlib.sha256(f"NID{i:013d}".encode()).hexdigest()
+        voters[address] = {
+            "nid_hash": nid_hash,
+            "election_id": 1,
+            "registered": True,
+            "voted": True,
+            "registration_time": datetime.now(),
+            "vote_time": datetime.now()
+        }
+        nid_index[nid_hash] = address
+        now = datetime.now()
+        votes[f"{address}_1_{now.timestamp()}_{i}"] = {
+            "voter_address": address,
+            "election_id": 1,
+            "candidate": CANDIDATES[i % len(CANDIDATES)],
+            "timestamp": now
+        }
+    return voters, nid_index, votes
+
+
+def compact_layout(count):
+    """Fill a SmartContractInterface through its public API"""
+    contract = SmartContractInterface(None)
+    for i in range(count):
+        address = f"0x{i:040x}"
+        contract.register_voter(address, f"NID{i:013d}")
+        contract.cast_vote(address, 1, CANDIDATES[i % len(CANDIDATES)])
+    return contract
+
+
+def measure(build, count):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    state = build(count)
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del state
+    return used / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    before = measure(legacy_layout, count)
+    after = measure(compact_layout, count)
+    print(f"voters:           {count:,}")
+    print(f"before (dicts):   {before:,.0f} bytes/voter")
+    print(f"after (columnar): {after:,.0f} bytes/voter")
+    print(f"reduction:        {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
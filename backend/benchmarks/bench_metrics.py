@@ -0,0 +1,108 @@
+"""Instrumentation overhead benchmark.
+
+Usage: python benchmarks/bench_metrics.py [requests] [rounds]
+
+Drives app.py through Flask's test client with no node and no journal,
+so each request is pure in-process work and instrumentation is as large
+a share of it as it gets. A round is one fresh interpreter per mode
+making `requests` (default 20,000) requests: registrations, votes and
+results reads in equal parts. Rate limits are off. The modes are:
+
+- METRICS_ENABLED=0
+- METRICS_ENABLED=1
+- METRICS_ENABLED=1 with the sampling profiler running
+
+Modes alternate for `rounds` (default 5) rounds. Reports the median
+requests/sec of each mode and its overhead relative to metrics disabled.
+End-to-end differences this small are within run-to-run noise, so the
+per-request instrumentation work is also timed directly: the request
+timer, latency histogram, outcome counter and cache counter. That time
+is reported as a share of the mean request time with metrics off.
+"""
+import os
+import sys
+import time
+import logging
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+MODES = (
+    ("metrics off", {"METRICS_ENABLED": "0"}, False),
+    ("metrics on", {"METRICS_ENABLED": "1"}, False),
+    ("metrics + profiler", {"METRICS_ENABLED": "1"}, True)
+)
+
+
+def worker(requests, profile):
+    """Run in the child interpreter: print the seconds taken by `requests` requests"""
+    logging.disable(logging.INFO)
+    from app import app, profiler
+
+    client = app.test_client()
+    if profile:
+        profiler.start()
+    voters = requests // 3
+    start = time.perf_counter()
+    for i in range(voters):
+        address = f"0x{i:040x}"
+        client.post('/api/register-voter', json={"voter_address": address, "nid": str(i)})
+        client.post('/api/cast-vote', json={"voter_address": address, "candidate_name": "Jatiya Party"})
+        client.get('/api/election-results/1')
+    print(time.perf_counter() - start)
+
+
+def run(requests, env, profile):
+    env = dict(
+        os.environ,
+        BLOCKCHAIN_URL="http://127.0.0.1:9",
+        JOURNAL_DIR="",
+        RATE_LIMIT_CLIENT_RATE="0",
+        RATE_LIMIT_VOTER_RATE="0",
+        **env
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", f"from benchmarks.bench_metrics import worker; worker({requests}, {profile})"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return (requests // 3) * 3 / float(output.strip().splitlines()[-1])
+
+
+def instrumentation_cost(iterations=200_000):
+    """Seconds of metrics work done per request in the instrumented path"""
+    from metrics import REGISTRY, REQUEST_LATENCY, CACHE_REQUESTS, record_outcome
+
+    assert REGISTRY.enabled
+    result = {"success": True, "message": "Vote cast successfully"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        record_outcome("vote", result)
+        CACHE_REQUESTS.inc("results", "hit")
+        REQUEST_LATENCY.observe(time.perf_counter() - started, "POST", "/api/cast-vote", 200)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    rates = {name: [] for name, _, _ in MODES}
+    for _ in range(rounds):
+        for name, env, profile in MODES:
+            rates[name].append(run(requests, env, profile))
+
+    baseline = statistics.median(rates[MODES[0][0]])
+    logging.disable(logging.INFO)
+    cost = instrumentation_cost()
+    print(f"{requests:,} requests x {rounds} rounds")
+    print(f"{'mode':>20} {'req/sec':>9} {'overhead':>9}")
+    for name, _, _ in MODES:
+        rate = statistics.median(rates[name])
+        print(f"{name:>20} {rate:>9,.0f} {(baseline / rate - 1) * 100:>8.1f}%")
+    print(f"instrumentation per request: {cost * 1e6:.1f} us ({cost * baseline * 100:.2f}% of a request)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""On-chain vote submission pipeline benchmark.
+
+Usage: python benchmarks/bench_pipeline.py [votes] [block_time] [latency]
+
+Starts the fake JSON-RPC node from fake_node.py (a stand-in for Ganache
+or eth-tester) and pushes the given number of prepared vote transactions
+(default 20,000) through SubmissionPipeline, retrying whenever submit()
+pushes back. Reports confirmed votes/sec and submit-to-confirmation
+latency percentiles, next to a baseline that sends one transaction per
+HTTP request.
+"""
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_node import start_fake_node, ACCOUNTS
+from rpc import CircuitBreaker, create_session
+from transactions import NonceManager
+from tx_pipeline import SubmissionPipeline, to_rpc_transaction
+
+logging.disable(logging.INFO)
+
+CONTRACT = "0x" + "c" * 40
+
+
+def prepare(nonces, index):
+    sender = ACCOUNTS[index % len(ACCOUNTS)]
+    return {
+        "from": sender,
+        "to": CONTRACT,
+        "data": "0xd037853a" + f"{index:064x}",
+        "gas": 200000,
+        "gasPrice": 20 * 10 ** 9,
+        "chainId": 1337,
+        "nonce": nonces.reserve(sender)
+    }
+
+
+def baseline(url, votes):
+    """Send transactions one HTTP request at a time"""
+    session = create_session(1)
+    nonces = NonceManager(lambda address: 0)
+    start = time.perf_counter()
+    for index in range(votes):
+        payload = {"jsonrpc": "2.0", "id": index, "method": "eth_sendTransaction",
+                   "params": [to_rpc_transaction(prepare(nonces, index))]}
+        session.post(url, json=payload).raise_for_status()
+    return votes / (time.perf_counter() - start)
+
+
+def main():
+    votes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    block_time = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.002
+
+    _, chain, url = start_fake_node(block_time=block_time, latency=latency)
+    session = create_session(4)
+    breaker = CircuitBreaker()
+    nonces = NonceManager(lambda address: int(session.post(url, json={
+        "jsonrpc": "2.0", "id": 0, "method": "eth_getTransactionCount", "params": [address, "pending"]
+    }).json()["result"], 16))
+    pipeline = SubmissionPipeline(url, session, nonces, breaker, queue_size=5000, batch_size=200,
+                                  max_in_flight=2000, poll_interval=0.05)
+    pipeline.start()
+
+    pushed_back = 0
+    start = time.perf_counter()
+    for index in range(votes):
+        transaction = prepare(nonces, index)
+        while pipeline.submit(transaction) is None:
+            pushed_back += 1
+            time.sleep(0.001)
+    while True:
+        stats = pipeline.stats()
+        if stats["confirmed"] + stats["failed"] + stats["expired"] >= votes:
+            break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    print(f"votes:               {votes:,} (node latency {latency * 1000:.0f}ms, block time {block_time}s)")
+    print(f"confirmed:           {stats['confirmed']:,}  failed: {stats['failed']:,}  push-backs: {pushed_back:,}")
+    print(f"pipeline votes/sec:  {votes / elapsed:,.0f}")
+    print(f"confirmation p50:    {stats['latency_p50'] * 1000:,.0f} ms")
+    print(f"confirmation p95:    {stats['latency_p95'] * 1000:,.0f} ms")
+    print(f"confirmation p99:    {stats['latency_p99'] * 1000:,.0f} ms")
+
+    _, _, baseline_url = start_fake_node(block_time=block_time, latency=latency)
+    print(f"unbatched sends/sec: {baseline(baseline_url, min(votes, 2000)):,.0f}")
+
+
+if __name__ == '__main__':
+    main()
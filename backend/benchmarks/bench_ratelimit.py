@@ -0,0 +1,198 @@
+"""Write admission control load test: well-behaved clients during a flood.
+
+Usage: python benchmarks/bench_ratelimit.py [duration] [flood_rate] [latency]
+
+Runs app.py on Werkzeug's threaded server against benchmarks/fake_node.py
+adding `latency` seconds (default 0.05) to every RPC. Every vote is from
+a fresh voter, so each one costs a pending-nonce RPC. Ten well-behaved
+clients, each on its own loopback address, register and vote at 4
+requests/sec and honour Retry-After. Meanwhile a flooding client on a
+different address offers `flood_rate` (default 300) register and vote
+requests/sec from 100 threads. It ignores 429s and keeps sending at
+that rate, so every scenario gets the same offered load. Each scenario
+runs for `duration` seconds (default 10):
+
+- no flood
+- flood with every limit disabled
+- flood with the default limits
+
+Reports the well-behaved clients' p50/p99/max latency and 429 count, and
+how many flood requests the server accepted and rejected.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import logging
+import tempfile
+import threading
+import subprocess
+import http.client
+
+from web3 import Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tx_pipeline import percentile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CLIENTS = 10
+CLIENT_RATE = 4.0
+FLOOD_ADDRESS = "127.0.0.99"
+FLOODERS = 100
+NO_LIMITS = {"RATE_LIMIT_CLIENT_RATE": "0", "RATE_LIMIT_VOTER_RATE": "0", "MAX_CONCURRENT_WRITES": "0"}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+class Voters:
+    """Hands out fresh checksummed voter addresses across threads"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            self.count += 1
+            number = self.count
+        return Web3.to_checksum_address(f"0x{self.prefix:02x}{number:038x}"), f"NID{self.prefix:03d}{number:010d}"
+
+
+def post(connection, path, body):
+    """POST JSON; return (status, Retry-After seconds or None)"""
+    connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    response.read()
+    retry_after = response.getheader("Retry-After")
+    return response.status, int(retry_after) if retry_after else None
+
+
+def write_pair(connection, voters):
+    address, nid = voters.next()
+    yield "/api/register-voter", {"voter_address": address, "nid": nid}
+    yield "/api/cast-vote", {"voter_address": address, "candidate_name": "Jatiya Party"}
+
+
+def well_behaved(port, source, voters, deadline, latencies, rejections):
+    connection = http.client.HTTPConnection("127.0.0.1", port, source_address=(source, 0), timeout=60)
+    next_at = time.monotonic()
+    while time.monotonic() < deadline:
+        for path, body in write_pair(connection, voters):
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            started = time.monotonic()
+            status, retry_after = post(connection, path, body)
+            latencies.append(time.monotonic() - started)
+            next_at = max(next_at + 1.0 / CLIENT_RATE, time.monotonic())
+            if status == 429:
+                rejections.append(path)
+                next_at += retry_after
+
+
+def flooder(port, voters, deadline, rate, counts):
+    connection = http.client.HTTPConnection("127.0.0.1", port, source_address=(FLOOD_ADDRESS, 0), timeout=60)
+    next_at = time.monotonic()
+    while time.monotonic() < deadline:
+        for path, body in write_pair(connection, voters):
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at += 1.0 / rate
+            status, _ = post(connection, path, body)
+            counts[status == 429] += 1
+
+
+def run(node_url, directory, duration, flood_rate, limits=None):
+    port = free_port()
+    env = dict(
+        os.environ,
+        BLOCKCHAIN_URL=node_url,
+        CONTRACT_ADDRESS="0x2222222222222222222222222222222222222222",
+        JOURNAL_DIR="",
+        INDEXER_CHECKPOINT=os.path.join(directory, f"indexer-{port}.json"),
+        **(limits or {})
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"from app import app; app.run(host='0.0.0.0', port={port}, threaded=True, debug=False)"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    latencies, rejections, counts = [], [], [0, 0]
+    try:
+        wait_for_port(port)
+        # Let the chain status and gas price caches warm up
+        time.sleep(1.5)
+        deadline = time.monotonic() + duration
+        threads = [
+            threading.Thread(target=well_behaved, args=(
+                port, f"127.0.0.{10 + i}", Voters(10 + i), deadline, latencies, rejections
+            ))
+            for i in range(CLIENTS)
+        ]
+        flood_voters = Voters(99)
+        threads += [
+            threading.Thread(target=flooder, args=(port, flood_voters, deadline, flood_rate / FLOODERS, counts))
+            for _ in range(FLOODERS if flood_rate else 0)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+    return latencies, len(rejections), counts
+
+
+def main():
+    logging.disable(logging.INFO)
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    flood_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 300.0
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+    node_port = free_port()
+    node = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_node.py"), str(node_port), "0.2", str(latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    directory = tempfile.mkdtemp(prefix="ballot-ratelimit-")
+    scenarios = [
+        ("no flood", 0, None),
+        ("flood, no limits", flood_rate, NO_LIMITS),
+        ("flood, limits", flood_rate, None)
+    ]
+    print(f"{CLIENTS} clients at {CLIENT_RATE:g} req/s, {flood_rate:g} flood req/s, {latency * 1000:.0f} ms per RPC, {duration:g}s")
+    print(f"{'scenario':>18} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'429s':>5} {'flood ok/s':>11} {'flood 429/s':>12}")
+    try:
+        wait_for_port(node_port)
+        for name, rate, limits in scenarios:
+            latencies, rejected, (accepted, shed) = run(
+                f"http://127.0.0.1:{node_port}", directory, duration, rate, limits
+            )
+            print(
+                f"{name:>18} {percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} "
+                f"{max(latencies) * 1000:>8.1f} {rejected:>5} {accepted / duration:>11,.0f} {shed / duration:>12,.0f}"
+            )
+    finally:
+        node.terminate()
+        node.wait()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Registration throughput benchmark for SmartContractInterface.
+
+Usage: python benchmarks/bench_registration.py [max_voters]
+
+Registers voters in stages up to max_voters (default 1,000,000; pass
+10000000 for the full registration-day run) and prints the throughput
+of each stage. With the NID index the rate should stay flat as the
+voter count grows.
+"""
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smart_contract import SmartContractInterface
+
+logging.disable(logging.INFO)
+
+
+def main():
+    max_voters = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    contract = SmartContractInterface(None)
+
+    registered = 0
+    stage = 10_000
+    print(f"{'voters':>12} {'stage':>10} {'regs/sec':>12}")
+    while registered < max_voters:
+        target = min(stage, max_voters)
+        count = target - registered
+        start = time.perf_counter()
+        for i in range(registered, target):
+            contract.register_voter(f"0x{i:040x}", f"NID{i:013d}")
+        elapsed = time.perf_counter() - start
+        registered = target
+        print(f"{registered:>12,} {count:>10,} {count / elapsed:>12,.0f}")
+        stage *= 10
+
+
+if __name__ == '__main__':
+    main()
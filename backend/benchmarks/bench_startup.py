@@ -0,0 +1,112 @@
+"""Cold start benchmark: process launch to first served request.
+
+Usage: python benchmarks/bench_startup.py [runs] [latency]
+
+Launches app.py on Werkzeug in a fresh interpreter and measures the time
+until /api/health first answers, and until it first reports the node as
+connected. Three node conditions are tried: a healthy fake node, a fake
+node adding `latency` seconds (default 2.0) to every RPC, and no node at
+all (connection refused). Each is the median of `runs` (default 3)
+launches.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import logging
+import statistics
+import tempfile
+import subprocess
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+TIMEOUT = 60.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def health(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1.0) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def launch(node_url, directory):
+    """Return (seconds to first response, seconds to connected or None)"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        BLOCKCHAIN_URL=node_url,
+        CONTRACT_ADDRESS="0x2222222222222222222222222222222222222222",
+        JOURNAL_DIR="",
+        INDEXER_CHECKPOINT=os.path.join(directory, "indexer.json")
+    )
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    first_response = connected = None
+    try:
+        while time.perf_counter() - start < TIMEOUT:
+            status = health(port)
+            if status is not None:
+                now = time.perf_counter() - start
+                first_response = first_response or now
+                if status.get("blockchain_connected"):
+                    connected = now
+                    break
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    return first_response, connected
+
+
+def main():
+    logging.disable(logging.INFO)
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    nodes = []
+    for node_latency in (0.0, latency):
+        port = free_port()
+        nodes.append(subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_node.py"), str(port), "0.2", str(node_latency)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        nodes[-1].url = f"http://127.0.0.1:{port}"
+    scenarios = [
+        ("healthy node", nodes[0].url),
+        (f"slow node ({latency:g}s)", nodes[1].url),
+        ("no node", f"http://127.0.0.1:{free_port()}")
+    ]
+
+    directory = tempfile.mkdtemp(prefix="ballot-startup-")
+    print(f"{'scenario':>20} {'first response':>15} {'connected':>10}")
+    try:
+        time.sleep(1.0)
+        for name, url in scenarios:
+            samples = [launch(url, directory) for _ in range(runs)]
+            first = [sample[0] for sample in samples if sample[0] is not None]
+            connected = [sample[1] for sample in samples if sample[1] is not None]
+            first_text = f"{statistics.median(first):.2f}s" if first else "timeout"
+            connected_text = f"{statistics.median(connected):.2f}s" if connected else "never"
+            print(f"{name:>20} {first_text:>15} {connected_text:>10}")
+    finally:
+        for node in nodes:
+            node.terminate()
+            node.wait()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
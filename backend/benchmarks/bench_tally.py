@@ -0,0 +1,123 @@
+"""Vote tally contention microbenchmark with a skewed distribution.
+
+Usage: python benchmarks/bench_tally.py [votes] [hot_share]
+
+Each of 1, 4 and 16 threads applies votes/threads votes where
+`hot_share` (default 0.8) of them go to one candidate, holding the
+voter's lock stripe as SmartContractInterface._cast_vote does. A reader
+thread polls the merged results meanwhile. Compares the previous
+per-candidate locked counters (plus locked total and version counters)
+with counters.ShardedTally, checks the final counts and reports the
+best of three runs in votes/sec and reads/sec.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from counters import ShardedTally
+from locks import StripedLock
+
+CANDIDATES = 5
+STRIPES = 64
+
+
+class LockedCounter:
+    """The per-candidate counter ShardedTally replaced"""
+
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def increment(self):
+        with self.lock:
+            self.value += 1
+
+
+class LockedTally:
+    def __init__(self):
+        self.votes = [LockedCounter() for _ in range(CANDIDATES)]
+        self.total = LockedCounter()
+        self.version = LockedCounter()
+
+    def add(self, shard, index):
+        self.votes[index].increment()
+        self.total.increment()
+        self.version.increment()
+
+    def counts(self):
+        return self.total.value, [counter.value for counter in self.votes]
+
+
+def ballots(count, hot_share, seed):
+    rng = random.Random(seed)
+    return [
+        (f"0x{rng.getrandbits(160):040x}", 0 if rng.random() < hot_share else rng.randrange(1, CANDIDATES))
+        for _ in range(count)
+    ]
+
+
+def run(tally, threads, work):
+    stripes = StripedLock(STRIPES)
+    done = threading.Event()
+    reads = 0
+
+    def voter(chunk):
+        for address, candidate in chunk:
+            with stripes.hold(address):
+                tally.add(stripes.stripe(address), candidate)
+
+    def reader():
+        nonlocal reads
+        while not done.is_set():
+            tally.counts()
+            reads += 1
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=voter, args=(work[i::threads],)) for i in range(threads)]
+    poller = threading.Thread(target=reader)
+    start = time.perf_counter()
+    poller.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    poller.join()
+    return elapsed, reads
+
+
+def main():
+    logging.disable(logging.INFO)
+    votes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    hot_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.8
+    work = ballots(votes, hot_share, seed=1)
+    expected = [0] * CANDIDATES
+    for _, candidate in work:
+        expected[candidate] += 1
+
+    print(f"{votes:,} votes, {hot_share:.0%} to one candidate")
+    print(f"{'threads':>8} {'tally':>8} {'votes/sec':>12} {'reads/sec':>10}  totals")
+    for threads in (1, 4, 16):
+        for name, factory in (("locked", LockedTally), ("sharded", lambda: ShardedTally(CANDIDATES, STRIPES))):
+            best = None
+            for _ in range(3):
+                tally = factory()
+                elapsed, reads = run(tally, threads, work)
+                total, counts = tally.counts()
+                assert total == votes and list(counts) == expected
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, reads)
+            elapsed, reads = best
+            print(f"{threads:>8} {name:>8} {votes / elapsed:>12,.0f} {reads / elapsed:>10,.0f}  ok")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Historical results and turnout timeline benchmark.
+
+Usage: python benchmarks/bench_timeline.py [voters] [minutes] [threads] [readers]
+
+Registers `voters` (default 400,000) voters for the demo election. The
+first half have already voted, with timestamps spread over the past
+`minutes` (default 720, i.e. 12 hours). `threads` (default 8) threads
+then cast the remaining votes while `readers` (default 2) threads each
+try to make 100 queries/sec for the results as of a random past minute
+and the hourly turnout timeline:
+
+- no readers
+- readers using get_election_results_at / get_turnout_timeline, which
+  read the per-minute timeline snapshots
+- readers doing what was possible before: a full scan of the ballot
+  log per query
+
+Reports votes/sec and the queries/sec achieved for each scenario, and
+the time to rebuild a timeline snapshot once the ended minutes are folded.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smart_contract import SmartContractInterface
+
+READER_RATE = 100.0
+
+
+def scan_results_at(contract, election_id, at):
+    """Results as of `at` from a scan of every ballot"""
+    votes = contract.votes
+    counts = [0] * len(contract.elections[election_id].candidates)
+    for ballot_id in range(len(votes)):
+        if votes.election_ids[ballot_id] == election_id and votes.timestamps[ballot_id] < at:
+            counts[votes.candidates[ballot_id]] += 1
+    return counts
+
+
+def run(voters, minutes, threads, readers, query):
+    contract = SmartContractInterface(None)
+    election = contract.elections[1]
+    candidates = election.candidates
+    contract.register_voters([{"voter_address": f"0x{i:040x}", "nid": str(i)} for i in range(voters)])
+
+    # Backfill the first half as votes cast over the past `minutes`
+    now = int(time.time())
+    rng = random.Random(1)
+    for i in range(voters // 2):
+        address = f"0x{i:040x}"
+        contract._apply_vote(
+            contract.voters.slot_of(address), election, rng.randrange(len(candidates)),
+            now - rng.randrange(minutes * 60), contract.stripes.stripe(address)
+        )
+
+    ballots = [(f"0x{i:040x}", candidates[rng.randrange(len(candidates))]) for i in range(voters // 2, voters)]
+    done = threading.Event()
+    queries = [0]
+
+    def voter(chunk):
+        for address, candidate in chunk:
+            assert contract._cast_vote(address, 1, candidate)["success"]
+
+    def reader(seed):
+        reader_rng = random.Random(seed)
+        next_at = time.monotonic()
+        while not done.is_set():
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at = max(next_at + 1.0 / READER_RATE, time.monotonic())
+            query(contract, now - reader_rng.randrange(minutes * 60))
+            queries[0] += 1
+
+    workers = [threading.Thread(target=voter, args=(ballots[i::threads],)) for i in range(threads)]
+    pollers = [threading.Thread(target=reader, args=(seed,)) for seed in range(readers)]
+    start = time.perf_counter()
+    for thread in pollers + workers:
+        thread.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for poller in pollers:
+        poller.join()
+    return len(ballots) / elapsed, queries[0] / elapsed, contract
+
+
+def snapshot_query(contract, at):
+    contract.get_election_results_at(1, at)
+    contract.get_turnout_timeline(1, step=3600)
+
+
+def scan_query(contract, at):
+    scan_results_at(contract, 1, at)
+
+
+def main():
+    logging.disable(logging.INFO)
+    voters = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    minutes = int(sys.argv[2]) if len(sys.argv) > 2 else 720
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    readers = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+
+    print(f"{voters:,} voters, {minutes} minutes of history, {threads} voting threads, {readers} readers")
+    print(f"{'readers':>18} {'votes/sec':>10} {'queries/sec':>12}")
+    contract = None
+    for name, count, query in (
+        ("none", 0, None),
+        ("timeline snapshot", readers, snapshot_query),
+        ("ballot log scan", readers, scan_query)
+    ):
+        votes, queries, contract = run(voters, minutes, threads, count, query)
+        print(f"{name:>18} {votes:>10,.0f} {queries:>12,.1f}")
+
+    timeline = contract.elections[1].timeline
+    timeline.refresh_interval = 0
+    timeline.dirty = True
+    start = time.perf_counter()
+    snapshot = timeline.snapshot()
+    first, last = snapshot.span()
+    print(f"snapshot rebuild: {(time.perf_counter() - start) * 1000:.1f} ms over {(last - first) // 60 + 1} minutes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Shared state backend scaling benchmark.
+
+Usage: python benchmarks/bench_workers.py [voters]
+
+Starts a state server (state_backend.serve_state) on a Unix socket,
+registers the given number of voters (default 40,000) and then runs 1, 4
+and 16 worker processes that each connect through
+state_backend.connect_state_server and try to vote for every voter. Each
+ballot is therefore contested by all workers; the run checks that every
+voter was counted exactly once and reports accepted votes/sec and
+attempted calls/sec across all workers.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from state_backend import serve_state, connect_state_server
+
+AUTHKEY = "bench"
+BATCH = 500
+
+
+def server(address):
+    logging.disable(logging.INFO)
+    serve_state(address, authkey=AUTHKEY)
+
+
+def worker(address, voters, offset, results):
+    contract = connect_state_server(address, authkey=AUTHKEY)
+    accepted = 0
+    for step in range(voters):
+        i = (step + offset) % voters
+        if contract.cast_vote(f"0x{i:040x}", 1, "Jatiya Party")["success"]:
+            accepted += 1
+    results.put(accepted)
+
+
+def run(workers, voters, directory):
+    address = os.path.join(directory, f"state-{workers}.sock")
+    server_process = multiprocessing.Process(target=server, args=(address,), daemon=True)
+    server_process.start()
+    while not os.path.exists(address):
+        time.sleep(0.05)
+
+    contract = connect_state_server(address, authkey=AUTHKEY)
+    for first in range(0, voters, BATCH):
+        contract.register_voters([
+            {"voter_address": f"0x{i:040x}", "nid": f"NID{i:013d}"}
+            for i in range(first, min(first + BATCH, voters))
+        ])
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(address, voters, w * voters // workers, results))
+        for w in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    accepted = sum(results.get() for _ in processes)
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    tally = contract.get_election_results(1)
+    assert accepted == voters, f"{accepted} votes accepted for {voters} voters"
+    assert tally["total_votes"] == voters
+    server_process.terminate()
+    return voters / elapsed, workers * voters / elapsed
+
+
+def main():
+    logging.disable(logging.INFO)
+    voters = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    directory = tempfile.mkdtemp(prefix="ballot-state-")
+    print(f"{'workers':>8} {'votes/sec':>12} {'calls/sec':>12}  totals")
+    try:
+        for workers in (1, 4, 16):
+            accepted, calls = run(workers, voters, directory)
+            print(f"{workers:>8} {accepted:>12,.0f} {calls:>12,.0f}  ok")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
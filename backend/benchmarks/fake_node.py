@@ -0,0 +1,149 @@
+"""Minimal in-process Ethereum JSON-RPC node for benchmarks.
+
+Stands in for Ganache/eth-tester when neither is available. It answers
+single and batched JSON-RPC requests for the handful of methods the
+backend uses, tracks per-sender nonces, "mines" sent transactions into a
+block every `block_time` seconds, and can add a fixed `latency` to every
+HTTP request to imitate a slow or remote node.
+
+Usage: python benchmarks/fake_node.py [port] [block_time] [latency]
+"""
+import sys
+import json
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ACCOUNTS = ["0x" + f"{i:040x}" for i in range(1, 11)]
+CHAIN_ID = 1337
+
+
+class FakeChain:
+    def __init__(self, block_time=0.2):
+        self.block_time = block_time
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.nonces = {}
+        # tx hash -> (mined block number, sender)
+        self.transactions = {}
+        # tx hash -> checksummed signer, for raw (locally signed) transactions
+        self.raw_senders = {}
+        self.sent = 0
+
+    def block_number(self):
+        return int((time.monotonic() - self.started) / self.block_time) + 1
+
+    def call(self, method, params):
+        if method == "web3_clientVersion":
+            return "FakeNode/v1"
+        if method == "net_version":
+            return str(CHAIN_ID)
+        if method == "eth_chainId":
+            return hex(CHAIN_ID)
+        if method == "eth_accounts":
+            return ACCOUNTS
+        if method == "eth_blockNumber":
+            return hex(self.block_number())
+        if method == "eth_gasPrice":
+            return hex(20 * 10 ** 9)
+        if method == "eth_getTransactionCount":
+            with self.lock:
+                return hex(self.nonces.get(params[0].lower(), 0))
+        if method == "eth_sendTransaction":
+            return self.send_transaction(params[0]["from"], int(params[0]["nonce"], 16))
+        if method == "eth_sendRawTransaction":
+            return self.send_raw_transaction(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipt(params[0])
+        if method == "eth_getBlockByNumber":
+            number = self.block_number() if params[0] == "latest" else int(params[0], 16)
+            return {"number": hex(number), "hash": "0x" + hashlib.sha256(str(number).encode()).hexdigest()}
+        raise ValueError(f"Method {method} not supported")
+
+    def send_raw_transaction(self, raw):
+        """Accept a signed legacy transaction from whichever key signed it"""
+        import rlp
+        from eth_account import Account
+
+        sender = Account.recover_transaction(raw)
+        nonce = int.from_bytes(rlp.decode(bytes.fromhex(raw[2:]))[0], "big")
+        tx_hash = self.send_transaction(sender, nonce)
+        with self.lock:
+            self.raw_senders[tx_hash] = sender
+        return tx_hash
+
+    def send_transaction(self, sender, nonce):
+        sender = sender.lower()
+        with self.lock:
+            expected = self.nonces.get(sender, 0)
+            if nonce != expected:
+                raise ValueError(f"nonce too {'low' if nonce < expected else 'high'}: expected {expected}, got {nonce}")
+            self.nonces[sender] = expected + 1
+            tx_hash = "0x" + hashlib.sha256(f"{sender}:{nonce}".encode()).hexdigest()
+            # Included in the block after the current one
+            self.transactions[tx_hash] = (self.block_number() + 1, sender)
+            self.sent += 1
+        return tx_hash
+
+    def receipt(self, tx_hash):
+        with self.lock:
+            entry = self.transactions.get(tx_hash)
+        if entry is None or entry[0] > self.block_number():
+            return None
+        return {"transactionHash": tx_hash, "blockNumber": hex(entry[0]), "status": "0x1", "from": entry[1]}
+
+
+def make_handler(chain, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Buffer headers and body into one write; separate small writes hit
+        # delayed-ACK stalls on keep-alive connections
+        wbufsize = 1 << 16
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if latency:
+                time.sleep(latency)
+            if isinstance(request, list):
+                response = [self.dispatch(item) for item in request]
+            else:
+                response = self.dispatch(request)
+            body = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def dispatch(self, item):
+            try:
+                return {"jsonrpc": "2.0", "id": item.get("id"), "result": chain.call(item["method"], item.get("params", []))}
+            except Exception as e:
+                return {"jsonrpc": "2.0", "id": item.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_fake_node(port=0, block_time=0.2, latency=0.0):
+    """Start a fake node on a background thread; return (server, chain, url)"""
+    chain = FakeChain(block_time)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(chain, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, chain, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 7545
+    block_time = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    server, _, url = start_fake_node(port, block_time, latency)
+    print(f"Fake node listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,47 +1,160 @@
-from web3 import Web3
-from web3.middleware.geth_poa import geth_poa_middleware
-
 import json
+import threading
+import time
 import logging
 from config import Config
+from rpc import CircuitBreaker, ChainStatusCache, TRANSPORT_ERRORS, create_session
+from transactions import NonceManager, GasPriceOracle
+from tx_pipeline import SubmissionPipeline, NODE_CANNOT_SIGN
+from metrics import instrument_provider
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class BlockchainHandler:
+    """Blockchain access for the web app.
+
+    Construction never touches the node: web3 is imported and the
+    connection made on a background thread that retries with exponential
+    backoff, so the app starts serving immediately even when the node is
+    slow or down. Until then the handler reports "connecting" and
+    `contract` is None; the status poller, gas price oracle and event
+    indexer start once the first connection succeeds.
+
+    The contract counts a vote for msg.sender, so vote transactions are
+    sent unsigned with eth_sendTransaction from the voter's own address
+    and the node has to hold (and have unlocked) every voter's key, as a
+    development node such as Ganache does for its accounts. A node that
+    manages no accounts cannot sign any vote; that is logged when the
+    connection is made and votes are then refused before anything is
+    queued, rather than every transaction failing at the node.
+    """
+
     def __init__(self):
         self.w3 = None
         self.contract = None
+        self.indexer = None
         self.account = None
-        self.connect()
+        # Whether the node manages accounts it can sign voters' transactions with
+        self.node_signs = False
+        self.chain_id = None
+        self.connecting = True
+        # Why the last connection attempt failed, while still connecting
+        self.connect_error = None
+        self.status = None
+        self.gas_price = None
+        self.session = create_session(Config.RPC_POOL_SIZE)
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=Config.CIRCUIT_RESET_TIMEOUT
+        )
+        # Transaction preparation reads nonces locally
+        self.nonces = NonceManager(lambda address: self.w3.eth.get_transaction_count(address, 'pending'))
+        # Prepared vote transactions are sent and confirmed in the background
+        self.pipeline = SubmissionPipeline(
+            Config.BLOCKCHAIN_URL,
+            self.session,
+            self.nonces,
+            self.breaker,
+            queue_size=Config.TX_QUEUE_SIZE,
+            batch_size=Config.TX_BATCH_SIZE,
+            max_in_flight=Config.TX_MAX_IN_FLIGHT,
+            poll_interval=Config.TX_RECEIPT_POLL_INTERVAL,
+            timeout=Config.RPC_TIMEOUT,
+            receipt_timeout=Config.TX_RECEIPT_TIMEOUT,
+            send_attempts=Config.TX_SEND_ATTEMPTS,
+            retry_delay=Config.TX_RETRY_DELAY
+        )
+        self.pipeline.start()
+        self.connector = threading.Thread(target=self._connect_loop, name="blockchain-connect", daemon=True)
+        self.connector.start()
+    
+    def _connect_loop(self):
+        """Connect in the background, backing off between failed attempts"""
+        delay = Config.CONNECT_RETRY_INITIAL
+        while not self.connect():
+            logger.info(f"Retrying blockchain connection in {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, Config.CONNECT_RETRY_MAX)
+        self.connecting = False
     
     def connect(self):
         """Connect to blockchain network"""
         try:
-            self.w3 = Web3(Web3.HTTPProvider(Config.BLOCKCHAIN_URL))
+            # Deferred: importing web3 dominates process start-up time
+            from web3 import Web3
+            from web3.middleware.geth_poa import geth_poa_middleware
+            
+            self.w3 = Web3(instrument_provider(Web3.HTTPProvider(
+                Config.BLOCKCHAIN_URL,
+                request_kwargs={'timeout': Config.RPC_TIMEOUT},
+                session=self.session
+            )))
+            # Failures are handled by the circuit breaker and status poller;
+            # the provider's retry-with-backoff would only hold callers longer
+            self.w3.provider.middlewares = ()
             
             # Add middleware for POA networks (like Ganache)
             self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
             
             if self.w3.is_connected():
                 logger.info("Connected to blockchain network")
+                self.chain_id = self.w3.eth.chain_id
                 
                 # Set up account
+                accounts = self.w3.eth.accounts
+                self.node_signs = bool(accounts)
                 if Config.PRIVATE_KEY:
                     self.account = self.w3.eth.account.from_key(Config.PRIVATE_KEY)
-                else:
+                elif accounts:
                     # Use first account from Ganache for demo
-                    accounts = self.w3.eth.accounts
-                    if accounts:
-                        self.account = accounts[0]
+                    self.account = accounts[0]
                 
                 # Set up contract
+                contract = indexer = None
                 if Config.CONTRACT_ADDRESS:
-                    self.contract = self.w3.eth.contract(
+                    from indexer import EventIndexer
+                    
+                    if not self.node_signs:
+                        logger.error(
+                            "The node manages no accounts, so it cannot sign vote transactions "
+                            "(sent from each voter's address); on-chain vote submission is disabled"
+                        )
+                    
+                    contract = self.w3.eth.contract(
                         address=Config.CONTRACT_ADDRESS,
                         abi=Config.CONTRACT_ABI
                     )
+                    # Reads are served from a local view built from the contract's events
+                    indexer = EventIndexer(
+                        self.w3,
+                        contract,
+                        Config.INDEXER_CHECKPOINT,
+                        self._call,
+                        start_block=Config.INDEXER_START_BLOCK,
+                        chunk_size=Config.INDEXER_CHUNK_SIZE,
+                        reorg_depth=Config.INDEXER_REORG_DEPTH,
+                        poll_interval=Config.INDEXER_POLL_INTERVAL,
+                        checkpoint_interval=Config.INDEXER_CHECKPOINT_INTERVAL
+                    )
+                
+                # Background threads start only once every step that can fail
+                # has succeeded, so a retried connect never leaves pollers behind
+                # Health checks read this cache instead of calling the node
+                self.status = ChainStatusCache(self._fetch_block_number, self.breaker, interval=Config.CHAIN_STATUS_INTERVAL)
+                self.gas_price = GasPriceOracle(
+                    lambda: self.w3.eth.gas_price,
+                    Web3.to_wei(Config.DEFAULT_GAS_PRICE_GWEI, 'gwei'),
+                    self.breaker,
+                    interval=Config.GAS_PRICE_INTERVAL
+                )
+                if indexer is not None:
+                    indexer.start()
+                    self.indexer = indexer
+                    # Published last: request handlers take a contract to mean "ready"
+                    self.contract = contract
                 
+                self.connect_error = None
                 return True
             else:
                 logger.error("Failed to connect to blockchain")
@@ -49,21 +162,66 @@ class BlockchainHandler:
                 
         except Exception as e:
             logger.error(f"Blockchain connection error: {str(e)}")
+            self.connect_error = str(e)
             return False
     
+    def _fetch_block_number(self):
+        """Read the latest block number from the node (used by the status poller)"""
+        return self.w3.eth.block_number
+    
     def is_connected(self):
-        """Check if connected to blockchain"""
-        return self.w3 and self.w3.is_connected()
+        """Check if connected to blockchain, as of the last status poll"""
+        return self.status is not None and self.status.get()["connected"]
+    
+    def get_connection_state(self):
+        """Connection state: connecting (never connected yet), connected or disconnected"""
+        if self.connecting:
+            return "connecting"
+        return "connected" if self.is_connected() else "disconnected"
     
     def get_latest_block(self):
-        """Get latest block number"""
-        if not self.is_connected():
+        """Get latest block number, as of the last status poll"""
+        if self.status is None:
             return 0
+        status = self.status.get()
+        return status["latest_block"] if status["connected"] else 0
+    
+    def _build_transaction(self, function, voter_address):
+        """Build a contract transaction without RPC calls in the common case.
+
+        Nonce, gas price and chain id all come from local caches, so
+        build_transaction has nothing left to ask the node for. The sender
+        is checksummed here, so an invalid address fails before a nonce
+        is reserved.
+        """
+        voter_address = self.w3.to_checksum_address(voter_address)
+        nonce = self.nonces.reserve(voter_address)
         try:
-            return self.w3.eth.block_number
-        except Exception as e:
-            logger.error(f"Error getting latest block: {str(e)}")
-            return 0
+            return function.build_transaction({
+                'from': voter_address,
+                'gas': Config.GAS_LIMIT,
+                'gasPrice': self.gas_price.get(),
+                'chainId': self.chain_id,
+                'nonce': nonce
+            })
+        except Exception:
+            self.nonces.release(voter_address, nonce)
+            raise
+    
+    def _call(self, fn):
+        """Run an RPC-backed call through the circuit breaker; only transport errors count as failures"""
+        if not self.breaker.allow():
+            raise ConnectionError("Blockchain node unavailable")
+        try:
+            result = fn()
+        except TRANSPORT_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_unrelated()
+            raise
+        self.breaker.record_success()
+        return result
     
     def register_voter(self, voter_address, nid, election_id=1):
         """Register a voter"""
@@ -72,12 +230,9 @@ class BlockchainHandler:
         
         try:
             # Build transaction
-            transaction = self.contract.functions.registerVoter(nid, election_id).build_transaction({
-                'from': voter_address,
-                'gas': 200000,
-                'gasPrice': self.w3.to_wei('20', 'gwei'),
-                'nonce': self.w3.eth.get_transaction_count(voter_address)
-            })
+            transaction = self._call(lambda: self._build_transaction(
+                self.contract.functions.registerVoter(nid, election_id), voter_address
+            ))
             
             return {
                 "success": True,
@@ -96,12 +251,9 @@ class BlockchainHandler:
         
         try:
             # Build transaction
-            transaction = self.contract.functions.castVote(election_id, candidate).build_transaction({
-                'from': voter_address,
-                'gas': 200000,
-                'gasPrice': self.w3.to_wei('20', 'gwei'),
-                'nonce': self.w3.eth.get_transaction_count(voter_address)
-            })
+            transaction = self._call(lambda: self._build_transaction(
+                self.contract.functions.castVote(election_id, candidate), voter_address
+            ))
             
             return {
                 "success": True,
@@ -113,53 +265,91 @@ class BlockchainHandler:
             logger.error(f"Vote casting error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def get_election_results(self, election_id=1):
-        """Get election results"""
+    def submit_vote(self, voter_address, election_id, candidate, reserved=False):
+        """Prepare a vote transaction and queue it for batched submission.
+        
+        With `reserved` the caller already claimed queue space through
+        pipeline.reserve(); it is used, or given back if the vote cannot
+        be prepared.
+        """
+        if not reserved and not self.pipeline.reserve():
+            return {"success": False, "error": "Submission queue full"}
+        
+        if not self.node_signs:
+            self.pipeline.unreserve()
+            return {"success": False, "error": NODE_CANNOT_SIGN}
+        
+        result = self.cast_vote(voter_address, election_id, candidate)
+        if not result["success"]:
+            self.pipeline.unreserve()
+            return result
+        
+        ticket = self.pipeline.submit(result["transaction"], reserved=True)
+        return {"success": True, "ticket": ticket, "message": "Vote transaction queued"}
+    
+    def anchor_audit_root(self, root, tree_size):
+        """Queue a transaction recording the ballot audit log root on-chain"""
         if not self.contract:
             return {"success": False, "error": "Contract not initialized"}
+        if not self.account:
+            return {"success": False, "error": "No admin account configured"}
+        
+        # A local account (PRIVATE_KEY) is an object whose key signs here;
+        # a node-managed account is an address the node signs for
+        sender = getattr(self.account, 'address', self.account)
+        try:
+            transaction = self._call(lambda: self._build_transaction(
+                self.contract.functions.anchorAuditRoot(bytes.fromhex(root), tree_size), sender
+            ))
+        except Exception as e:
+            logger.error(f"Audit root anchoring error: {str(e)}")
+            return {"success": False, "error": str(e)}
+        
+        raw = None
+        if hasattr(self.account, 'key'):
+            try:
+                raw = self.w3.to_hex(self.w3.eth.account.sign_transaction(transaction, self.account.key).rawTransaction)
+            except Exception as e:
+                self.nonces.release(sender, transaction["nonce"])
+                logger.error(f"Audit root signing error: {str(e)}")
+                return {"success": False, "error": str(e)}
+        
+        ticket = self.pipeline.submit(transaction, raw=raw)
+        if ticket is None:
+            self.nonces.release(sender, transaction["nonce"])
+            return {"success": False, "error": "Submission queue full"}
+        
+        return {"success": True, "ticket": ticket, "message": "Audit root anchoring transaction queued"}
+    
+    def get_election_results(self, election_id=1):
+        """Get election results from the event-log index"""
+        if not self.indexer:
+            return {"success": False, "error": "Contract not initialized"}
         
         try:
-            # For demo purposes, return mock data if contract call fails
-            candidates = ['National Citizen Party', 'Bangladesh Nationalist Party','Bangladesh Jamate Islam' 'Jatiya Party', 'Independent Candidates']
-            mock_results = {}
-            for candidate in candidates:
-                mock_results[candidate] = 0
-            
             return {
                 "success": True,
-                "results": mock_results
+                "results": self.indexer.get_election_results(election_id),
+                "indexed_block": self.indexer.next_block - 1
             }
             
         except Exception as e:
             logger.error(f"Error getting results: {str(e)}")
-            # Return mock data
-            candidates = ['National Citizen Party', 'Bangladesh Nationalist Party','Bangladesh Jamate Islam' 'Jatiya Party', 'Independent Candidates']
-            mock_results = {}
-            for candidate in candidates:
-                mock_results[candidate] = 0
-            
-            return {
-                "success": True,
-                "results": mock_results
-            }
+            return {"success": False, "error": str(e)}
     
     def get_voter_status(self, voter_address):
-        """Get voter registration and voting status"""
-        if not self.contract:
+        """Get voter registration and voting status from the event-log index"""
+        if not self.indexer:
             return {"success": False, "error": "Contract not initialized"}
         
         try:
-            # For demo, return false by default
+            registered, voted = self.indexer.get_voter_status(voter_address)
             return {
                 "success": True,
-                "registered": False,
-                "voted": False
+                "registered": registered,
+                "voted": voted
             }
             
         except Exception as e:
             logger.error(f"Error getting voter status: {str(e)}")
-            return {
-                "success": True,
-                "registered": False,
-                "voted": False
-            }
\ No newline at end of file
+            return {"success": False, "error": str(e)}
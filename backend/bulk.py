@@ -0,0 +1,244 @@
+import argparse
+import csv
+import functools
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = {
+    "voters": ["voter_address", "nid_hash", "election_id", "registered", "voted", "registration_time", "vote_time"],
+    "votes": ["ballot_id", "voter_address", "election_id", "candidate", "timestamp"],
+    "results": ["election_id", "election_name", "candidate", "votes", "total_votes", "final"]
+}
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+# Serialized rows are handed out in chunks of about this many characters
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def export_rows(contract, kind, election_id=None, page_size=None):
+    """Yield voters, votes or results as dicts, one state page at a time.
+
+    Voters and votes are read through the export_*_page methods, so only
+    one page is in memory at once and each page is one round trip to a
+    shared state server. Both stores are append-only: rows added while
+    an export runs may or may not be included, but none is skipped or
+    repeated.
+    """
+    if kind == "results":
+        yield from _result_rows(contract, election_id)
+        return
+
+    page_size = page_size or Config.EXPORT_PAGE_SIZE
+    read_page = getattr(contract, f"export_{kind}_page")
+    offset = 0
+    while True:
+        rows = read_page(offset, page_size)
+        for row in rows:
+            if election_id is None or row["election_id"] == election_id:
+                yield row
+        if len(rows) < page_size:
+            return
+        offset += len(rows)
+
+
+def _result_rows(contract, election_id):
+    for election in contract.list_elections()["elections"]:
+        if election_id is not None and election["id"] != election_id:
+            continue
+        results = contract.get_election_results(election["id"])
+        if not results["success"]:
+            continue
+        for candidate, votes in results["results"].items():
+            yield {
+                "election_id": election["id"],
+                "election_name": election["name"],
+                "candidate": candidate,
+                "votes": votes,
+                "total_votes": results["total_votes"],
+                "final": results.get("final", False)
+            }
+
+
+def encode_rows(rows, fields, fmt):
+    """Serialize rows as NDJSON or CSV with a header row, yielding text chunks"""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+    for row in rows:
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_stream(contract, kind, fmt, election_id=None):
+    """Chunks of an export of `kind` in format `fmt`, in constant memory"""
+    return encode_rows(export_rows(contract, kind, election_id), EXPORT_FIELDS[kind], fmt)
+
+
+def parse_roll(block, columns, election_id):
+    """Parse and hash one chunk of a voter roll (runs in the import workers).
+
+    `block` holds whole lines: CSV rows with the given header `columns`,
+    or NDJSON objects when `columns` is None. A row needs a string
+    voter_address and either a string nid, hashed here like SmartContractInterface.hash_nid,
+    or the hex nid_hash of an export; election_id defaults to `election_id`.
+    Returns ([(voter_address, nid_hash, election_id), ...], malformed rows).
+    """
+    records = []
+    malformed = 0
+    lines = block.decode().splitlines()
+    rows = csv.reader(lines) if columns else lines
+    for row in rows:
+        try:
+            if not columns:
+                if not row.strip():
+                    continue
+                row = json.loads(row)
+            elif row:
+                row = dict(zip(columns, row))
+            else:
+                continue
+            voter_address = row["voter_address"]
+            if not isinstance(voter_address, str) or not voter_address:
+                raise ValueError("voter address must be a non-empty string")
+            if row.get("nid"):
+                if not isinstance(row["nid"], str):
+                    raise ValueError("NID must be a string")
+                nid_hash = hashlib.sha256(row["nid"].encode()).digest()
+            else:
+                nid_hash = bytes.fromhex(row["nid_hash"])
+                if len(nid_hash) != 32:
+                    raise ValueError("NID hash must be 32 bytes")
+            records.append((voter_address, nid_hash, int(row.get("election_id") or election_id)))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            malformed += 1
+    return records, malformed
+
+
+def read_roll(path, workers=1, chunk_rows=None, election_id=1):
+    """Yield parse_roll results for each chunk of a roll file, in file order.
+
+    With more than one worker, chunks are parsed and hashed in a process
+    pool while the caller applies earlier ones; at most two chunks per
+    worker are outstanding, so memory stays bounded whatever the file size.
+    Rows must not contain quoted line breaks.
+    """
+    chunk_rows = chunk_rows or Config.IMPORT_CHUNK_ROWS
+    with open(path, "rb") as roll:
+        first = roll.readline()
+        if first.lstrip().startswith(b"{"):
+            columns = None
+            lines = itertools.chain([first], roll)
+        else:
+            columns = next(csv.reader([first.decode().strip()]))
+            lines = roll
+        blocks = iter(lambda: b"".join(itertools.islice(lines, chunk_rows)), b"")
+        parse = functools.partial(parse_roll, columns=columns, election_id=election_id)
+
+        if workers <= 1:
+            yield from map(parse, blocks)
+            return
+
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            for block in blocks:
+                pending.append(pool.submit(parse, block))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def import_roll(contract, path, workers=None, chunk_rows=None, election_id=1):
+    """Register every voter in a roll file; return counts of the outcome"""
+    workers = workers or Config.IMPORT_WORKERS or os.cpu_count() or 1
+    start = time.perf_counter()
+    summary = {"success": True, "rows": 0, "imported": 0, "malformed": 0, "rejected": {}}
+    for records, malformed in read_roll(path, workers, chunk_rows, election_id):
+        result = contract.register_hashed_voters(records)
+        summary["rows"] += len(records) + malformed
+        summary["malformed"] += malformed
+        summary["imported"] += result["imported"]
+        for reason, count in result["rejected"].items():
+            summary["rejected"][reason] = summary["rejected"].get(reason, 0) + count
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Imported {summary['imported']}/{summary['rows']} voters from {path} in {summary['seconds']}s")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export voters, votes and results, or import a voter roll. Works on the configured "
+                    "state backend: with STATE_BACKEND=memory it reads and writes JOURNAL_DIR, and refuses "
+                    "to start while the app holds it; with STATE_BACKEND=shared it talks to the running "
+                    "state server."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="stream an export to a file or stdout")
+    export.add_argument("kind", choices=sorted(EXPORT_FIELDS))
+    export.add_argument("--format", choices=sorted(CONTENT_TYPES), default="ndjson")
+    export.add_argument("--election-id", type=int)
+    export.add_argument("--output", help="file to write (default stdout)")
+    load = commands.add_parser("import", help="register the voters of a CSV or NDJSON roll file")
+    load.add_argument("path")
+    load.add_argument("--election-id", type=int, default=1, help="election for rows without an election_id")
+    load.add_argument("--workers", type=int, help="hashing processes (default IMPORT_WORKERS or one per CPU)")
+    load.add_argument("--chunk-rows", type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    from journal import JournalError
+    from state_backend import create_state_backend
+    try:
+        contract = create_state_backend(None)
+    except JournalError as e:
+        # The app (or another import) has JOURNAL_DIR open
+        sys.exit(str(e))
+
+    if args.command == "export":
+        output = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            for chunk in export_stream(contract, args.kind, args.format, args.election_id):
+                output.write(chunk)
+        finally:
+            if args.output:
+                output.close()
+    else:
+        if Config.STATE_BACKEND == "memory" and not Config.JOURNAL_DIR:
+            logger.warning("No JOURNAL_DIR and no shared state server: the import is discarded on exit")
+        summary = import_roll(contract, args.path, args.workers, args.chunk_rows, args.election_id)
+        if Config.STATE_BACKEND == "memory" and Config.JOURNAL_DIR:
+            # Snapshot now so the app does not replay the whole import on start-up
+            if contract.journal.snapshot_in_progress():
+                contract.journal.snapshot_thread.join()
+            contract.snapshot(background=False)
+            contract.journal.close()
+        print(json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,123 @@
 import os
-from web3 import Web3
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEV_SECRET_KEY = 'dev-secret-key-change-in-production'
+
 class Config:
     # Flask Configuration
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or DEV_SECRET_KEY
     DEBUG = True
     
+    # Bulk API Configuration
+    MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE') or 10000)
+    
+    # Bulk export/import (bulk.py): rows read from the state per page, roll
+    # file rows per import chunk, and import worker processes (0 = one per CPU)
+    EXPORT_PAGE_SIZE = int(os.environ.get('EXPORT_PAGE_SIZE') or 5000)
+    IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS') or 50000)
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS') or 0)
+    
+    # Live results stream: minimum seconds between pushed updates
+    RESULTS_STREAM_INTERVAL = float(os.environ.get('RESULTS_STREAM_INTERVAL') or 1.0)
+    
+    # Per-minute results timeline: seconds between rebuilds of the snapshot
+    # that historical (?at=) and turnout queries read
+    TIMELINE_REFRESH_INTERVAL = float(os.environ.get('TIMELINE_REFRESH_INTERVAL') or 1.0)
+    
+    # Vote journal: off (state is in memory only) unless JOURNAL_DIR is set
+    # to an absolute path. Writes wait up to JOURNAL_SYNC_TIMEOUT seconds for
+    # group commit before failing with a 500
+    JOURNAL_DIR = os.environ.get('JOURNAL_DIR') or None
+    JOURNAL_SYNC_TIMEOUT = float(os.environ.get('JOURNAL_SYNC_TIMEOUT') or 30.0)
+    JOURNAL_COMMIT_INTERVAL = float(os.environ.get('JOURNAL_COMMIT_INTERVAL') or 0.002)
+    SNAPSHOT_EVERY = int(os.environ.get('SNAPSHOT_EVERY') or 1000000)
+    
+    # State backend: 'memory' keeps state in this process, 'shared' connects
+    # to the state server (python state_backend.py) at STATE_ADDRESS, which
+    # is a Unix socket path (only this user may connect) or host:port. The
+    # server unpickles what clients send, so STATE_AUTHKEY is required and
+    # never defaults to SECRET_KEY, and a TCP address must be given on
+    # purpose: an address on another interface than loopback also needs
+    # STATE_ALLOW_REMOTE=true
+    STATE_BACKEND = os.environ.get('STATE_BACKEND') or 'memory'
+    STATE_ADDRESS = os.environ.get('STATE_ADDRESS') or 'data/state.sock'
+    STATE_AUTHKEY = os.environ.get('STATE_AUTHKEY')
+    STATE_ALLOW_REMOTE = (os.environ.get('STATE_ALLOW_REMOTE') or 'false').lower() == 'true'
+    
+    # Election administration (creating, opening and closing elections and
+    # granting eligibility) exists only when ADMIN_TOKEN is set, and each
+    # request must send it in an X-Admin-Token header
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or None
+    
+    # Admission control for write endpoints: token buckets per client address
+    # and per voter address (tokens/sec refill, burst size) and a cap on writes
+    # in progress; excess requests get 429 with Retry-After. 0 disables a limit.
+    # Bulk requests cost one token per row. The limits are kept per worker
+    # process. Behind TRUSTED_PROXY_HOPS reverse proxies the client is the
+    # address that many entries from the end of X-Forwarded-For
+    RATE_LIMIT_CLIENT_RATE = float(os.environ.get('RATE_LIMIT_CLIENT_RATE', 20))
+    RATE_LIMIT_CLIENT_BURST = int(os.environ.get('RATE_LIMIT_CLIENT_BURST', 40))
+    RATE_LIMIT_VOTER_RATE = float(os.environ.get('RATE_LIMIT_VOTER_RATE', 0.5))
+    RATE_LIMIT_VOTER_BURST = int(os.environ.get('RATE_LIMIT_VOTER_BURST', 5))
+    MAX_CONCURRENT_WRITES = int(os.environ.get('MAX_CONCURRENT_WRITES', 64))
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+    
+    # Instrumentation: METRICS_ENABLED=0 turns every metric into a no-op;
+    # the sampling profiler is off until started through /api/profiler.
+    # The profiler routes exist only when PROFILER_TOKEN is set, and each
+    # request must send it in an X-Profiler-Token header
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN') or None
+    PROFILER_INTERVAL = float(os.environ.get('PROFILER_INTERVAL') or 0.01)
+    PROFILER_MIN_INTERVAL = float(os.environ.get('PROFILER_MIN_INTERVAL') or 0.005)
+    PROFILER_MAX_STACKS = int(os.environ.get('PROFILER_MAX_STACKS') or 10000)
+    
     # Blockchain Configuration
     BLOCKCHAIN_URL = os.environ.get('BLOCKCHAIN_URL') or 'http://127.0.0.1:7545'  # Ganache default
     CONTRACT_ADDRESS = os.environ.get('CONTRACT_ADDRESS') or None
     PRIVATE_KEY = os.environ.get('PRIVATE_KEY') or None
     
+    # RPC access: pooled keep-alive connections, cached status, circuit breaker,
+    # and backoff between attempts to reach the node at start-up
+    RPC_POOL_SIZE = int(os.environ.get('RPC_POOL_SIZE') or 20)
+    RPC_TIMEOUT = float(os.environ.get('RPC_TIMEOUT') or 5)
+    CHAIN_STATUS_INTERVAL = float(os.environ.get('CHAIN_STATUS_INTERVAL') or 2.0)
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD') or 3)
+    CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT') or 10.0)
+    CONNECT_RETRY_INITIAL = float(os.environ.get('CONNECT_RETRY_INITIAL') or 0.5)
+    CONNECT_RETRY_MAX = float(os.environ.get('CONNECT_RETRY_MAX') or 30.0)
+    
+    # Transaction building: gas limit per call and gas price refresh
+    GAS_LIMIT = int(os.environ.get('GAS_LIMIT') or 200000)
+    DEFAULT_GAS_PRICE_GWEI = int(os.environ.get('DEFAULT_GAS_PRICE_GWEI') or 20)
+    GAS_PRICE_INTERVAL = float(os.environ.get('GAS_PRICE_INTERVAL') or 15.0)
+    
+    # On-chain vote submission pipeline; a transaction with no receipt after
+    # TX_RECEIPT_TIMEOUT seconds is reported expired and frees its slot. A
+    # batch the node cannot be reached for is sent again up to TX_SEND_ATTEMPTS
+    # times in all, TX_RETRY_DELAY seconds later, doubling per attempt
+    TX_QUEUE_SIZE = int(os.environ.get('TX_QUEUE_SIZE') or 10000)
+    TX_BATCH_SIZE = int(os.environ.get('TX_BATCH_SIZE') or 100)
+    TX_MAX_IN_FLIGHT = int(os.environ.get('TX_MAX_IN_FLIGHT') or 1000)
+    TX_RECEIPT_POLL_INTERVAL = float(os.environ.get('TX_RECEIPT_POLL_INTERVAL') or 0.5)
+    TX_RECEIPT_TIMEOUT = float(os.environ.get('TX_RECEIPT_TIMEOUT') or 120.0)
+    TX_RETRY_AFTER = int(os.environ.get('TX_RETRY_AFTER') or 1)
+    TX_SEND_ATTEMPTS = int(os.environ.get('TX_SEND_ATTEMPTS') or 3)
+    TX_RETRY_DELAY = float(os.environ.get('TX_RETRY_DELAY') or 1.0)
+    
+    # Event-log indexer serving on-chain results and voter status
+    INDEXER_CHECKPOINT = os.environ.get('INDEXER_CHECKPOINT') or 'data/indexer.json'
+    INDEXER_START_BLOCK = int(os.environ.get('INDEXER_START_BLOCK') or 0)
+    INDEXER_CHUNK_SIZE = int(os.environ.get('INDEXER_CHUNK_SIZE') or 2000)
+    INDEXER_REORG_DEPTH = int(os.environ.get('INDEXER_REORG_DEPTH') or 12)
+    INDEXER_POLL_INTERVAL = float(os.environ.get('INDEXER_POLL_INTERVAL') or 2.0)
+    INDEXER_CHECKPOINT_INTERVAL = float(os.environ.get('INDEXER_CHECKPOINT_INTERVAL') or 30.0)
+    
+    # Seconds between on-chain anchors of the ballot audit log root (0 disables)
+    AUDIT_ANCHOR_INTERVAL = float(os.environ.get('AUDIT_ANCHOR_INTERVAL') or 300.0)
+    
     # Contract ABI (simplified for demo)
     CONTRACT_ABI = [
         {
@@ -30,6 +134,15 @@ class Config:
             "name": "ElectionCreated",
             "type": "event"
         },
+        {
+            "anonymous": False,
+            "inputs": [
+                {"indexed": False, "internalType": "bytes32", "name": "root", "type": "bytes32"},
+                {"indexed": False, "internalType": "uint256", "name": "ballotCount", "type": "uint256"}
+            ],
+            "name": "AuditRootAnchored",
+            "type": "event"
+        },
         {
             "anonymous": False,
             "inputs": [
@@ -49,6 +162,13 @@ class Config:
             "name": "VoterRegistered",
             "type": "event"
         },
+        {
+            "inputs": [{"internalType": "bytes32", "name": "_root", "type": "bytes32"}, {"internalType": "uint256", "name": "_ballotCount", "type": "uint256"}],
+            "name": "anchorAuditRoot",
+            "outputs": [],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        },
         {
             "inputs": [{"internalType": "uint256", "name": "_electionId", "type": "uint256"}, {"internalType": "string", "name": "_candidate", "type": "string"}],
             "name": "castVote",
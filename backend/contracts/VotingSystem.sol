@@ -26,9 +26,14 @@ contract VotingSystem {
     uint256 public electionCount;
     address public admin;
     
+    // Latest anchored root of the off-chain ballot audit log
+    bytes32 public auditRoot;
+    uint256 public auditBallotCount;
+    
     event VoterRegistered(address indexed voter, uint256 electionId);
     event VoteCast(address indexed voter, uint256 electionId, string candidate);
     event ElectionCreated(uint256 electionId, string name);
+    event AuditRootAnchored(bytes32 root, uint256 ballotCount);
     
     modifier onlyAdmin() {
         require(msg.sender == admin, "Only admin can perform this action");
@@ -131,4 +136,12 @@ contract VotingSystem {
         require(_electionId <= electionCount && _electionId > 0, "Invalid election ID");
         elections[_electionId].active = false;
     }
+    
+    function anchorAuditRoot(bytes32 _root, uint256 _ballotCount) public onlyAdmin {
+        require(_ballotCount > auditBallotCount, "Audit log did not grow");
+        auditRoot = _root;
+        auditBallotCount = _ballotCount;
+        
+        emit AuditRootAnchored(_root, _ballotCount);
+    }
 }
\ No newline at end of file
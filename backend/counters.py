@@ -0,0 +1,51 @@
+import threading
+from array import array
+
+class ShardedTally:
+    """Per-candidate vote counts split into shards, merged lazily on read.
+
+    Writers add to one shard without taking a lock of their own: callers
+    must serialize writes to a shard, which the vote path does by using
+    the index of the lock stripe it already holds. Hot candidates
+    therefore never funnel every writer through one counter. Reads sum
+    the shards only when something was added since the last merge and
+    otherwise return the cached merged view. Shards are allocated on first
+    use, so small elections with many candidates stay small.
+    """
+
+    __slots__ = ("size", "shards", "dirty", "merged", "merge_lock")
+
+    def __init__(self, size, shards=64):
+        self.size = size
+        self.shards = [None] * shards
+        self.dirty = False
+        # (total, [count per candidate index])
+        self.merged = (0, [0] * size)
+        self.merge_lock = threading.Lock()
+
+    def add(self, shard, index, amount=1):
+        """Add to one candidate's count in a shard the caller has exclusive use of"""
+        counts = self.shards[shard]
+        if counts is None:
+            counts = self.shards[shard] = array('Q', bytes(8 * self.size))
+        counts[index] += amount
+        # Set after the add, so a reader that clears the flag first never misses it
+        self.dirty = True
+
+    def counts(self):
+        """Return (total, counts) merged across shards; callers must not modify counts"""
+        if self.dirty:
+            with self.merge_lock:
+                if self.dirty:
+                    self.dirty = False
+                    shards = [counts for counts in self.shards if counts is not None]
+                    counts = [sum(column) for column in zip(*shards)] if shards else [0] * self.size
+                    self.merged = (sum(counts), counts)
+        return self.merged
+
+    def set(self, counts):
+        """Replace every count, e.g. when restoring a snapshot"""
+        with self.merge_lock:
+            self.shards = [None] * len(self.shards)
+            self.shards[0] = array('Q', counts)
+            self.dirty = True
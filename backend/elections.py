@@ -0,0 +1,169 @@
+import json
+import math
+import time
+from datetime import datetime, timezone
+
+from counters import ShardedTally
+from storage import Bitset
+from timeline import TallyTimeline
+
+STATUS_CREATED = "created"
+STATUS_OPEN = "open"
+STATUS_CLOSED = "closed"
+
+
+def parse_time(value):
+    """Accept epoch seconds (a number or numeric string) or an ISO 8601 string; None stays None.
+
+    An ISO 8601 string without a UTC offset is read as UTC, never as the
+    server's local time. Anything else, including booleans, non-finite
+    numbers and times before the epoch, raises ValueError.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"Not a time: {value!r}")
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value) or value < 0:
+            raise ValueError(f"Not a time: {value!r}")
+        seconds = int(value)
+    elif value.isdigit():
+        seconds = int(value)
+    else:
+        # fromisoformat only accepts a "Z" suffix from Python 3.11
+        if value.endswith(("Z", "z")):
+            value = value[:-1] + "+00:00"
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        seconds = int(moment.timestamp())
+    if seconds < 0:
+        raise ValueError(f"Time is before the epoch: {value!r}")
+    return seconds
+
+
+class Election:
+    """One election: candidates, lifecycle, voting window and per-voter flags.
+
+    An election is created, then opened, then closed. Votes are accepted
+    only while it is open and inside its optional [start_time, end_time)
+    window (epoch seconds). Eligibility and participation are bitsets
+    indexed by voter slot, so each (voter, election) pair costs two bits.
+    Closing freezes the tally: the final results and their JSON are
+    computed once and served from then on. Alongside the tally, a
+    TallyTimeline keeps per-minute counts for historical results and
+    turnout curves.
+    """
+
+    def __init__(self, election_id, name, candidates, start_time=None, end_time=None, shards=64,
+                 timeline_interval=1.0, locks=None):
+        self.id = election_id
+        self.name = name
+        self.candidates = list(candidates)
+        self.candidate_index = {candidate: index for index, candidate in enumerate(self.candidates)}
+        self.start_time = start_time
+        self.end_time = end_time
+        self.status = STATUS_CREATED
+        self.created_at = int(time.time())
+        # Partial counts per lock stripe; the merged total doubles as the
+        # results version that keys the results cache
+        self.tally = ShardedTally(len(self.candidates), shards)
+        self.eligible = Bitset()
+        self.voted = Bitset()
+        # Per-minute counts, read through snapshots refreshed every timeline_interval seconds;
+        # `locks` are the writers' stripes, one per shard, taken to fold ended minutes
+        self.timeline = TallyTimeline(
+            len(self.candidates), shards, timeline_interval, eligible=lambda: self.eligible.count(), locks=locks
+        )
+        # (results dict, serialized results) once closed
+        self.final = None
+
+    def window_state(self, now=None):
+        """Lifecycle state with the time window applied: created, scheduled, open, ended or closed"""
+        if self.status != STATUS_OPEN:
+            return self.status
+        now = time.time() if now is None else now
+        if self.start_time is not None and now < self.start_time:
+            return "scheduled"
+        if self.end_time is not None and now >= self.end_time:
+            return "ended"
+        return STATUS_OPEN
+
+    def results(self):
+        """Current (or final) results as returned by get_election_results"""
+        if self.final is not None:
+            return self.final[0]
+        total, counts = self.tally.counts()
+        return {
+            "success": True,
+            "results": dict(zip(self.candidates, counts)),
+            "total_votes": total,
+            "version": total
+        }
+
+    def finalize(self):
+        """Freeze the results; the caller guarantees no vote can still be applied.
+
+        Closing changes the results without adding a vote, so the version
+        moves on by one; ETags and streams keyed on it then see final=True.
+        """
+        results = dict(self.results(), final=True)
+        results["version"] += 1
+        # Nothing writes to the shards any more; keep one merged copy
+        self.tally.set(self.tally.counts()[1])
+        self.status = STATUS_CLOSED
+        self.final = (results, json.dumps(results))
+
+    def describe(self):
+        """Public summary of the election"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "candidates": self.candidates,
+            "status": self.window_state(),
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "created_at": self.created_at,
+            "total_votes": self.tally.counts()[0]
+        }
+
+    def meta(self):
+        """Definition and counts for the snapshot meta section"""
+        total, counts = self.tally.counts()
+        return {
+            "name": self.name,
+            "candidates": self.candidates,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "status": self.status,
+            "created_at": self.created_at,
+            "votes": dict(zip(self.candidates, counts)),
+            "total_votes": total,
+            "version": total
+        }
+
+    def snapshot(self):
+        """Copy the per-voter bitsets and the timeline buckets out as (name, bytes) sections"""
+        return [
+            (f"elections.{self.id}.eligible", bytes(self.eligible.bits)),
+            (f"elections.{self.id}.voted", bytes(self.voted.bits))
+        ] + self.timeline.to_sections(f"elections.{self.id}.timeline")
+
+    @classmethod
+    def restore(cls, election_id, meta, sections, shards=64, timeline_interval=1.0, locks=None):
+        """Rebuild an election from its snapshot meta and sections"""
+        election = cls(
+            election_id, meta["name"], meta["candidates"],
+            start_time=meta["start_time"], end_time=meta["end_time"], shards=shards,
+            timeline_interval=timeline_interval, locks=locks
+        )
+        election.created_at = meta["created_at"]
+        election.tally.set([meta["votes"].get(candidate, 0) for candidate in election.candidates])
+        election.eligible = Bitset.from_bytes(sections[f"elections.{election_id}.eligible"])
+        election.voted = Bitset.from_bytes(sections[f"elections.{election_id}.voted"])
+        election.timeline.restore(f"elections.{election_id}.timeline", sections)
+        if meta["status"] == STATUS_CLOSED:
+            election.finalize()
+        else:
+            election.status = meta["status"]
+        return election
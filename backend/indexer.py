@@ -0,0 +1,230 @@
+import os
+import json
+import threading
+import time
+import logging
+from collections import deque
+
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+INDEXED_EVENTS = ("ElectionCreated", "VoterRegistered", "VoteCast")
+
+
+def event_topic(abi_entry):
+    """keccak256 of the event signature, as used in topic 0"""
+    signature = f"{abi_entry['name']}({','.join(item['type'] for item in abi_entry['inputs'])})"
+    return Web3.keccak(text=signature).hex()
+
+
+class EventIndexer:
+    """Materialized view of the contract's state built from its event logs.
+
+    Reads ElectionCreated, VoterRegistered and VoteCast logs in block-range
+    chunks and folds them into in-memory tallies and voter flags, so reads
+    never touch the node. Progress and the view are checkpointed together
+    to a JSON file, at most once per `checkpoint_interval` seconds so the
+    cost of rewriting the view does not grow with every poll or chunk, and
+    resumed on restart; blocks indexed after the last checkpoint are simply
+    indexed again.
+
+    Changes from the most recent `reorg_depth` blocks are kept in an undo
+    log alongside the hash of the last indexed block. If that hash no
+    longer matches the chain, the undo log is replayed backwards and those
+    blocks are indexed again.
+    """
+
+    def __init__(self, w3, contract, checkpoint_path, call, start_block=0, chunk_size=2000,
+                 reorg_depth=12, poll_interval=2.0, checkpoint_interval=30.0):
+        self.w3 = w3
+        self.contract = contract
+        self.checkpoint_path = checkpoint_path
+        self.call = call
+        self.chunk_size = chunk_size
+        self.reorg_depth = reorg_depth
+        self.poll_interval = poll_interval
+        self.checkpoint_interval = checkpoint_interval
+        # Whether the view changed since the last checkpoint, and when that was (monotonic)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.events = {
+            event_topic(entry): entry["name"]
+            for entry in contract.abi
+            if entry.get("type") == "event" and entry.get("name") in INDEXED_EVENTS
+        }
+
+        self.next_block = start_block
+        self.elections = {}
+        self.tallies = {}
+        self.voters = {}
+        # (block number, block hash) of the last indexed block
+        self.head = None
+        # (block number, [undo entries]) for recent, not yet final blocks
+        self.undo = deque()
+        self.load_checkpoint()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="event-indexer", daemon=True)
+            self.thread.start()
+
+    def get_election_results(self, election_id):
+        """Tallies for an election as seen in indexed VoteCast logs"""
+        with self.lock:
+            return dict(self.tallies.get(election_id, {}))
+
+    def get_voter_status(self, voter_address):
+        """(registered, voted) for an address as seen in indexed logs"""
+        with self.lock:
+            status = self.voters.get(voter_address.lower())
+        if status is None:
+            return False, False
+        return status["registered"], status["voted"]
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Event indexer error: {str(e)}")
+            time.sleep(self.poll_interval)
+
+    def poll(self):
+        """Index everything up to the current head, one chunk at a time"""
+        if self._detect_reorg():
+            self.rollback()
+
+        latest = self.call(lambda: self.w3.eth.block_number)
+        while self.next_block <= latest:
+            to_block = min(self.next_block + self.chunk_size - 1, latest)
+            logs = self.call(lambda: self.w3.eth.get_logs({
+                "address": self.contract.address,
+                "fromBlock": self.next_block,
+                "toBlock": to_block
+            }))
+            block_hash = self.call(lambda: self.w3.eth.get_block(to_block)["hash"]).hex()
+
+            with self.lock:
+                for log in logs:
+                    self._apply(log)
+                self.head = (to_block, block_hash)
+                self.next_block = to_block + 1
+                # Blocks older than the reorg window are final; drop their undo entries
+                while self.undo and self.undo[0][0] <= to_block - self.reorg_depth:
+                    self.undo.popleft()
+                self.dirty = True
+            self.maybe_checkpoint()
+
+    def _detect_reorg(self):
+        """Check that the last indexed block is still on the canonical chain"""
+        if self.head is None:
+            return False
+        number, block_hash = self.head
+        current = self.call(lambda: self.w3.eth.get_block(number)["hash"]).hex()
+        if current != block_hash:
+            logger.warning(f"Chain reorganization detected at block {number}")
+            return True
+        return False
+
+    def rollback(self):
+        """Undo the last `reorg_depth` blocks and index them again"""
+        with self.lock:
+            floor = self.next_block - self.reorg_depth
+            while self.undo and self.undo[-1][0] >= floor:
+                _, entries = self.undo.pop()
+                for entry in reversed(entries):
+                    self._revert(entry)
+            self.next_block = max(floor, 0)
+            self.head = None
+            self.dirty = True
+
+    def _undo_entries(self, block_number):
+        if not self.undo or self.undo[-1][0] != block_number:
+            self.undo.append((block_number, []))
+        return self.undo[-1][1]
+
+    def _apply(self, log):
+        name = self.events.get(log["topics"][0].hex())
+        if name is None:
+            return
+        args = getattr(self.contract.events, name)().process_log(log)["args"]
+        undo = self._undo_entries(log["blockNumber"])
+
+        if name == "ElectionCreated":
+            election_id = args["electionId"]
+            undo.append(("election", election_id, self.elections.get(election_id)))
+            self.elections[election_id] = args["name"]
+            self.tallies.setdefault(election_id, {})
+        elif name == "VoterRegistered":
+            address = args["voter"].lower()
+            previous = self.voters.get(address)
+            undo.append(("voter", address, dict(previous) if previous else None))
+            self.voters[address] = {"registered": True, "voted": previous["voted"] if previous else False}
+        elif name == "VoteCast":
+            address = args["voter"].lower()
+            election_id, candidate = args["electionId"], args["candidate"]
+            previous = self.voters.get(address)
+            undo.append(("voter", address, dict(previous) if previous else None))
+            undo.append(("vote", election_id, candidate))
+            self.voters[address] = {"registered": True, "voted": True}
+            tally = self.tallies.setdefault(election_id, {})
+            tally[candidate] = tally.get(candidate, 0) + 1
+
+    def _revert(self, entry):
+        kind, key, value = entry
+        if kind == "election":
+            if value is None:
+                self.elections.pop(key, None)
+            else:
+                self.elections[key] = value
+        elif kind == "voter":
+            if value is None:
+                self.voters.pop(key, None)
+            else:
+                self.voters[key] = value
+        elif kind == "vote":
+            tally = self.tallies[key]
+            tally[value] -= 1
+            if not tally[value]:
+                del tally[value]
+
+    def maybe_checkpoint(self):
+        """Checkpoint if the view changed and checkpoint_interval has passed since the last one"""
+        if self.dirty and time.monotonic() - self.saved_at >= self.checkpoint_interval:
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """Atomically persist progress and the materialized view"""
+        with self.lock:
+            self.dirty = False
+            self.saved_at = time.monotonic()
+            state = {
+                "next_block": self.next_block,
+                "head": self.head,
+                "elections": list(self.elections.items()),
+                "tallies": [[election_id, tally] for election_id, tally in self.tallies.items()],
+                "voters": self.voters,
+                "undo": [[number, entries] for number, entries in self.undo]
+            }
+            data = json.dumps(state)
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        self.next_block = state["next_block"]
+        self.head = tuple(state["head"]) if state["head"] else None
+        self.elections = dict(state["elections"])
+        self.tallies = {election_id: tally for election_id, tally in state["tallies"]}
+        self.voters = state["voters"]
+        self.undo = deque((number, [tuple(entry) for entry in entries]) for number, entries in state["undo"])
+        logger.info(f"Event indexer resuming from block {self.next_block}")
@@ -0,0 +1,372 @@
+import os
+import glob
+import fcntl
+import json
+import mmap
+import struct
+import zlib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Frame: payload length, CRC32 of payload
+FRAME = struct.Struct('<II')
+# Register payload: type, election_id, timestamp, nid_hash, address length
+REGISTER = struct.Struct('<BII32sH')
+# Vote payload: type, election_id, timestamp, candidate_index, address length
+VOTE = struct.Struct('<BIIHH')
+# Election payload: type, election_id, then the definition as JSON
+ELECTION = struct.Struct('<BI')
+# Election status payload: type, election_id, status length
+ELECTION_STATUS = struct.Struct('<BIB')
+# Eligibility payload: type, election_id, address length
+ELIGIBILITY = struct.Struct('<BIH')
+
+RECORD_REGISTER = 1
+RECORD_VOTE = 2
+RECORD_ELECTION = 3
+RECORD_ELECTION_STATUS = 4
+RECORD_ELIGIBILITY = 5
+
+# Bumped whenever the snapshot sections change; older snapshots are refused
+SNAPSHOT_MAGIC = b'DBSNAP2\x00'
+SNAPSHOT_HEADER = struct.Struct('<8sII')
+SECTION_HEADER = struct.Struct('<HQ')
+
+
+class JournalError(Exception):
+    """The journal can no longer make records durable"""
+
+
+def encode_register(voter_address, nid_hash, election_id, timestamp):
+    """Encode a voter registration record"""
+    address = voter_address.encode()
+    return REGISTER.pack(RECORD_REGISTER, election_id, timestamp, nid_hash, len(address)) + address
+
+
+def encode_vote(voter_address, election_id, candidate_index, timestamp):
+    """Encode a cast vote record"""
+    address = voter_address.encode()
+    return VOTE.pack(RECORD_VOTE, election_id, timestamp, candidate_index, len(address)) + address
+
+
+def encode_election(election_id, name, candidates, start_time, end_time):
+    """Encode an election creation record"""
+    definition = {"name": name, "candidates": candidates, "start_time": start_time, "end_time": end_time}
+    return ELECTION.pack(RECORD_ELECTION, election_id) + json.dumps(definition).encode()
+
+
+def encode_election_status(election_id, status):
+    """Encode an election status change (open/closed) record"""
+    status = status.encode()
+    return ELECTION_STATUS.pack(RECORD_ELECTION_STATUS, election_id, len(status)) + status
+
+
+def encode_eligibility(voter_address, election_id):
+    """Encode a grant of eligibility for an election"""
+    address = voter_address.encode()
+    return ELIGIBILITY.pack(RECORD_ELIGIBILITY, election_id, len(address)) + address
+
+
+def decode_record(payload):
+    """Decode a record payload into a tuple starting with its type"""
+    if payload[0] == RECORD_REGISTER:
+        _, election_id, timestamp, nid_hash, length = REGISTER.unpack_from(payload)
+        address = bytes(payload[REGISTER.size:REGISTER.size + length]).decode()
+        return (RECORD_REGISTER, address, nid_hash, election_id, timestamp)
+    if payload[0] == RECORD_VOTE:
+        _, election_id, timestamp, candidate_index, length = VOTE.unpack_from(payload)
+        address = bytes(payload[VOTE.size:VOTE.size + length]).decode()
+        return (RECORD_VOTE, address, election_id, candidate_index, timestamp)
+    if payload[0] == RECORD_ELECTION:
+        _, election_id = ELECTION.unpack_from(payload)
+        definition = json.loads(bytes(payload[ELECTION.size:]).decode())
+        return (RECORD_ELECTION, election_id, definition)
+    if payload[0] == RECORD_ELECTION_STATUS:
+        _, election_id, length = ELECTION_STATUS.unpack_from(payload)
+        status = bytes(payload[ELECTION_STATUS.size:ELECTION_STATUS.size + length]).decode()
+        return (RECORD_ELECTION_STATUS, election_id, status)
+    if payload[0] == RECORD_ELIGIBILITY:
+        _, election_id, length = ELIGIBILITY.unpack_from(payload)
+        address = bytes(payload[ELIGIBILITY.size:ELIGIBILITY.size + length]).decode()
+        return (RECORD_ELIGIBILITY, address, election_id)
+    raise ValueError(f"Unknown journal record type {payload[0]}")
+
+
+class VoteJournal:
+    """Append-only write-ahead journal with group commit and snapshots.
+
+    Records are appended to numbered segment files. A background thread
+    flushes and fsyncs whatever has accumulated every commit interval, so
+    concurrent writers share one fsync instead of paying for their own;
+    callers block in wait_durable until their record is on disk.
+
+    A snapshot is taken by rotating to a new segment and writing the full
+    state as of that point. Recovery memory-maps the snapshot and replays
+    only the segments written after it.
+
+    A failed write or fsync leaves the file's on-disk contents unknown, so
+    the journal fails stop: the error is recorded, every waiter is woken
+    with a JournalError, and later appends raise it too until the process
+    is restarted and recovers from what reached the disk. Waiters also give
+    up after `sync_timeout` seconds should the flusher stall.
+
+    One process at a time owns the directory: the journal holds an
+    exclusive lock on its LOCK file until close() or exit, and a second
+    journal opened on the same directory raises JournalError. Otherwise a
+    second writer's replay could truncate a tail the owner is appending to.
+    """
+
+    def __init__(self, directory, commit_interval=0.002, snapshot_every=1000000, sync_timeout=30.0):
+        if not os.path.isabs(directory):
+            raise ValueError(f"Journal directory must be an absolute path: {directory}")
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self.sync_timeout = sync_timeout
+        os.makedirs(directory, exist_ok=True)
+        self.lock_file = open(os.path.join(directory, "LOCK"), 'a')
+        try:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.lock_file.close()
+            raise JournalError(f"Journal directory {directory} is in use by another process")
+
+        self.lock = threading.Lock()
+        self.durable = threading.Condition(self.lock)
+        self.pending = threading.Event()
+        self.appended_seq = 0
+        self.durable_seq = 0
+        # First write/fsync error; once set nothing more is acknowledged
+        self.error = None
+        self.records_since_snapshot = 0
+        self.snapshot_thread = None
+
+        segments = self._segments()
+        self.segment = segments[-1] if segments else 0
+        self.file = open(self._segment_path(self.segment), 'ab')
+
+        self.flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+        self.flusher.start()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"journal-{segment:08d}.log")
+
+    def _snapshot_path(self):
+        return os.path.join(self.directory, "snapshot.bin")
+
+    def _segments(self):
+        """List segment numbers present on disk, in order"""
+        paths = glob.glob(os.path.join(self.directory, "journal-*.log"))
+        return sorted(int(os.path.basename(path)[8:16]) for path in paths)
+
+    def append(self, payload):
+        """Append a record and return its sequence number"""
+        with self.lock:
+            if self.error is not None:
+                raise JournalError(f"Journal failed: {self.error}")
+            try:
+                self.file.write(FRAME.pack(len(payload), zlib.crc32(payload)))
+                self.file.write(payload)
+            except OSError as e:
+                self._fail(e)
+                raise JournalError(f"Journal write failed: {e}")
+            self.appended_seq += 1
+            self.records_since_snapshot += 1
+            seq = self.appended_seq
+        self.pending.set()
+        return seq
+
+    def wait_durable(self, seq=None):
+        """Block until the given (default: latest) record has been fsynced; raise JournalError if it cannot be"""
+        deadline = time.monotonic() + self.sync_timeout
+        with self.durable:
+            if seq is None:
+                seq = self.appended_seq
+            while self.durable_seq < seq:
+                if self.error is not None:
+                    raise JournalError(f"Journal failed: {self.error}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise JournalError(f"Journal not durable after {self.sync_timeout}s")
+                self.durable.wait(remaining)
+
+    def _fail(self, error):
+        """Record a write/fsync error and wake every waiter; the caller holds self.lock"""
+        logger.error(f"Journal failed, refusing further writes: {str(error)}")
+        if self.error is None:
+            self.error = error
+        self.durable.notify_all()
+
+    def _flush_loop(self):
+        """Group commit: fsync everything appended since the last pass"""
+        while self.error is None:
+            self.pending.wait()
+            time.sleep(self.commit_interval)
+            self.pending.clear()
+
+            fd = None
+            try:
+                with self.lock:
+                    self.file.flush()
+                    target = self.appended_seq
+                    # A duplicate descriptor stays valid if the segment rotates
+                    fd = os.dup(self.file.fileno())
+                os.fsync(fd)
+            except OSError as e:
+                with self.durable:
+                    self._fail(e)
+                return
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+            with self.durable:
+                self.durable_seq = max(self.durable_seq, target)
+                self.durable.notify_all()
+
+    def close(self):
+        """Make every appended record durable, stop the flusher and release the directory"""
+        if self.snapshot_in_progress():
+            self.snapshot_thread.join()
+        with self.durable:
+            if self.error is None:
+                try:
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+                    self.durable_seq = self.appended_seq
+                except OSError as e:
+                    self._fail(e)
+                else:
+                    self.error = JournalError("Journal closed")
+                    self.durable.notify_all()
+        self.pending.set()
+        self.flusher.join()
+        self.file.close()
+        self.lock_file.close()
+
+    def should_snapshot(self):
+        return self.records_since_snapshot >= self.snapshot_every and not self.snapshot_in_progress()
+
+    def snapshot_in_progress(self):
+        return self.snapshot_thread is not None and self.snapshot_thread.is_alive()
+
+    def rotate(self):
+        """Start a new segment and return its number"""
+        with self.lock:
+            if self.error is not None:
+                raise JournalError(f"Journal failed: {self.error}")
+            try:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except OSError as e:
+                self._fail(e)
+                raise JournalError(f"Journal rotation failed: {e}")
+            self.file.close()
+            self.segment += 1
+            self.file = open(self._segment_path(self.segment), 'ab')
+            self.records_since_snapshot = 0
+            return self.segment
+
+    def write_snapshot(self, segment, sections, background=True):
+        """Persist state captured just before `segment` started.
+
+        sections is a list of (name, bytes) pairs. Older segments are
+        deleted once the snapshot is safely renamed into place.
+        """
+        if background:
+            self.snapshot_thread = threading.Thread(
+                target=self._write_snapshot, args=(segment, sections), name="journal-snapshot", daemon=True
+            )
+            self.snapshot_thread.start()
+        else:
+            self._write_snapshot(segment, sections)
+
+    def _write_snapshot(self, segment, sections):
+        start = time.perf_counter()
+        path = self._snapshot_path()
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, segment, len(sections)))
+                for name, data in sections:
+                    encoded = name.encode()
+                    f.write(SECTION_HEADER.pack(len(encoded), len(data)))
+                    f.write(encoded)
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            for old in self._segments():
+                if old < segment:
+                    os.remove(self._segment_path(old))
+
+            logger.info(f"Snapshot at segment {segment} written in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.error(f"Snapshot error: {str(e)}")
+
+    def load_snapshot(self):
+        """Map the latest snapshot and return (segment, {name: memoryview}), or (0, None)"""
+        path = self._snapshot_path()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return 0, None
+
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        magic, segment, count = SNAPSHOT_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC:
+            if magic.startswith(b'DBSNAP'):
+                raise ValueError(f"Snapshot {path} has unsupported format {magic!r} (expected {SNAPSHOT_MAGIC!r})")
+            raise ValueError("Corrupt snapshot header")
+
+        sections = {}
+        offset = SNAPSHOT_HEADER.size
+        for _ in range(count):
+            name_length, data_length = SECTION_HEADER.unpack_from(view, offset)
+            offset += SECTION_HEADER.size
+            name = bytes(view[offset:offset + name_length]).decode()
+            offset += name_length
+            sections[name] = view[offset:offset + data_length]
+            offset += data_length
+        return segment, sections
+
+    def replay(self, from_segment):
+        """Yield decoded records from every segment >= from_segment.
+
+        A torn or corrupt tail in the last segment is truncated away. Earlier
+        segments were fsynced before the journal rotated past them, so a bad
+        record there means the disk lost acknowledged data; records after it
+        would be applied without the ones they depend on, so replay raises
+        JournalError instead.
+        """
+        with self.lock:
+            self.file.flush()
+        segments = [segment for segment in self._segments() if segment >= from_segment]
+        for segment in segments:
+            path = self._segment_path(segment)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            view = memoryview(data)
+            offset = 0
+            while offset + FRAME.size <= len(view):
+                length, crc = FRAME.unpack_from(view, offset)
+                payload = view[offset + FRAME.size:offset + FRAME.size + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                yield decode_record(payload)
+                offset += FRAME.size + length
+
+            if offset < len(view):
+                if segment != segments[-1]:
+                    raise JournalError(f"Corrupt journal record in {path} at byte {offset}, before the last segment")
+                logger.warning(f"Truncating torn journal tail in {path} at byte {offset}")
+                with self.lock:
+                    if segment == self.segment:
+                        self.file.truncate(offset)
+                    else:
+                        os.truncate(path, offset)
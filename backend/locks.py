@@ -0,0 +1,38 @@
+import threading
+from contextlib import contextmanager
+
+class StripedLock:
+    """A fixed pool of locks selected by key hash.
+
+    Operations on unrelated keys usually land on different stripes and run
+    concurrently; operations on the same key always share a stripe.
+    """
+
+    def __init__(self, stripes=64):
+        self.locks = [threading.Lock() for _ in range(stripes)]
+
+    def stripe(self, key):
+        return hash(key) % len(self.locks)
+
+    @contextmanager
+    def hold(self, *keys):
+        """Hold the stripes for every key, acquired in index order to avoid deadlock"""
+        indexes = sorted({self.stripe(key) for key in keys})
+        for index in indexes:
+            self.locks[index].acquire()
+        try:
+            yield
+        finally:
+            for index in reversed(indexes):
+                self.locks[index].release()
+
+    @contextmanager
+    def hold_all(self):
+        """Hold every stripe, excluding all keyed operations"""
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
@@ -0,0 +1,226 @@
+import hashlib
+import struct
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 32
+SIZE = struct.Struct('<Q')
+
+
+def leaf_hash(data):
+    """RFC 6962 leaf hash: SHA-256(0x00 || data)"""
+    return hashlib.sha256(b'\x00' + data).digest()
+
+
+def node_hash(left, right):
+    """RFC 6962 interior node hash: SHA-256(0x01 || left || right)"""
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def verify_inclusion(leaf, index, tree_size, proof, root):
+    """Check an inclusion proof for a leaf hash against a root (RFC 9162 2.1.3.2)"""
+    if index >= tree_size:
+        return False
+    fn, sn = index, tree_size - 1
+    result = leaf
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            result = node_hash(sibling, result)
+            while not (fn & 1 or fn == 0):
+                fn >>= 1
+                sn >>= 1
+        else:
+            result = node_hash(result, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and result == root
+
+
+class MerkleLog:
+    """Incremental Merkle tree over an append-only log (RFC 6962 shape).
+
+    Appending a leaf costs at most O(log n) hashes, two on average. Complete
+    subtrees of height `cache_height` and above are kept as packed hashes
+    (about 32 / 2**(cache_height - 1) bytes per leaf); anything below that
+    is recomputed on demand from `leaf_data(index)`, which must return the
+    bytes the leaf was appended with. Inclusion proofs and roots can be
+    produced for any tree size up to the current one.
+
+    Leaves must be added in index order; add() accepts them out of order
+    from concurrent writers and folds them in once the gap before them is
+    filled.
+    """
+
+    def __init__(self, leaf_data, cache_height=4):
+        self.leaf_data = leaf_data
+        self.cache_height = cache_height
+        self.lock = threading.Lock()
+        self.size = 0
+        # levels[h - cache_height] holds every complete node of height h, packed
+        self.levels = []
+        # Left siblings still waiting for their right half, below cache_height
+        self.frontier = [None] * cache_height
+        # index -> leaf hash for leaves that arrived ahead of a gap
+        self.pending = {}
+
+    def __len__(self):
+        return self.size
+
+    def add(self, index, data):
+        """Add the leaf for log entry `index`"""
+        leaf = leaf_hash(data)
+        with self.lock:
+            if index != self.size:
+                self.pending[index] = leaf
+                return
+            self._push(leaf)
+            while self.size in self.pending:
+                self._push(self.pending.pop(self.size))
+
+    def _push(self, node):
+        index = self.size
+        height = 0
+        while True:
+            if height >= self.cache_height:
+                level = height - self.cache_height
+                if level == len(self.levels):
+                    self.levels.append(bytearray())
+                self.levels[level] += node
+            if not index & 1:
+                if height < self.cache_height:
+                    self.frontier[height] = node
+                break
+            if height < self.cache_height:
+                left = self.frontier[height]
+            else:
+                offset = (index - 1) * HASH_SIZE
+                left = bytes(self.levels[height - self.cache_height][offset:offset + HASH_SIZE])
+            node = node_hash(left, node)
+            index >>= 1
+            height += 1
+        self.size += 1
+
+    def _subtree(self, height, index):
+        """Hash of the complete subtree of `height` covering leaves [index << height, (index + 1) << height)"""
+        if height >= self.cache_height:
+            offset = index * HASH_SIZE
+            return bytes(self.levels[height - self.cache_height][offset:offset + HASH_SIZE])
+        if height == 0:
+            return leaf_hash(self.leaf_data(index))
+        return node_hash(self._subtree(height - 1, index * 2), self._subtree(height - 1, index * 2 + 1))
+
+    def _range(self, start, end):
+        """Merkle tree hash of leaves [start, end); `start` is aligned as in RFC 6962 recursion"""
+        count = end - start
+        if count & (count - 1) == 0:
+            height = count.bit_length() - 1
+            return self._subtree(height, start >> height)
+        split = 1 << (count - 1).bit_length() - 1
+        return node_hash(self._range(start, start + split), self._range(start + split, end))
+
+    def _resolve_size(self, tree_size):
+        with self.lock:
+            current = self.size
+        if tree_size is None:
+            return current
+        if not 0 < tree_size <= current:
+            raise ValueError(f"Tree size must be between 1 and {current}")
+        return tree_size
+
+    def root(self, tree_size=None):
+        """Root hash for the first `tree_size` leaves (default: all of them)"""
+        tree_size = self._resolve_size(tree_size)
+        if tree_size == 0:
+            return hashlib.sha256(b'').digest()
+        return self._range(0, tree_size)
+
+    def proof(self, index, tree_size=None):
+        """Audit path for leaf `index` in the tree of the first `tree_size` leaves"""
+        tree_size = self._resolve_size(tree_size)
+        if not 0 <= index < tree_size:
+            raise ValueError("Leaf index out of range")
+
+        path = []
+        start, end = 0, tree_size
+        while end - start > 1:
+            split = 1 << (end - start - 1).bit_length() - 1
+            if index < start + split:
+                path.append(self._range(start + split, end))
+                end = start + split
+            else:
+                path.append(self._range(start, start + split))
+                start += split
+        path.reverse()
+        return path
+
+    def snapshot(self):
+        """Copy the cached levels out as (name, bytes) sections"""
+        with self.lock:
+            return [("merkle.size", SIZE.pack(self.size))] + [
+                (f"merkle.level.{level}", bytes(nodes)) for level, nodes in enumerate(self.levels)
+            ]
+
+    @classmethod
+    def restore(cls, sections, leaf_data, cache_height=4):
+        """Rebuild a log from snapshot sections"""
+        log = cls(leaf_data, cache_height)
+        log.size = SIZE.unpack(sections["merkle.size"])[0]
+        level = 0
+        while f"merkle.level.{level}" in sections:
+            log.levels.append(bytearray(sections[f"merkle.level.{level}"]))
+            level += 1
+        # Left siblings below the cached levels are cheap to recompute
+        for height in range(cache_height):
+            if (log.size >> height) & 1:
+                log.frontier[height] = log._subtree(height, (log.size >> height) - 1)
+        return log
+
+
+class RootAnchor:
+    """Periodically publish the audit log root through `anchor(root, tree_size)`.
+
+    `get_root` returns the SmartContractInterface.get_audit_root() dict;
+    nothing is sent while the log has not grown since the last anchor.
+    """
+
+    def __init__(self, get_root, anchor, interval=300.0):
+        self.get_root = get_root
+        self.anchor = anchor
+        self.interval = interval
+        self.last = None
+        self.thread = threading.Thread(target=self._run, name="audit-anchor", daemon=True)
+        self.thread.start()
+
+    def anchor_now(self):
+        """Anchor the current root if it changed; return the anchor result or None"""
+        current = self.get_root()
+        if not current["success"] or not current["tree_size"]:
+            return None
+        if self.last is not None and self.last["tree_size"] == current["tree_size"]:
+            return None
+
+        result = self.anchor(current["root"], current["tree_size"])
+        if result["success"]:
+            self.last = {
+                "root": current["root"],
+                "tree_size": current["tree_size"],
+                "ticket": result.get("ticket"),
+                "anchored_at": time.time()
+            }
+            logger.info(f"Anchored audit root {current['root']} for {current['tree_size']} ballots")
+        else:
+            logger.debug(f"Audit root anchoring skipped: {result.get('error')}")
+        return result
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.anchor_now()
+            except Exception as e:
+                logger.error(f"Audit root anchoring error: {str(e)}")
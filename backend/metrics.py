@@ -0,0 +1,316 @@
+import asyncio
+import bisect
+import os
+import sys
+import threading
+import time
+import logging
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cached read (~1ms) to an RPC timing out
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Distinct rejection reasons kept as their own series before folding into "other"
+MAX_REASONS = 100
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """Monotonic count per label combination.
+
+    Updates take no lock: under the GIL a concurrent increment is very
+    rarely lost, which is an acceptable error for monitoring and keeps the
+    hot path to one dict update.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values):
+        return self.values.get(label_values, 0)
+
+    def samples(self):
+        for label_values, value in list(self.values.items()):
+            yield self.name, _labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Bucketed distribution (Prometheus histogram) per label combination; lock-free like Counter"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self.series = {}
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series.setdefault(label_values, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for label_values, series in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(self.labels + ("le",), label_values + (bound,)), cumulative
+            yield f"{self.name}_sum", _labels(self.labels, label_values), series[-1]
+            yield f"{self.name}_count", _labels(self.labels, label_values), cumulative
+
+
+class Gauge:
+    """Value read at scrape time from `read()`: a number, or a dict of label values -> number"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, read, labels=()):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labels = labels
+
+    def samples(self):
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} unavailable: {str(e)}")
+            return
+        if isinstance(value, dict):
+            for label_values, item in value.items():
+                yield self.name, _labels(self.labels, label_values), item
+        elif value is not None:
+            yield self.name, "", value
+
+
+class NullMetric:
+    """Stands in for every metric while metrics are disabled"""
+
+    def inc(self, *label_values, amount=1):
+        pass
+
+    def observe(self, value, *label_values):
+        pass
+
+    def get(self, *label_values):
+        return 0
+
+
+class Registry:
+    """The metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.metrics = {}
+
+    def _register(self, metric):
+        if not self.enabled:
+            return NullMetric()
+        # Re-registering a name replaces it, e.g. gauges of a re-created component
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, read, labels=()):
+        return self._register(Gauge(name, help, read, labels))
+
+    def collect(self):
+        """Every metric as (name, kind, help, samples), picklable for rendering in another process"""
+        return [(metric.name, metric.kind, metric.help, list(metric.samples())) for metric in list(self.metrics.values())]
+
+    def render(self, remote=()):
+        """Render this process's metrics, adding in `remote`, the collect() of another process.
+
+        Web workers pass the shared state server's metrics, so series it
+        alone records (results cache, journal) are exported too; a series
+        both processes record is summed.
+        """
+        families = {}
+        for name, kind, help, samples in self.collect() + list(remote):
+            family = families.get(name)
+            if family is None:
+                family = families[name] = (kind, help, {})
+            merged = family[2]
+            for sample_name, labels, value in samples:
+                merged[(sample_name, labels)] = merged.get((sample_name, labels), 0) + value
+        lines = []
+        for name, (kind, help, merged) in families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (sample_name, labels), value in merged.items():
+                lines.append(f"{sample_name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(enabled=Config.METRICS_ENABLED)
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "ballot_http_request_duration_seconds", "HTTP request latency by route", ("method", "endpoint", "status")
+)
+RPC_LATENCY = REGISTRY.histogram(
+    "ballot_rpc_duration_seconds", "Blockchain JSON-RPC latency by method (batch: prefix for batches)", ("method",)
+)
+REGISTRATIONS = REGISTRY.counter("ballot_registrations_total", "Voters registered")
+VOTES = REGISTRY.counter("ballot_votes_total", "Votes accepted")
+REJECTIONS = REGISTRY.counter(
+    "ballot_rejections_total", "Write requests refused, by operation and reason", ("operation", "reason")
+)
+CACHE_REQUESTS = REGISTRY.counter("ballot_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+
+
+def record_outcome(operation, result):
+    """Count a register/vote result as accepted or rejected by reason"""
+    if not REGISTRY.enabled:
+        return
+    if result["success"]:
+        (REGISTRATIONS if operation == "register" else VOTES).inc()
+        return
+    # Errors can carry exception text; cap the number of series they create
+    reason = result.get("error", "unknown")
+    if (operation, reason) not in REJECTIONS.values and len(REJECTIONS.values) >= MAX_REASONS:
+        reason = "other"
+    REJECTIONS.inc(operation, reason)
+
+
+def instrument_provider(provider):
+    """Time every request a web3 HTTP provider makes, by RPC method"""
+    if not REGISTRY.enabled:
+        return provider
+    make_request = provider.make_request
+
+    if asyncio.iscoroutinefunction(make_request):
+        async def timed_request(method, params):
+            started = time.perf_counter()
+            try:
+                return await make_request(method, params)
+            finally:
+                RPC_LATENCY.observe(time.perf_counter() - started, method)
+    else:
+        def timed_request(method, params):
+            started = time.perf_counter()
+            try:
+                return make_request(method, params)
+            finally:
+                RPC_LATENCY.observe(time.perf_counter() - started, method)
+
+    provider.make_request = timed_request
+    return provider
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler that can be switched on and off at runtime.
+
+    While running, a background thread records every other thread's stack
+    each `interval` seconds. Stacks are aggregated in the collapsed format
+    (`outer;inner count` per line) read by flamegraph.pl and speedscope.
+    Stopped, it costs nothing. The interval is never shorter than
+    `min_interval`, and once `max_stacks` distinct stacks are held any new
+    stack is counted under OTHER_STACK, so memory stays bounded.
+    """
+
+    OTHER_STACK = "[other stacks]"
+
+    def __init__(self, interval=0.01, max_depth=64, min_interval=0.005, max_stacks=10000):
+        self.min_interval = min_interval
+        self.interval = max(interval, min_interval)
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.stacks = {}
+        self.samples = 0
+        self.started_at = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self, interval=None):
+        """Start sampling; return False if already running"""
+        with self.lock:
+            if self.thread is not None:
+                return False
+            if interval:
+                self.interval = max(interval, self.min_interval)
+            self.started_at = time.time()
+            self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self.thread.start()
+        logger.info(f"Sampling profiler started ({self.interval * 1000:.0f} ms interval)")
+        return True
+
+    def stop(self):
+        """Stop sampling, keeping the collected stacks; return False if not running"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is None:
+            return False
+        thread.join()
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+        return True
+
+    def reset(self):
+        with self.lock:
+            self.stacks = {}
+            self.samples = 0
+
+    def _run(self):
+        me = threading.current_thread()
+        own = threading.get_ident()
+        while self.thread is me:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < self.max_depth:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                stack = ";".join(reversed(frames))
+                if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                    stack = self.OTHER_STACK
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def status(self):
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "started_at": self.started_at
+        }
+
+    def collapsed(self):
+        """Collected stacks in collapsed format, most frequent first"""
+        stacks = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
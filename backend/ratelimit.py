@@ -0,0 +1,143 @@
+import math
+import threading
+import time
+
+from locks import StripedLock
+
+class TokenBucketLimiter:
+    """Token bucket per key: `rate` tokens/sec refill up to `burst`.
+
+    Buckets live in per-stripe dicts so unrelated keys rarely contend.
+    A key whose bucket has refilled completely is indistinguishable from
+    an unseen key, so such entries are swept out whenever a stripe grows;
+    the table holds roughly the keys active in the last burst/rate
+    seconds. A rate of 0 disables the limiter.
+
+    A cost above `burst` is let through once the bucket is full and leaves
+    it in debt, so the key then waits until the whole cost has refilled.
+    """
+
+    def __init__(self, rate, burst, stripes=16):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.stripes = StripedLock(stripes)
+        # key -> (tokens, monotonic time of last update), per stripe
+        self.buckets = [{} for _ in range(stripes)]
+        self.sweep_at = [1024] * stripes
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def acquire(self, key, cost=1):
+        """Take `cost` tokens; return 0 if allowed, else the seconds until they will be available"""
+        if not self.enabled:
+            return 0.0
+
+        stripe = self.stripes.stripe(key)
+        now = time.monotonic()
+        with self.stripes.locks[stripe]:
+            buckets = self.buckets[stripe]
+            state = buckets.get(key)
+            tokens = self.burst if state is None else min(self.burst, state[0] + (now - state[1]) * self.rate)
+            needed = min(cost, self.burst)
+            if tokens < needed:
+                return (needed - tokens) / self.rate
+            buckets[key] = (tokens - cost, now)
+            if len(buckets) > self.sweep_at[stripe]:
+                self._sweep(stripe, now)
+        return 0.0
+
+    def _sweep(self, stripe, now):
+        buckets = self.buckets[stripe]
+        full = [key for key, (tokens, updated) in buckets.items() if tokens + (now - updated) * self.rate >= self.burst]
+        for key in full:
+            del buckets[key]
+        # Sweep again once the live set has doubled, keeping sweeps amortized O(1)
+        self.sweep_at[stripe] = max(1024, 2 * len(buckets))
+
+    def __len__(self):
+        return sum(len(buckets) for buckets in self.buckets)
+
+
+class ConcurrencyLimit:
+    """Non-blocking cap on requests in progress; a limit of 0 disables it"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        with self.lock:
+            if self.limit > 0 and self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+
+class AdmissionControl:
+    """Admission for write requests: per-client and per-voter token buckets,
+    then a global limit on writes in progress.
+
+    admit() never waits. It returns None when the request may proceed (the
+    caller must then call release() once it finishes) or a
+    (reason, retry_after_seconds) rejection to turn into a 429, so a flood
+    is shed before it can occupy workers or RPC connections. A request
+    costs its client one token per row, and each row's voter one token.
+
+    Buckets and the concurrency cap live in this process: with several
+    worker processes each enforces the limits on its own, so a client
+    spread across workers gets up to that many times the configured rates.
+    """
+
+    REJECTIONS = {
+        "client": "Too many requests from this client, please retry",
+        "voter": "Too many requests for this voter, please retry",
+        "busy": "Server is busy, please retry"
+    }
+
+    def __init__(self, client_rate, client_burst, voter_rate, voter_burst, max_concurrent, busy_retry_after=1):
+        self.clients = TokenBucketLimiter(client_rate, client_burst)
+        self.voters = TokenBucketLimiter(voter_rate, voter_burst)
+        self.writes = ConcurrencyLimit(max_concurrent)
+        self.busy_retry_after = busy_retry_after
+        self.rejected = {reason: 0 for reason in self.REJECTIONS}
+
+    def admit(self, client, voter_addresses=(), rows=1):
+        wait = self.clients.acquire(client, max(rows, 1))
+        if wait:
+            return self._reject("client", wait)
+        for voter_address in voter_addresses:
+            wait = self.voters.acquire(voter_address)
+            if wait:
+                return self._reject("voter", wait)
+        if not self.writes.try_acquire():
+            return self._reject("busy", self.busy_retry_after)
+        return None
+
+    def release(self):
+        self.writes.release()
+
+    def _reject(self, reason, retry_after):
+        # Unlocked counter: an occasional lost increment is fine for stats
+        self.rejected[reason] += 1
+        return reason, retry_after
+
+    @staticmethod
+    def retry_after_header(seconds):
+        """Retry-After takes whole seconds; never tell a client to retry immediately"""
+        return str(max(1, math.ceil(seconds)))
+
+    def stats(self):
+        return {
+            "active_writes": self.writes.active,
+            "max_concurrent_writes": self.writes.limit,
+            "tracked_clients": len(self.clients),
+            "tracked_voters": len(self.voters),
+            "rejected": dict(self.rejected)
+        }
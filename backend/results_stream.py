@@ -0,0 +1,129 @@
+import json
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ResultsBroadcaster:
+    """Fan out live election results to Server-Sent Events subscribers.
+
+    A single background thread checks each watched election once per
+    interval and, when its results version has moved on, serializes one
+    delta message (the new counts of the candidates that changed) that is
+    shared by every subscriber. Bursts of votes are therefore coalesced
+    into at most one message per interval.
+    """
+
+    def __init__(self, smart_contract, interval=1.0, heartbeat=15.0, max_backlog=100):
+        self.smart_contract = smart_contract
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.max_backlog = max_backlog
+        self.subscribers = {}
+        self.last_results = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self, election_id):
+        """Register a new subscriber queue for an election"""
+        subscriber = queue.Queue(maxsize=self.max_backlog)
+        with self.lock:
+            self.subscribers.setdefault(election_id, set()).add(subscriber)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="results-broadcaster", daemon=True)
+                self.thread.start()
+        return subscriber
+
+    def unsubscribe(self, election_id, subscriber):
+        """Remove a subscriber queue"""
+        with self.lock:
+            subscribers = self.subscribers.get(election_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[election_id]
+                    self.last_results.pop(election_id, None)
+
+    def is_subscribed(self, election_id, subscriber):
+        """Check whether a subscriber is still receiving updates"""
+        with self.lock:
+            return subscriber in self.subscribers.get(election_id, ())
+
+    def stream(self, election_id, subscriber):
+        """Yield SSE messages for one subscriber, starting with a full snapshot"""
+        try:
+            results = self.smart_contract.get_election_results(election_id)
+            yield self._format("snapshot", results["version"], {
+                "version": results["version"],
+                "total_votes": results["total_votes"],
+                "results": results["results"]
+            })
+
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    if not self.is_subscribed(election_id, subscriber):
+                        # Dropped for falling behind; the client reconnects and resyncs
+                        return
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(election_id, subscriber)
+
+    def _run(self):
+        """Publish coalesced result deltas once per interval"""
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                election_ids = list(self.subscribers)
+
+            for election_id in election_ids:
+                try:
+                    self._publish(election_id)
+                except Exception as e:
+                    logger.error(f"Results broadcast error: {str(e)}")
+
+    def _publish(self, election_id):
+        """Send one delta message for an election if its results changed"""
+        results = self.smart_contract.get_election_results(election_id)
+        if not results["success"]:
+            return
+
+        previous = self.last_results.get(election_id)
+        if previous is not None and previous["version"] == results["version"]:
+            return
+
+        current = dict(results["results"])
+        if previous is None:
+            delta = current
+        else:
+            # Changed candidates carry their new absolute count, so applying
+            # a delta on top of any earlier snapshot is idempotent
+            delta = {
+                candidate: count
+                for candidate, count in current.items()
+                if count != previous["results"].get(candidate, 0)
+            }
+        self.last_results[election_id] = {"version": results["version"], "results": current}
+
+        message = self._format("delta", results["version"], {
+            "version": results["version"],
+            "total_votes": results["total_votes"],
+            "delta": delta
+        })
+
+        with self.lock:
+            subscribers = list(self.subscribers.get(election_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                logger.warning(f"Dropping slow results subscriber for election {election_id}")
+                self.unsubscribe(election_id, subscriber)
+
+    @staticmethod
+    def _format(event, version, data):
+        """Serialize one SSE message"""
+        return f"event: {event}\nid: {version}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,121 @@
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the node could not be reached or did not answer; anything
+# else (bad input, an error reply from the node) says nothing about its health
+TRANSPORT_ERRORS = (OSError, requests.exceptions.RequestException)
+
+def create_session(pool_size):
+    """Create a keep-alive HTTP session with a connection pool for RPC calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class CircuitBreaker:
+    """Fail fast while the node is down.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    allow() returns False for `reset_timeout` seconds. It then lets a single
+    trial call through (half-open); success closes it again, failure
+    reopens it.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """Check whether a call may be attempted now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_unrelated(self):
+        """End a call that failed for a reason other than the node; a half-open trial is let through again"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Blockchain circuit breaker opened")
+                self.opened_at = time.monotonic()
+
+
+class ChainStatusCache:
+    """Connection status and latest block, refreshed by a background poller.
+
+    Readers get the last observed status immediately and never wait on the
+    node. `fetch` returns the latest block number or raises.
+    """
+
+    def __init__(self, fetch, breaker, interval=2.0):
+        self.fetch = fetch
+        self.breaker = breaker
+        self.interval = interval
+        self.status = {"connected": False, "latest_block": 0, "checked_at": None}
+        self.thread = threading.Thread(target=self._run, name="chain-status", daemon=True)
+        self.thread.start()
+
+    def get(self):
+        """Return the latest cached status"""
+        return self.status
+
+    def refresh(self):
+        """Poll the node once, respecting the circuit breaker"""
+        if not self.breaker.allow():
+            self.status = dict(self.status, connected=False)
+            return self.status
+
+        try:
+            block_number = self.fetch()
+            self.breaker.record_success()
+            status = {"connected": True, "latest_block": block_number, "checked_at": time.time()}
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.debug(f"Chain status poll failed: {str(e)}")
+            status = {"connected": False, "latest_block": self.status["latest_block"], "checked_at": time.time()}
+
+        # Swap the whole dict so readers always see a consistent status
+        self.status = status
+        return status
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
@@ -1,121 +1,496 @@
 import hashlib
 import json
-from datetime import datetime
+import re
+import struct
+import time
+import threading
 import logging
 
+from storage import VoterStore, BallotStore
+from journal import (
+    JournalError, RECORD_REGISTER, RECORD_VOTE, RECORD_ELECTION, RECORD_ELECTION_STATUS, RECORD_ELIGIBILITY,
+    encode_register, encode_vote, encode_election, encode_election_status, encode_eligibility
+)
+from locks import StripedLock
+from elections import Election, STATUS_CREATED, STATUS_OPEN, STATUS_CLOSED
+from timeline import BUCKET_SECONDS, bucket_of
+from merkle import MerkleLog, leaf_hash
+from metrics import REGISTRY, CACHE_REQUESTS
+
 logger = logging.getLogger(__name__)
 
+# Audit log leaf: ballot id, election id, candidate index, timestamp, then the voter address
+BALLOT_RECORD = struct.Struct('<QIHI')
+
+VOTING_CLOSED_ERRORS = {
+    "scheduled": "Election has not started",
+    "ended": "Election has ended",
+    STATUS_CLOSED: "Election is closed"
+}
+
+# An account address: 20 bytes of hex, in any case (voters are keyed by its lowercase form)
+ADDRESS_PATTERN = re.compile(r'0x[0-9a-fA-F]{40}')
+INVALID_ADDRESS = "Invalid voter address"
+
+# Voters registered per hold of every stripe by register_hashed_voters
+IMPORT_BATCH = 1000
+# Most points one turnout timeline query may return
+MAX_TIMELINE_POINTS = 10000
+
+def normalize_address(voter_address):
+    """The lowercase form of an account address, or None if it is not one"""
+    if isinstance(voter_address, str) and ADDRESS_PATTERN.fullmatch(voter_address):
+        return voter_address.lower()
+    return None
+
 class SmartContractInterface:
-    def __init__(self, blockchain_handler):
+    def __init__(self, blockchain_handler, journal=None, lock_stripes=64, timeline_interval=1.0):
         self.blockchain = blockchain_handler
+        # Optional VoteJournal; when set, every change is journaled before it is acknowledged
+        self.journal = journal
+        self.snapshot_lock = threading.Lock()
+        # Per-voter check-then-act sections lock the stripes of the voter's
+        # address (and NID hash on registration) rather than a global lock
+        self.stripes = StripedLock(lock_stripes)
+        # election_id -> Election; creation and status changes take elections_lock
         self.elections = {}
-        self.voters = {}
-        self.votes = {}
+        self.elections_lock = threading.Lock()
+        self.next_election_id = 1
+        # Seconds between rebuilds of each election's per-minute timeline snapshot
+        self.timeline_interval = timeline_interval
+        # Columnar voter roll with NID-hash uniqueness indexes
+        self.voters = VoterStore()
+        # Append-only ballot audit log
+        self.votes = BallotStore()
+        # Merkle tree over the ballot log for inclusion proofs
+        self.audit_log = MerkleLog(self._ballot_record)
+        # election_id -> (version, serialized results)
+        self.results_cache = {}
         
         # Initialize demo election
         self.create_demo_election()
+        
+        if self.journal:
+            self.recover()
+            REGISTRY.gauge(
+                "ballot_journal_unsynced_records", "Journal records appended but not yet fsynced",
+                lambda: self.journal.appended_seq - self.journal.durable_seq
+            )
     
     def create_demo_election(self):
         """Create a demo election for testing"""
-        self.elections[1] = {
-            "id": 1,
-            "name": "Bangladesh General Election 2025",
-            "candidates": [
-                "National Citizen Party",
-                "Bangladesh Nationalist Party",
-                "Bangladesh Jamate Islam",
-                "Jatiya Party",
-                "Independent Candidates"
-            ],
-            "active": True,
-            "start_time": datetime.now(),
-            "votes": {
-                "National Citizen Party": 0,
-                "Bangladesh Nationalist Party": 0,
-                "Bangladesh Jamate Islam":0,
-                "Jatiya Party": 0,
-                "Independent Candidates": 0
-            }
-        }
+        candidates = [
+            "National Citizen Party",
+            "Bangladesh Nationalist Party",
+            "Bangladesh Jamate Islam",
+            "Jatiya Party",
+            "Independent Candidates"
+        ]
+        election = self._add_election(1, "Bangladesh General Election 2025", candidates)
+        election.status = STATUS_OPEN
+    
+    def _add_election(self, election_id, name, candidates, start_time=None, end_time=None):
+        election = Election(
+            election_id, name, candidates, start_time, end_time,
+            shards=len(self.stripes.locks), timeline_interval=self.timeline_interval, locks=self.stripes.locks
+        )
+        self.elections[election_id] = election
+        self.next_election_id = max(self.next_election_id, election_id + 1)
+        return election
+    
+    def create_election(self, name, candidates, start_time=None, end_time=None):
+        """Create an election; it accepts votes once opened and inside its time window"""
+        try:
+            if not name or not candidates:
+                return {"success": False, "error": "Election name and candidates are required"}
+            if not isinstance(name, str) or not name.strip():
+                return {"success": False, "error": "Election name must be a non-empty string"}
+            if not all(isinstance(candidate, str) and candidate for candidate in candidates):
+                return {"success": False, "error": "Candidate names must be non-empty strings"}
+            if len(set(candidates)) != len(candidates):
+                return {"success": False, "error": "Candidate names must be unique"}
+            if len(candidates) > 65535:
+                return {"success": False, "error": "Too many candidates"}
+            if start_time is not None and end_time is not None and end_time <= start_time:
+                return {"success": False, "error": "Election must end after it starts"}
+            
+            with self.elections_lock:
+                election_id = self.next_election_id
+                election = self._add_election(election_id, name, candidates, start_time, end_time)
+                self._journal(encode_election(election_id, name, election.candidates, start_time, end_time))
+            self._sync()
+            logger.info(f"Election {election_id} created: {name}")
+            return {"success": True, "election_id": election_id, "election": election.describe()}
+            
+        except JournalError:
+            raise
+        except Exception as e:
+            logger.error(f"Election creation error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def open_election(self, election_id):
+        """Start accepting votes (within the election's time window)"""
+        with self.elections_lock:
+            election = self.elections.get(election_id)
+            if election is None:
+                return {"success": False, "error": "Election not found"}
+            if election.status != STATUS_CREATED:
+                return {"success": False, "error": f"Election is already {election.status}"}
+            election.status = STATUS_OPEN
+            self._journal(encode_election_status(election_id, STATUS_OPEN))
+        self._sync()
+        logger.info(f"Election {election_id} opened")
+        return {"success": True, "election": election.describe()}
+    
+    def close_election(self, election_id):
+        """Stop accepting votes and freeze the final results"""
+        with self.elections_lock:
+            election = self.elections.get(election_id)
+            if election is None:
+                return {"success": False, "error": "Election not found"}
+            if election.status == STATUS_CLOSED:
+                return {"success": False, "error": "Election is already closed"}
+            # Votes re-check the status under their stripe, so once every
+            # stripe has been held no vote can land after the freeze
+            with self.stripes.hold_all():
+                election.finalize()
+                self._journal(encode_election_status(election_id, STATUS_CLOSED))
+            self.results_cache.pop(election_id, None)
+        self._sync()
+        logger.info(f"Election {election_id} closed with {election.final[0]['total_votes']} votes")
+        return {"success": True, "election": election.describe(), "results": election.final[0]}
+    
+    def get_election(self, election_id):
+        """Get an election's definition and state"""
+        election = self.elections.get(election_id)
+        if election is None:
+            return {"success": False, "error": "Election not found"}
+        return {"success": True, "election": election.describe()}
+    
+    def list_elections(self):
+        """List every election"""
+        return {"success": True, "elections": [election.describe() for election in list(self.elections.values())]}
+    
+    def grant_eligibility(self, voter_address, election_id):
+        """Make a registered voter eligible for another election"""
+        return self.grant_eligibilities([voter_address], election_id)[0]
+    
+    def grant_eligibilities(self, voter_addresses, election_id):
+        """Make registered voters eligible for another election, returning one result per address.
+
+        The grants are journaled together and waited on once.
+        """
+        election = self.elections.get(election_id)
+        if election is None:
+            return [{"success": False, "error": "Election not found"} for _ in voter_addresses]
+        if election.status == STATUS_CLOSED:
+            return [{"success": False, "error": "Election is closed"} for _ in voter_addresses]
+        
+        results = [self._grant_eligibility(voter_address, election) for voter_address in voter_addresses]
+        self._sync()
+        return results
+    
+    def _grant_eligibility(self, voter_address, election):
+        voter_address = normalize_address(voter_address)
+        if voter_address is None:
+            return {"success": False, "error": INVALID_ADDRESS}
+        
+        with self.stripes.hold(voter_address):
+            slot = self.voters.slot_of(voter_address)
+            if slot is None:
+                return {"success": False, "error": "Voter not registered"}
+            if election.eligible.get(slot):
+                return {"success": False, "error": "Voter already eligible"}
+            election.eligible.set(slot)
+            self._journal(encode_eligibility(voter_address, election.id))
+        return {"success": True, "message": "Voter is now eligible"}
     
     def hash_nid(self, nid):
         """Hash NID for privacy"""
-        return hashlib.sha256(nid.encode()).hexdigest()
+        return hashlib.sha256(nid.encode()).digest()
     
     def register_voter(self, voter_address, nid, election_id=1):
         """Register a voter"""
         try:
-            # Check if voter already registered
-            if voter_address in self.voters:
-                return {"success": False, "error": "Voter already registered"}
-            
-            # Check if NID already used
-            nid_hash = self.hash_nid(nid)
-            for voter_data in self.voters.values():
-                if voter_data.get("nid_hash") == nid_hash:
-                    return {"success": False, "error": "NID already used"}
-            
-            # Register voter
-            self.voters[voter_address] = {
-                "nid_hash": nid_hash,
-                "election_id": election_id,
-                "registered": True,
-                "voted": False,
-                "registration_time": datetime.now()
-            }
-            
-            logger.info(f"Voter {voter_address} registered successfully")
-            return {"success": True, "message": "Voter registered successfully"}
+            if not isinstance(nid, str):
+                return {"success": False, "error": "NID must be a string"}
+            voter_address = normalize_address(voter_address)
+            if voter_address is None:
+                return {"success": False, "error": INVALID_ADDRESS}
+            result = self._register_hashed(voter_address, self.hash_nid(nid), election_id)
+            if result["success"]:
+                self._sync()
+                logger.info(f"Voter {voter_address} registered successfully")
+            return result
             
+        except JournalError:
+            raise
         except Exception as e:
             logger.error(f"Registration error: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    def register_voters(self, records):
+        """Register a batch of voters, returning one result per record"""
+        results = []
+        for record in records:
+            nid = record.get("nid")
+            if not record.get("voter_address") or not nid:
+                results.append({"success": False, "error": "Voter address and NID are required"})
+                continue
+            if not isinstance(nid, str):
+                results.append({"success": False, "error": "NID must be a string"})
+                continue
+            voter_address = normalize_address(record["voter_address"])
+            if voter_address is None:
+                results.append({"success": False, "error": INVALID_ADDRESS})
+                continue
+            try:
+                results.append(self._register_hashed(voter_address, self.hash_nid(nid), record.get("election_id", 1)))
+            except JournalError:
+                raise
+            except Exception as e:
+                logger.error(f"Registration error: {str(e)}")
+                results.append({"success": False, "error": str(e)})
+        
+        self._sync()
+        registered = sum(1 for result in results if result["success"])
+        logger.info(f"Batch registration: {registered}/{len(records)} voters registered")
+        return results
+    
+    def register_hashed_voters(self, records):
+        """Register (voter_address, nid_hash, election_id) records in bulk; return counts by outcome"""
+        imported = 0
+        rejected = {}
+        for start in range(0, len(records), IMPORT_BATCH):
+            # One hold_all per batch instead of two stripe acquisitions per
+            # voter; other writers wait for at most one batch
+            with self.stripes.hold_all():
+                for voter_address, nid_hash, election_id in records[start:start + IMPORT_BATCH]:
+                    voter_address = normalize_address(voter_address)
+                    if voter_address is None:
+                        result = {"success": False, "error": INVALID_ADDRESS}
+                    else:
+                        result = self._add_voter(voter_address, nid_hash, election_id)
+                    if result["success"]:
+                        imported += 1
+                    else:
+                        rejected[result["error"]] = rejected.get(result["error"], 0) + 1
+        
+        self._sync()
+        return {"success": True, "imported": imported, "rejected": rejected}
+    
+    def _register_hashed(self, voter_address, nid_hash, election_id):
+        """Register a voter whose NID has already been hashed"""
+        with self.stripes.hold(voter_address, nid_hash):
+            return self._add_voter(voter_address, nid_hash, election_id)
+    
+    def _add_voter(self, voter_address, nid_hash, election_id):
+        """Check and record a registration; the caller holds the address's and NID hash's stripes"""
+        election = self.elections.get(election_id)
+        if election is None:
+            return {"success": False, "error": "Election not found"}
+        if election.status == STATUS_CLOSED:
+            return {"success": False, "error": "Election is closed"}
+        
+        # Check if voter already registered
+        if voter_address in self.voters:
+            return {"success": False, "error": "Voter already registered"}
+        
+        # Check if NID already used
+        if self.voters.has_nid(nid_hash):
+            return {"success": False, "error": "NID already used"}
+        
+        # Register voter
+        now = int(time.time())
+        slot = self.voters.add(voter_address, nid_hash, election_id, now)
+        election.eligible.set(slot)
+        self._journal(encode_register(voter_address, nid_hash, election_id, now))
+        return {"success": True, "message": "Voter registered successfully"}
+    
     def cast_vote(self, voter_address, election_id, candidate):
         """Cast a vote"""
         try:
-            # Check if voter is registered
-            if voter_address not in self.voters:
+            result = self._cast_vote(voter_address, election_id, candidate)
+            if result["success"]:
+                self._sync()
+                logger.info(f"Vote cast by {voter_address} for {candidate}")
+            return result
+            
+        except JournalError:
+            raise
+        except Exception as e:
+            logger.error(f"Voting error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def cast_votes(self, records):
+        """Cast a batch of votes, returning one result per record"""
+        results = []
+        for record in records:
+            voter_address = record.get("voter_address")
+            candidate = record.get("candidate_name")
+            if not voter_address or not candidate:
+                results.append({"success": False, "error": "Voter address and candidate name are required"})
+                continue
+            try:
+                results.append(self._cast_vote(voter_address, record.get("election_id", 1), candidate))
+            except JournalError:
+                raise
+            except Exception as e:
+                logger.error(f"Voting error: {str(e)}")
+                results.append({"success": False, "error": str(e)})
+        
+        self._sync()
+        cast = sum(1 for result in results if result["success"])
+        logger.info(f"Batch voting: {cast}/{len(records)} votes cast")
+        return results
+    
+    def _cast_vote(self, voter_address, election_id, candidate):
+        """Validate and record a single vote"""
+        voter_address = normalize_address(voter_address)
+        if voter_address is None:
+            return {"success": False, "error": INVALID_ADDRESS}
+        
+        # Check election exists and is active
+        election = self.elections.get(election_id)
+        if election is None:
+            return {"success": False, "error": "Election not found"}
+        
+        if election.status != STATUS_OPEN:
+            return {"success": False, "error": "Election not active"}
+        
+        # Check candidate exists
+        candidate_index = election.candidate_index.get(candidate)
+        if candidate_index is None:
+            return {"success": False, "error": "Invalid candidate"}
+        
+        with self.stripes.hold(voter_address):
+            # Check if voter is registered and eligible
+            slot = self.voters.slot_of(voter_address)
+            if slot is None:
                 return {"success": False, "error": "Voter not registered"}
+            if not election.eligible.get(slot):
+                return {"success": False, "error": "Voter not eligible for this election"}
             
-            voter = self.voters[voter_address]
+            # Re-check under the stripe: close_election holds every stripe
+            now = int(time.time())
+            state = election.window_state(now)
+            if state != STATUS_OPEN:
+                return {"success": False, "error": VOTING_CLOSED_ERRORS.get(state, "Election not active")}
             
             # Check if already voted
-            if voter["voted"]:
+            if election.voted.get(slot):
                 return {"success": False, "error": "Already voted"}
             
-            # Check election exists and is active
-            if election_id not in self.elections:
-                return {"success": False, "error": "Election not found"}
-            
-            election = self.elections[election_id]
-            if not election["active"]:
-                return {"success": False, "error": "Election not active"}
-            
-            # Check candidate exists
-            if candidate not in election["candidates"]:
-                return {"success": False, "error": "Invalid candidate"}
-            
             # Cast vote
-            election["votes"][candidate] += 1
-            voter["voted"] = True
-            voter["vote_time"] = datetime.now()
-            
-            # Store vote record (for audit)
-            vote_id = f"{voter_address}_{election_id}_{datetime.now().timestamp()}"
-            self.votes[vote_id] = {
-                "voter_address": voter_address,
-                "election_id": election_id,
-                "candidate": candidate,
-                "timestamp": datetime.now()
-            }
-            
-            logger.info(f"Vote cast by {voter_address} for {candidate}")
-            return {"success": True, "message": "Vote cast successfully"}
-            
-        except Exception as e:
-            logger.error(f"Voting error: {str(e)}")
-            return {"success": False, "error": str(e)}
+            ballot_id = self._apply_vote(slot, election, candidate_index, now, self.stripes.stripe(voter_address))
+            self._journal(encode_vote(voter_address, election_id, candidate_index, now))
+        
+        return {"success": True, "message": "Vote cast successfully", "ballot_id": ballot_id}
+    
+    def _apply_vote(self, slot, election, candidate_index, timestamp, shard):
+        """Count a validated vote and append its audit record; `shard` is the voter's held stripe"""
+        election.tally.add(shard, candidate_index)
+        election.timeline.add(shard, timestamp, candidate_index)
+        election.voted.set(slot)
+        self.voters.mark_voted(slot, timestamp)
+        
+        # Store vote record (for audit)
+        ballot_id = self.votes.append(slot, election.id, candidate_index, timestamp)
+        self.audit_log.add(ballot_id, self._ballot_record(ballot_id))
+        return ballot_id
+    
+    def _ballot_record(self, ballot_id):
+        """Serialize a ballot as its audit log leaf"""
+        slot, election_id, candidate_index, timestamp = self.votes.get(ballot_id)
+        return BALLOT_RECORD.pack(ballot_id, election_id, candidate_index, timestamp) + self.voters.addresses[slot].encode()
+    
+    def _journal(self, record):
+        """Append a record to the journal, if there is one"""
+        if self.journal:
+            self.journal.append(record)
+    
+    def _sync(self):
+        """Wait until everything journaled so far is durable, snapshotting when one is due"""
+        if not self.journal:
+            return
+        self.journal.wait_durable()
+        if self.journal.should_snapshot() and self.snapshot_lock.acquire(blocking=False):
+            try:
+                if self.journal.should_snapshot():
+                    self.snapshot()
+            finally:
+                self.snapshot_lock.release()
+    
+    def snapshot(self, background=True):
+        """Rotate the journal and write a snapshot of the current state"""
+        # Holding every stripe pauses writers so the rotation point and the
+        # captured columns agree; only the copy happens under the stripes
+        with self.stripes.hold_all():
+            segment = self.journal.rotate()
+            meta = {"next_election_id": self.next_election_id, "elections": {}}
+            sections = self.voters.snapshot() + self.votes.snapshot() + self.audit_log.snapshot()
+            for election_id, election in list(self.elections.items()):
+                meta["elections"][str(election_id)] = election.meta()
+                sections += election.snapshot()
+        sections.append(("meta", json.dumps(meta).encode()))
+        self.journal.write_snapshot(segment, sections, background=background)
+    
+    def recover(self):
+        """Load the latest snapshot and replay the journal written after it"""
+        start = time.perf_counter()
+        segment, sections = self.journal.load_snapshot()
+        if sections is not None:
+            self.voters = VoterStore.restore(sections)
+            self.votes = BallotStore.restore(sections)
+            self.audit_log = MerkleLog.restore(sections, self._ballot_record)
+            meta = json.loads(bytes(sections["meta"]).decode())
+            for election_id, state in meta["elections"].items():
+                election_id = int(election_id)
+                self.elections[election_id] = Election.restore(
+                    election_id, state, sections,
+                    shards=len(self.stripes.locks), timeline_interval=self.timeline_interval, locks=self.stripes.locks
+                )
+            self.next_election_id = max(self.next_election_id, meta["next_election_id"])
+            sections = None
+        
+        replayed = 0
+        for record in self.journal.replay(segment):
+            if record[0] == RECORD_REGISTER:
+                _, voter_address, nid_hash, election_id, timestamp = record
+                slot = self.voters.add(voter_address, nid_hash, election_id, timestamp)
+                self.elections[election_id].eligible.set(slot)
+            elif record[0] == RECORD_ELECTION:
+                _, election_id, definition = record
+                self._add_election(
+                    election_id, definition["name"], definition["candidates"],
+                    definition["start_time"], definition["end_time"]
+                )
+            elif record[0] == RECORD_ELECTION_STATUS:
+                _, election_id, status = record
+                if status == STATUS_CLOSED:
+                    self.elections[election_id].finalize()
+                else:
+                    self.elections[election_id].status = status
+            elif record[0] == RECORD_ELIGIBILITY:
+                _, voter_address, election_id = record
+                self.elections[election_id].eligible.set(self.voters.slot_of(voter_address))
+            elif record[0] == RECORD_VOTE:
+                _, voter_address, election_id, candidate_index, timestamp = record
+                self._apply_vote(
+                    self.voters.slot_of(voter_address), self.elections[election_id], candidate_index, timestamp,
+                    self.stripes.stripe(voter_address)
+                )
+            replayed += 1
+        
+        logger.info(
+            f"Recovered {len(self.voters)} voters and {len(self.votes)} ballots "
+            f"({replayed} journal records replayed) in {time.perf_counter() - start:.2f}s"
+        )
+    
+    def _finalize_if_ended(self, election):
+        """Close an election whose end time has passed, so its results freeze"""
+        if election.final is None and election.window_state() == "ended":
+            self.close_election(election.id)
     
     def get_election_results(self, election_id=1):
         """Get election results"""
@@ -124,33 +499,186 @@ class SmartContractInterface:
                 return {"success": False, "error": "Election not found"}
             
             election = self.elections[election_id]
-            return {
-                "success": True,
-                "results": election["votes"],
-                "total_votes": sum(election["votes"].values())
-            }
+            self._finalize_if_ended(election)
+            # One merged view, so counts, total and version always agree
+            return election.results()
             
         except Exception as e:
             logger.error(f"Error getting results: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def get_voter_status(self, voter_address):
-        """Get voter status"""
+    def get_election_results_json(self, election_id=1):
+        """Get (version, serialized results), or None if the election does not exist"""
+        election = self.elections.get(election_id)
+        if election is None:
+            return None
+        
+        self._finalize_if_ended(election)
+        if election.final is not None:
+            CACHE_REQUESTS.inc("results", "hit")
+            return election.final[0]["version"], election.final[1]
+        
+        cached = self.results_cache.get(election_id)
+        if cached is not None and cached[0] == election.tally.counts()[0]:
+            CACHE_REQUESTS.inc("results", "hit")
+            return cached
+        
+        CACHE_REQUESTS.inc("results", "miss")
+        
+        results = self.get_election_results(election_id)
+        cached = (results["version"], json.dumps(results))
+        self.results_cache[election_id] = cached
+        return cached
+    
+    def get_voter_status(self, voter_address, election_id=None):
+        """Get voter status for an election (default: the one the voter registered for)"""
         try:
-            if voter_address not in self.voters:
+            voter_address = normalize_address(voter_address)
+            if voter_address is None:
+                return {"success": False, "error": INVALID_ADDRESS}
+            slot = self.voters.slot_of(voter_address)
+            if slot is None:
                 return {
                     "success": True,
                     "registered": False,
                     "voted": False
                 }
             
-            voter = self.voters[voter_address]
+            if election_id is None:
+                election_id = self.voters.election_ids[slot]
+            election = self.elections.get(election_id)
+            if election is None:
+                return {"success": False, "error": "Election not found"}
+            
             return {
                 "success": True,
-                "registered": voter["registered"],
-                "voted": voter["voted"]
+                "registered": self.voters.registered.get(slot),
+                "election_id": election_id,
+                "eligible": election.eligible.get(slot),
+                "voted": election.voted.get(slot)
             }
             
         except Exception as e:
             logger.error(f"Error getting voter status: {str(e)}")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+    
+    def get_audit_root(self):
+        """Get the current root of the ballot audit log"""
+        tree_size = len(self.audit_log)
+        return {
+            "success": True,
+            "root": self.audit_log.root(tree_size).hex() if tree_size else None,
+            "tree_size": tree_size
+        }
+    
+    def get_ballot_proof(self, ballot_id):
+        """Get a ballot, its audit log leaf and its inclusion proof against the current root"""
+        try:
+            tree_size = len(self.audit_log)
+            if not 0 <= ballot_id < tree_size:
+                return {"success": False, "error": "Ballot not found"}
+            
+            slot, election_id, candidate_index, timestamp = self.votes.get(ballot_id)
+            record = self._ballot_record(ballot_id)
+            return {
+                "success": True,
+                "ballot_id": ballot_id,
+                "ballot": {
+                    "voter_address": self.voters.addresses[slot],
+                    "election_id": election_id,
+                    "candidate": self.elections[election_id].candidates[candidate_index],
+                    "candidate_index": candidate_index,
+                    "timestamp": timestamp
+                },
+                "record": record.hex(),
+                "leaf": leaf_hash(record).hex(),
+                "tree_size": tree_size,
+                "proof": [node.hex() for node in self.audit_log.proof(ballot_id, tree_size)],
+                "root": self.audit_log.root(tree_size).hex()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting ballot proof: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def get_election_results_at(self, election_id, at):
+        """Get results as of epoch time `at`, to the minute, from the election's timeline snapshot"""
+        election = self.elections.get(election_id)
+        if election is None:
+            return {"success": False, "error": "Election not found"}
+        
+        snapshot = election.timeline.snapshot()
+        counts = snapshot.totals_at(at)
+        return {
+            "success": True,
+            "results": dict(zip(election.candidates, counts)),
+            "total_votes": sum(counts),
+            "at": at,
+            "version": snapshot.version,
+            "as_of": int(snapshot.built_at)
+        }
+    
+    def get_turnout_timeline(self, election_id, start=None, end=None, step=BUCKET_SECONDS):
+        """Get votes, turnout and running results every `step` seconds from the election's timeline snapshot"""
+        election = self.elections.get(election_id)
+        if election is None:
+            return {"success": False, "error": "Election not found"}
+        if step <= 0 or step % BUCKET_SECONDS:
+            return {"success": False, "error": f"Step must be a positive multiple of {BUCKET_SECONDS} seconds"}
+        
+        snapshot = election.timeline.snapshot()
+        # Default to the span that has votes
+        first, last = snapshot.span()
+        if start is None:
+            start = first
+        if end is None:
+            end = last
+        series = []
+        if start is not None and end is not None:
+            start = bucket_of(start)
+            if end < start:
+                return {"success": False, "error": "End must not be before start"}
+            if (end - start) // step + 1 > MAX_TIMELINE_POINTS:
+                return {"success": False, "error": f"At most {MAX_TIMELINE_POINTS} points, use a larger step"}
+            for bucket, votes, totals in snapshot.series(start, end, step):
+                total = sum(totals)
+                series.append({
+                    "time": bucket,
+                    "votes": votes,
+                    "total_votes": total,
+                    "turnout": round(total / snapshot.eligible, 6) if snapshot.eligible else None,
+                    "results": dict(zip(election.candidates, totals))
+                })
+        
+        return {
+            "success": True,
+            "election_id": election_id,
+            "step": step,
+            "eligible": snapshot.eligible,
+            "version": snapshot.version,
+            "as_of": int(snapshot.built_at),
+            "series": series
+        }
+    
+    def collect_metrics(self):
+        """Metrics recorded in the process holding the state, for web workers of a shared state server"""
+        return REGISTRY.collect()
+    
+    def export_voters_page(self, offset, limit):
+        """Get the voters in slots offset..offset+limit as dicts, in registration order"""
+        end = min(len(self.voters), offset + limit)
+        return [self.voters.get(slot) for slot in range(offset, end)]
+    
+    def export_votes_page(self, offset, limit):
+        """Get ballots offset..offset+limit of the audit log as dicts"""
+        rows = []
+        for ballot_id in range(offset, min(len(self.votes), offset + limit)):
+            slot, election_id, candidate_index, timestamp = self.votes.get(ballot_id)
+            rows.append({
+                "ballot_id": ballot_id,
+                "voter_address": self.voters.addresses[slot],
+                "election_id": election_id,
+                "candidate": self.elections[election_id].candidates[candidate_index],
+                "timestamp": timestamp
+            })
+        return rows
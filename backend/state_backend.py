@@ -0,0 +1,121 @@
+import os
+import sys
+import ipaddress
+import logging
+from multiprocessing.managers import BaseManager
+
+from config import Config, DEV_SECRET_KEY
+from journal import VoteJournal
+from smart_contract import SmartContractInterface
+
+logger = logging.getLogger(__name__)
+
+class StateManager(BaseManager):
+    """Manager that shares one SmartContractInterface between processes"""
+
+
+def parse_address(address):
+    """Turn 'host:port' into a TCP address; anything else is a Unix socket path"""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return (host, int(port))
+    return address
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+def check_access(address, authkey):
+    """Refuse to run the state server or a client without a real authkey.
+
+    Connections exchange pickles, so anyone holding the authkey can run
+    code in the server; an unset key or the development SECRET_KEY would
+    hand that to anyone who can reach the address. TCP addresses off the
+    loopback interface must also be allowed explicitly.
+    """
+    if not authkey or authkey == DEV_SECRET_KEY:
+        raise ValueError("STATE_AUTHKEY must be set to a secret of its own to use the shared state server")
+    if isinstance(address, tuple) and not is_loopback(address[0]) and not Config.STATE_ALLOW_REMOTE:
+        raise ValueError(
+            f"State server address {address[0]}:{address[1]} is not on the loopback interface; "
+            "set STATE_ALLOW_REMOTE=true to use it"
+        )
+    return authkey.encode()
+
+
+def create_journal():
+    """Create the vote journal configured for this process, if any"""
+    if not Config.JOURNAL_DIR:
+        return None
+    return VoteJournal(
+        Config.JOURNAL_DIR,
+        commit_interval=Config.JOURNAL_COMMIT_INTERVAL,
+        snapshot_every=Config.SNAPSHOT_EVERY,
+        sync_timeout=Config.JOURNAL_SYNC_TIMEOUT
+    )
+
+
+def create_state_backend(blockchain_handler):
+    """Create the SmartContractInterface used by a web worker.
+
+    With STATE_BACKEND=memory (the default) state lives in this process.
+    With STATE_BACKEND=shared the worker gets a proxy to the state server
+    started by `python state_backend.py`, so every gunicorn worker and host
+    pointing at the same address sees one voter roll and one tally. The
+    server applies calls on its own threads against the thread-safe
+    SmartContractInterface, which makes vote counting and voter
+    deduplication atomic across workers.
+    """
+    if Config.STATE_BACKEND == 'memory':
+        return SmartContractInterface(
+            blockchain_handler, journal=create_journal(), timeline_interval=Config.TIMELINE_REFRESH_INTERVAL
+        )
+    if Config.STATE_BACKEND == 'shared':
+        return connect_state_server(Config.STATE_ADDRESS)
+    raise ValueError(f"Unknown state backend: {Config.STATE_BACKEND}")
+
+
+def connect_state_server(address, authkey=None):
+    """Connect to a running state server and return a SmartContractInterface proxy"""
+    address = parse_address(address)
+    StateManager.register('get_contract')
+    manager = StateManager(address, authkey=check_access(address, authkey or Config.STATE_AUTHKEY))
+    manager.connect()
+    logger.info(f"Connected to shared state server at {address}")
+    return manager.get_contract()
+
+
+def serve_state(address, authkey=None, journal=None):
+    """Run a state server in this process until interrupted"""
+    address = parse_address(address)
+    authkey = check_access(address, authkey or Config.STATE_AUTHKEY)
+    contract = SmartContractInterface(None, journal=journal, timeline_interval=Config.TIMELINE_REFRESH_INTERVAL)
+    StateManager.register('get_contract', callable=lambda: contract)
+
+    if isinstance(address, str):
+        os.makedirs(os.path.dirname(address) or '.', exist_ok=True)
+        if os.path.exists(address):
+            os.remove(address)
+
+    manager = StateManager(address, authkey=authkey)
+    server = manager.get_server()
+    if isinstance(address, str):
+        # Only processes running as this user may connect
+        os.chmod(address, 0o600)
+    logger.info(f"Shared state server listening on {address}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        check_access(parse_address(Config.STATE_ADDRESS), Config.STATE_AUTHKEY)
+    except ValueError as e:
+        sys.exit(str(e))
+    serve_state(Config.STATE_ADDRESS, journal=create_journal())
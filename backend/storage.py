@@ -0,0 +1,220 @@
+import threading
+from array import array
+
+class Bitset:
+    """Growable bitset indexed by voter slot.
+
+    Setting a bit is a read-modify-write of a byte shared with seven other
+    slots, so writes take a short lock; reads do not.
+    """
+
+    __slots__ = ("bits", "lock")
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, data):
+        bitset = cls()
+        bitset.bits = bytearray(data)
+        return bitset
+
+    def get(self, index):
+        byte = index >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (index & 7)))
+
+    def count(self):
+        """Number of set bits"""
+        return bin(int.from_bytes(self.bits, 'little')).count('1')
+
+    def set(self, index, value=True):
+        byte = index >> 3
+        with self.lock:
+            if byte >= len(self.bits):
+                self.bits.extend(bytes(byte - len(self.bits) + 1))
+            if value:
+                self.bits[byte] |= 1 << (index & 7)
+            else:
+                self.bits[byte] &= ~(1 << (index & 7)) & 0xFF
+
+
+class VoterStore:
+    """Columnar voter roll.
+
+    Each voter is assigned an integer slot on registration. Per-voter data
+    lives in flat columns indexed by slot: 32-byte SHA-256 digests packed
+    into one bytearray, epoch-second timestamps and election ids in typed
+    arrays, and the registered/voted flags in bitsets. The address and NID
+    indexes map to the slot, so each voter costs two dict entries plus a
+    few dozen bytes of column data.
+
+    Appends are serialized by a short lock so slots and columns stay
+    aligned; callers are responsible for check-then-act atomicity per
+    voter (see SmartContractInterface's striped locks).
+    """
+
+    DIGEST_SIZE = 32
+
+    def __init__(self):
+        self.append_lock = threading.Lock()
+        self.slots = {}
+        self.addresses = []
+        self.nid_index = {}
+        self.nid_hashes = bytearray()
+        self.election_ids = array('I')
+        self.registration_times = array('I')
+        self.vote_times = array('I')
+        self.registered = Bitset()
+        self.voted = Bitset()
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __contains__(self, voter_address):
+        return voter_address in self.slots
+
+    def slot_of(self, voter_address):
+        """Get a voter's slot, or None if not registered"""
+        return self.slots.get(voter_address)
+
+    def has_nid(self, nid_hash):
+        """Check whether an NID digest is already registered"""
+        return nid_hash in self.nid_index
+
+    def add(self, voter_address, nid_hash, election_id, timestamp):
+        """Append a voter and return its slot"""
+        # Convert and check every field before touching a column, so a value
+        # that does not fit raises with the columns still aligned
+        if not isinstance(voter_address, str):
+            raise TypeError("Voter address must be a string")
+        if len(nid_hash) != self.DIGEST_SIZE:
+            raise ValueError(f"NID hash must be {self.DIGEST_SIZE} bytes")
+        election_id, timestamp = array('I', (election_id, timestamp))
+        with self.append_lock:
+            slot = len(self.addresses)
+            self.nid_hashes += nid_hash
+            self.election_ids.append(election_id)
+            self.registration_times.append(timestamp)
+            self.vote_times.append(0)
+            self.registered.set(slot)
+            self.addresses.append(voter_address)
+            self.nid_index[nid_hash] = slot
+            # Publish the address last so readers never see a half-added voter
+            self.slots[voter_address] = slot
+        return slot
+
+    def mark_voted(self, slot, timestamp):
+        self.voted.set(slot)
+        self.vote_times[slot] = timestamp
+
+    def snapshot(self):
+        """Copy every column out as (name, bytes) sections"""
+        with self.append_lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return [
+            ("voters.addresses", "\0".join(self.addresses).encode()),
+            ("voters.nid_hashes", bytes(self.nid_hashes)),
+            ("voters.election_ids", self.election_ids.tobytes()),
+            ("voters.registration_times", self.registration_times.tobytes()),
+            ("voters.vote_times", self.vote_times.tobytes()),
+            ("voters.registered", bytes(self.registered.bits)),
+            ("voters.voted", bytes(self.voted.bits))
+        ]
+
+    @classmethod
+    def restore(cls, sections):
+        """Rebuild a store, and its indexes, from snapshot sections"""
+        store = cls()
+        addresses = bytes(sections["voters.addresses"]).decode()
+        store.addresses = addresses.split("\0") if addresses else []
+        store.nid_hashes = bytearray(sections["voters.nid_hashes"])
+        store.election_ids.frombytes(sections["voters.election_ids"])
+        store.registration_times.frombytes(sections["voters.registration_times"])
+        store.vote_times.frombytes(sections["voters.vote_times"])
+        store.registered = Bitset.from_bytes(sections["voters.registered"])
+        store.voted = Bitset.from_bytes(sections["voters.voted"])
+
+        size = cls.DIGEST_SIZE
+        store.slots = dict(zip(store.addresses, range(len(store.addresses))))
+        digests = [bytes(store.nid_hashes[i:i + size]) for i in range(0, len(store.nid_hashes), size)]
+        store.nid_index = dict(zip(digests, range(len(digests))))
+        return store
+
+    def get(self, slot):
+        """Materialize one voter as a dict"""
+        start = slot * self.DIGEST_SIZE
+        return {
+            "voter_address": self.addresses[slot],
+            "nid_hash": self.nid_hashes[start:start + self.DIGEST_SIZE].hex(),
+            "election_id": self.election_ids[slot],
+            "registered": self.registered.get(slot),
+            "voted": self.voted.get(slot),
+            "registration_time": self.registration_times[slot],
+            "vote_time": self.vote_times[slot] or None
+        }
+
+
+class BallotStore:
+    """Append-only columnar ballot audit log.
+
+    Ballots are numbered by their position in the log. Each one records
+    the voter slot, election id, candidate index and epoch-second
+    timestamp in typed arrays.
+    """
+
+    def __init__(self):
+        self.append_lock = threading.Lock()
+        self.voter_slots = array('I')
+        self.election_ids = array('I')
+        self.candidates = array('H')
+        self.timestamps = array('I')
+
+    def __len__(self):
+        return len(self.voter_slots)
+
+    def append(self, voter_slot, election_id, candidate_index, timestamp):
+        """Append a ballot and return its number"""
+        # Checked up front so a value that does not fit leaves the columns aligned
+        voter_slot, election_id, timestamp = array('I', (voter_slot, election_id, timestamp))
+        candidate_index, = array('H', (candidate_index,))
+        with self.append_lock:
+            self.election_ids.append(election_id)
+            self.candidates.append(candidate_index)
+            self.timestamps.append(timestamp)
+            self.voter_slots.append(voter_slot)
+            return len(self.voter_slots) - 1
+
+    def snapshot(self):
+        """Copy every column out as (name, bytes) sections"""
+        with self.append_lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return [
+            ("ballots.voter_slots", self.voter_slots.tobytes()),
+            ("ballots.election_ids", self.election_ids.tobytes()),
+            ("ballots.candidates", self.candidates.tobytes()),
+            ("ballots.timestamps", self.timestamps.tobytes())
+        ]
+
+    @classmethod
+    def restore(cls, sections):
+        """Rebuild a store from snapshot sections"""
+        store = cls()
+        store.voter_slots.frombytes(sections["ballots.voter_slots"])
+        store.election_ids.frombytes(sections["ballots.election_ids"])
+        store.candidates.frombytes(sections["ballots.candidates"])
+        store.timestamps.frombytes(sections["ballots.timestamps"])
+        return store
+
+    def get(self, ballot_id):
+        """Get one ballot as (voter_slot, election_id, candidate_index, timestamp)"""
+        return (
+            self.voter_slots[ballot_id],
+            self.election_ids[ballot_id],
+            self.candidates[ballot_id],
+            self.timestamps[ballot_id]
+        )
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from eth_account import Account
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from config import Config
+from blockchain import BlockchainHandler
+from fake_node import start_fake_node
+
+ADMIN_KEY = "0x" + "4c" * 32
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("Timed out")
+
+
+def settled(pipeline, ticket):
+    """The ticket's status once it is no longer queued or pending, else None"""
+    status = pipeline.status(ticket)
+    return status if status["status"] not in ("queued", "pending") else None
+
+
+@pytest.fixture
+def node(monkeypatch, tmp_path):
+    server, chain, url = start_fake_node(block_time=0.1)
+    monkeypatch.setattr(Config, "BLOCKCHAIN_URL", url)
+    monkeypatch.setattr(Config, "CONTRACT_ADDRESS", "0x2222222222222222222222222222222222222222")
+    monkeypatch.setattr(Config, "INDEXER_CHECKPOINT", str(tmp_path / "indexer.json"))
+    monkeypatch.setattr(Config, "TX_RECEIPT_POLL_INTERVAL", 0.05)
+    yield chain
+    server.shutdown()
+
+
+def test_anchor_audit_root_signs_with_private_key(node, monkeypatch):
+    monkeypatch.setattr(Config, "PRIVATE_KEY", ADMIN_KEY)
+    handler = BlockchainHandler()
+    wait_for(lambda: handler.contract)
+
+    result = handler.anchor_audit_root("ab" * 32, 7)
+    assert result["success"], result
+
+    status = wait_for(lambda: settled(handler.pipeline, result["ticket"]))
+    assert status["status"] == "confirmed", status
+    # Signed here with the admin key, not handed to the node to sign
+    assert node.raw_senders[status["tx_hash"]] == Account.from_key(ADMIN_KEY).address
+
+
+def test_anchor_audit_root_with_node_account(node, monkeypatch):
+    monkeypatch.setattr(Config, "PRIVATE_KEY", None)
+    handler = BlockchainHandler()
+    wait_for(lambda: handler.contract)
+
+    result = handler.anchor_audit_root("cd" * 32, 3)
+    assert result["success"], result
+
+    status = wait_for(lambda: settled(handler.pipeline, result["ticket"]))
+    assert status["status"] == "confirmed", status
+    assert status["tx_hash"] not in node.raw_senders
+
+
+def test_invalid_sender_does_not_open_breaker(node, monkeypatch):
+    monkeypatch.setattr(Config, "PRIVATE_KEY", None)
+    handler = BlockchainHandler()
+    wait_for(lambda: handler.contract)
+
+    for i in range(Config.CIRCUIT_FAILURE_THRESHOLD + 2):
+        result = handler.submit_vote(f"junk{i}", 1, "Jatiya Party")
+        assert not result["success"]
+        assert result["error"] != "Blockchain node unavailable"
+    assert handler.breaker.state == "closed"
+
+    result = handler.submit_vote("0x" + "0a" * 20, 1, "Jatiya Party")
+    assert result["success"], result
+    status = wait_for(lambda: settled(handler.pipeline, result["ticket"]))
+    assert status["status"] == "confirmed", status
+
+
+def test_async_handler_anchors_and_indexes(node, monkeypatch):
+    from async_blockchain import AsyncBlockchainHandler
+
+    monkeypatch.setattr(Config, "PRIVATE_KEY", ADMIN_KEY)
+    handler = AsyncBlockchainHandler()
+
+    async def anchor():
+        await handler.start()
+        try:
+            while not handler.contract:
+                await asyncio.sleep(0.05)
+            return await handler.anchor_audit_root("ef" * 32, 5)
+        finally:
+            await handler.stop()
+
+    result = asyncio.run(anchor())
+    assert result["success"], result
+
+    status = wait_for(lambda: settled(handler.pipeline, result["ticket"]))
+    assert status["status"] == "confirmed", status
+    assert node.raw_senders[status["tx_hash"]] == Account.from_key(ADMIN_KEY).address
+    assert handler.get_election_results(1)["success"]
+
+
+def test_async_handler_retries_a_bad_contract_address(node, monkeypatch):
+    from async_blockchain import AsyncBlockchainHandler
+
+    monkeypatch.setattr(Config, "CONNECT_RETRY_INITIAL", 0.05)
+    monkeypatch.setattr(Config, "CONTRACT_ADDRESS", "0xnot-an-address")
+    handler = AsyncBlockchainHandler()
+
+    async def connect():
+        await handler.start()
+        try:
+            while not handler.connect_error:
+                await asyncio.sleep(0.05)
+            assert handler.get_connection_state() == "connecting"
+            assert handler.poller is not None and not handler.poller.done()
+
+            monkeypatch.setattr(Config, "CONTRACT_ADDRESS", "0x2222222222222222222222222222222222222222")
+            while not handler.contract:
+                await asyncio.sleep(0.05)
+            return handler.get_connection_state(), handler.connect_error
+        finally:
+            await handler.stop()
+
+    assert asyncio.run(asyncio.wait_for(connect(), 10)) == ("connected", None)
@@ -0,0 +1,50 @@
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bulk import parse_roll, import_roll
+from smart_contract import SmartContractInterface
+
+ADDRESS = "0x" + "0a" * 20
+
+
+def ndjson(*rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+def test_parse_roll_counts_non_string_fields_as_malformed():
+    records, malformed = parse_roll(ndjson(
+        {"voter_address": ADDRESS, "nid": "1001"},
+        {"voter_address": 5, "nid": "1002"},
+        {"voter_address": ["0x"], "nid": "1003"},
+        {"voter_address": "0x" + "0b" * 20, "nid": 1004},
+        {"voter_address": "0x" + "0c" * 20, "nid_hash": 7},
+        {"nid": "1005"}
+    ), None, 1)
+    assert records == [(ADDRESS, hashlib.sha256(b"1001").digest(), 1)]
+    assert malformed == 5
+
+
+def test_parse_roll_reads_csv():
+    records, malformed = parse_roll(f"{ADDRESS},1001\n,1002\n".encode(), ["voter_address", "nid"], 2)
+    assert records == [(ADDRESS, hashlib.sha256(b"1001").digest(), 2)]
+    assert malformed == 1
+
+
+def test_import_roll_applies_every_valid_row(tmp_path):
+    path = tmp_path / "roll.ndjson"
+    path.write_bytes(ndjson(
+        {"voter_address": 5, "nid": "1"},
+        {"voter_address": ADDRESS, "nid": "2"},
+        {"voter_address": "not an address", "nid": "3"}
+    ))
+    contract = SmartContractInterface(None)
+    summary = import_roll(contract, str(path), workers=1)
+    assert summary["rows"] == 3
+    assert summary["imported"] == 1
+    assert summary["malformed"] == 1
+    assert summary["rejected"] == {"Invalid voter address": 1}
+    assert contract.get_voter_status(ADDRESS)["success"]
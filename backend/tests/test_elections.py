@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from elections import Election, STATUS_OPEN, parse_time
+
+
+def test_finalize_moves_results_version_on():
+    election = Election(1, "Test", ["a", "b"], shards=4)
+    election.status = STATUS_OPEN
+    election.tally.add(0, 1)
+    before = election.results()
+
+    election.finalize()
+    after = election.results()
+    assert after["final"] is True
+    assert after["total_votes"] == before["total_votes"] == 1
+    assert after["version"] != before["version"]
+
+
+def test_parse_time_accepts_epoch_and_iso():
+    assert parse_time(None) is None
+    assert parse_time("") is None
+    assert parse_time(1700000000) == 1700000000
+    assert parse_time(1700000000.9) == 1700000000
+    assert parse_time(10 ** 400) == 10 ** 400
+    assert parse_time("1700000000") == 1700000000
+    assert parse_time("2023-11-14T22:13:20Z") == 1700000000
+    assert parse_time("2023-11-14T22:13:20") == 1700000000
+    assert parse_time("2023-11-15T00:13:20+02:00") == 1700000000
+
+
+@pytest.mark.parametrize("value", [
+    True, False, [1], {"t": 1}, -5, -0.5, "-5", float("inf"), float("nan"), "1969-12-31T23:59:59Z", "soon"
+])
+def test_parse_time_rejects_non_times(value):
+    with pytest.raises(ValueError):
+        parse_time(value)
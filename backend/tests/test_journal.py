@@ -0,0 +1,118 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from journal import VoteJournal, JournalError
+from merkle import leaf_hash, verify_inclusion
+from smart_contract import SmartContractInterface
+
+CANDIDATES = ["National Citizen Party", "Jatiya Party", "Independent Candidates"]
+
+
+def address(i):
+    return "0x" + f"{i:040x}"
+
+
+def open_state(directory):
+    return SmartContractInterface(None, journal=VoteJournal(str(directory), commit_interval=0.001), timeline_interval=0)
+
+
+def populate(state, voters, votes, first=0):
+    for i in range(first, first + voters):
+        assert state.register_voter(address(i), f"nid-{i}", 1)["success"]
+    for i in range(first, first + votes):
+        assert state.cast_vote(address(i), 1, CANDIDATES[i % len(CANDIDATES)])["success"]
+
+
+def segment_path(directory, segment):
+    return os.path.join(str(directory), f"journal-{segment:08d}.log")
+
+
+def observe(state):
+    """What a client can read back, minus wall-clock fields"""
+    timeline = state.get_turnout_timeline(1)
+    return {
+        "results": state.get_election_results(1)["results"],
+        "audit_root": state.get_audit_root(),
+        "statuses": [state.get_voter_status(address(i)) for i in range(len(state.voters))],
+        "series": timeline["series"],
+        "eligible": timeline["eligible"]
+    }
+
+
+def test_recovery_truncates_a_torn_tail(tmp_path):
+    state = open_state(tmp_path)
+    populate(state, voters=4, votes=3)
+    state.journal.close()
+
+    path = segment_path(tmp_path, 0)
+    size = os.path.getsize(path)
+    # A crash in the middle of a write leaves a frame without its payload
+    with open(path, 'ab') as f:
+        f.write(b'\x40\x00\x00\x00\x12\x34\x56\x78partial')
+
+    state = open_state(tmp_path)
+    assert len(state.voters) == 4
+    assert state.get_election_results(1)["total_votes"] == 3
+    assert os.path.getsize(path) == size
+
+    # New records follow the recovered ones and survive another restart
+    populate(state, voters=1, votes=1, first=4)
+    expected = observe(state)
+    state.journal.close()
+
+    state = open_state(tmp_path)
+    assert observe(state) == expected
+    state.journal.close()
+
+
+def test_corrupt_record_before_the_last_segment_is_fatal(tmp_path):
+    state = open_state(tmp_path)
+    populate(state, voters=2, votes=0)
+    state.journal.rotate()
+    populate(state, voters=1, votes=1, first=2)
+    state.journal.close()
+
+    path = segment_path(tmp_path, 0)
+    with open(path, 'r+b') as f:
+        f.seek(os.path.getsize(path) - 1)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([last[0] ^ 0xff]))
+    size = os.path.getsize(path)
+
+    journal = VoteJournal(str(tmp_path))
+    try:
+        with pytest.raises(JournalError):
+            SmartContractInterface(None, journal=journal)
+    finally:
+        journal.close()
+    # Nothing is truncated away; the damage is left for an operator
+    assert os.path.getsize(path) == size
+
+
+def test_snapshot_round_trip(tmp_path):
+    state = open_state(tmp_path)
+    populate(state, voters=6, votes=4)
+    state.snapshot(background=False)
+    # Written after the snapshot, so recovered by replaying the new segment
+    populate(state, voters=2, votes=2, first=6)
+    expected = observe(state)
+    proof = state.get_ballot_proof(5)
+    state.journal.close()
+
+    assert os.path.exists(os.path.join(str(tmp_path), "snapshot.bin"))
+    assert not os.path.exists(segment_path(tmp_path, 0))
+
+    state = open_state(tmp_path)
+    assert observe(state) == expected
+    assert state.get_ballot_proof(5) == proof
+    assert verify_inclusion(
+        leaf_hash(bytes.fromhex(proof["record"])), 5, proof["tree_size"],
+        [bytes.fromhex(node) for node in proof["proof"]], bytes.fromhex(proof["root"])
+    )
+    assert not state.cast_vote(address(0), 1, CANDIDATES[0])["success"]
+    state.journal.close()
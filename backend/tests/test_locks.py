@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from locks import StripedLock
+
+
+def colliding_keys(stripes):
+    """Two distinct keys on the same stripe"""
+    seen = {}
+    for i in range(10 * len(stripes.locks)):
+        key = f"key-{i}"
+        stripe = stripes.stripe(key)
+        if stripe in seen:
+            return seen[stripe], key
+        seen[stripe] = key
+
+
+def test_keys_sharing_a_stripe_are_held_once():
+    stripes = StripedLock(4)
+    first, second = colliding_keys(stripes)
+    with stripes.hold(first, second, first):
+        assert stripes.locks[stripes.stripe(first)].locked()
+    assert not any(lock.locked() for lock in stripes.locks)
+
+
+def test_hold_all_excludes_keyed_holders():
+    stripes = StripedLock(8)
+    entered = threading.Event()
+
+    def writer():
+        with stripes.hold("voter"):
+            entered.set()
+
+    with stripes.hold_all():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert not entered.wait(0.1)
+    assert entered.wait(5)
+    thread.join()
+
+
+def test_opposite_key_orders_do_not_deadlock():
+    stripes = StripedLock(16)
+    keys = [f"key-{i}" for i in range(16)]
+    counter = [0]
+
+    def worker(order):
+        for _ in range(2000):
+            with stripes.hold(*order):
+                counter[0] += 1
+
+    # Every order covers every key, so the holders exclude each other
+    orders = (keys, keys[::-1], keys[5:] + keys[:5], keys[::-1][3:] + keys[::-1][:3])
+    threads = [threading.Thread(target=worker, args=(order,)) for order in orders]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+        assert not thread.is_alive()
+    assert counter[0] == 4 * 2000
@@ -0,0 +1,64 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from merkle import MerkleLog, leaf_hash, node_hash, verify_inclusion
+
+
+def reference_root(leaves):
+    """RFC 6962 Merkle tree hash, computed directly from the definition"""
+    if len(leaves) == 1:
+        return leaf_hash(leaves[0])
+    split = 1 << (len(leaves) - 1).bit_length() - 1
+    return node_hash(reference_root(leaves[:split]), reference_root(leaves[split:]))
+
+
+def build(count, cache_height=2):
+    leaves = [f"ballot-{i}".encode() for i in range(count)]
+    log = MerkleLog(leaves.__getitem__, cache_height=cache_height)
+    for index, data in enumerate(leaves):
+        log.add(index, data)
+    return log, leaves
+
+
+def test_roots_match_rfc6962_at_every_size():
+    log, leaves = build(37)
+    for size in range(1, 38):
+        assert log.root(size) == reference_root(leaves[:size])
+
+
+def test_every_proof_verifies_and_a_wrong_leaf_does_not():
+    log, leaves = build(37)
+    for size in (1, 2, 5, 16, 37):
+        root = log.root(size)
+        for index in range(size):
+            proof = log.proof(index, size)
+            assert verify_inclusion(leaf_hash(leaves[index]), index, size, proof, root)
+            assert not verify_inclusion(leaf_hash(b"forged"), index, size, proof, root)
+        if size > 1:
+            assert not verify_inclusion(leaf_hash(leaves[0]), 1, size, log.proof(0, size), root)
+
+
+def test_out_of_order_adds_fold_in_once_the_gap_fills():
+    leaves = [f"ballot-{i}".encode() for i in range(20)]
+    order = list(range(20))
+    random.Random(7).shuffle(order)
+    log = MerkleLog(leaves.__getitem__, cache_height=2)
+    for index in order:
+        log.add(index, leaves[index])
+    assert len(log) == 20
+    assert log.root() == reference_root(leaves)
+
+
+def test_restore_from_snapshot():
+    log, leaves = build(29)
+    restored = MerkleLog.restore(dict(log.snapshot()), leaves.__getitem__, cache_height=2)
+    assert restored.root() == log.root()
+    assert restored.proof(11) == log.proof(11)
+
+    leaves.append(b"ballot-29")
+    log.add(29, leaves[29])
+    restored.add(29, leaves[29])
+    assert restored.root() == log.root() == reference_root(leaves)
@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from timeline import BUCKET_SECONDS, TallyTimeline, bucket_of
+
+# Start of a minute well in the past, so every bucket below has ended
+BASE = bucket_of(1700000000)
+
+
+def timeline_with_votes(votes, shards=4):
+    """A timeline of two candidates with (shard, seconds after BASE, candidate) votes"""
+    timeline = TallyTimeline(2, shards=shards, refresh_interval=0, eligible=lambda: 10)
+    for shard, offset, index in votes:
+        timeline.add(shard, BASE + offset, index)
+    return timeline
+
+
+VOTES = [(0, 5, 0), (1, 30, 1), (2, 65, 0), (3, 70, 0), (0, 185, 1)]
+
+
+def test_totals_count_only_minutes_that_have_ended():
+    snapshot = timeline_with_votes(VOTES).snapshot()
+    assert snapshot.version == 5
+    assert snapshot.eligible == 10
+    assert snapshot.span() == (BASE, BASE + 3 * BUCKET_SECONDS)
+    assert snapshot.totals_at(BASE + 59) == (0, 0)
+    assert snapshot.totals_at(BASE + 60) == (1, 1)
+    assert snapshot.totals_at(BASE + 120) == (3, 1)
+    assert snapshot.totals_at(BASE + 10 ** 6) == (3, 2)
+
+
+def test_series_steps_over_empty_minutes():
+    snapshot = timeline_with_votes(VOTES).snapshot()
+    series = list(snapshot.series(BASE, BASE + 3 * BUCKET_SECONDS, BUCKET_SECONDS))
+    assert series == [
+        (BASE, 2, (1, 1)),
+        (BASE + 60, 2, (3, 1)),
+        (BASE + 120, 0, (3, 1)),
+        (BASE + 180, 1, (3, 2))
+    ]
+    assert list(snapshot.series(BASE, BASE + 3 * BUCKET_SECONDS, 2 * BUCKET_SECONDS)) == [
+        (BASE, 4, (3, 1)),
+        (BASE + 120, 1, (3, 2))
+    ]
+
+
+def test_late_vote_for_a_folded_minute_is_counted():
+    timeline = timeline_with_votes(VOTES)
+    before = timeline.snapshot()
+    timeline.add(2, BASE + 10, 1)
+    after = timeline.snapshot()
+    assert before.version == 5
+    assert after.version == 6
+    assert after.totals_at(BASE + 60) == (1, 2)
+    # Published snapshots are never modified
+    assert before.totals_at(BASE + 60) == (1, 1)
+
+
+def test_sections_round_trip():
+    timeline = timeline_with_votes(VOTES)
+    timeline.snapshot()
+    timeline.add(1, BASE + 190, 0)
+    sections = dict(timeline.to_sections("timeline"))
+
+    restored = TallyTimeline(2, shards=4, refresh_interval=0)
+    restored.restore("timeline", sections)
+    snapshot = restored.snapshot()
+    assert snapshot.version == 6
+    assert list(snapshot.series(BASE, BASE + 3 * BUCKET_SECONDS, BUCKET_SECONDS)) == list(
+        timeline.snapshot().series(BASE, BASE + 3 * BUCKET_SECONDS, BUCKET_SECONDS)
+    )
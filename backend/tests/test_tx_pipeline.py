@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from rpc import CircuitBreaker
+from tx_pipeline import SubmissionPipeline
+from fake_node import start_fake_node, ACCOUNTS
+
+
+class FlakySession:
+    """A requests session whose first `failures` posts fail as if the node were unreachable"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.session = requests.Session()
+
+    def post(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise requests.exceptions.ConnectionError("connection refused")
+        return self.session.post(*args, **kwargs)
+
+
+class Nonces:
+    def __init__(self):
+        self.resynced = []
+
+    def resync(self, address):
+        self.resynced.append(address)
+
+
+def settle(pipeline, tickets, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        statuses = [pipeline.status(ticket) for ticket in tickets]
+        if all(status["status"] not in ("queued", "pending") for status in statuses):
+            return statuses
+        time.sleep(0.05)
+    raise AssertionError("Timed out")
+
+
+@pytest.fixture
+def node():
+    server, chain, url = start_fake_node(block_time=0.05)
+    yield chain, url
+    server.shutdown()
+
+
+def start_pipeline(url, session, nonces, send_attempts=3):
+    pipeline = SubmissionPipeline(
+        url, session, nonces, CircuitBreaker(failure_threshold=100),
+        poll_interval=0.02, send_attempts=send_attempts, retry_delay=0.02
+    )
+    pipeline.start()
+    return pipeline
+
+
+def transaction(sender, nonce):
+    return {"from": sender, "to": ACCOUNTS[-1], "nonce": nonce, "gas": 21000, "data": "0x"}
+
+
+def test_unreachable_batch_is_sent_again_with_its_nonces(node):
+    chain, url = node
+    nonces = Nonces()
+    pipeline = start_pipeline(url, FlakySession(failures=2), nonces)
+
+    tickets = [pipeline.submit(transaction(ACCOUNTS[0], nonce)) for nonce in range(3)]
+    statuses = settle(pipeline, tickets)
+
+    assert [status["status"] for status in statuses] == ["confirmed"] * 3
+    assert chain.nonces[ACCOUNTS[0]] == 3
+    assert pipeline.stats()["retried"] >= 3
+    assert nonces.resynced == []
+
+
+def test_batch_out_of_attempts_fails_and_resyncs_senders(node):
+    _, url = node
+    nonces = Nonces()
+    pipeline = start_pipeline(url, FlakySession(failures=100), nonces, send_attempts=2)
+
+    tickets = [pipeline.submit(transaction(sender, 0)) for sender in ACCOUNTS[:2]]
+    statuses = settle(pipeline, tickets)
+
+    assert [status["status"] for status in statuses] == ["failed"] * 2
+    assert "connection refused" in statuses[0]["error"]
+    assert sorted(nonces.resynced) == ACCOUNTS[:2]
+    assert pipeline.stats()["in_flight"] == 0
+
+
+def test_rejected_transaction_resyncs_its_sender(node):
+    _, url = node
+    nonces = Nonces()
+    pipeline = start_pipeline(url, FlakySession(failures=0), nonces)
+
+    # The node cannot decode this signed transaction; its error says nothing about nonces
+    tickets = [
+        pipeline.submit(transaction(ACCOUNTS[0], 0)),
+        pipeline.submit(transaction(ACCOUNTS[1], 0), raw="0x00")
+    ]
+    statuses = settle(pipeline, tickets)
+
+    assert statuses[0]["status"] == "confirmed"
+    assert statuses[1]["status"] == "failed"
+    assert "nonce" not in statuses[1]["error"]
+    assert nonces.resynced == [ACCOUNTS[1]]
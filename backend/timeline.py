@@ -0,0 +1,252 @@
+import bisect
+import threading
+import time
+from array import array
+from contextlib import nullcontext
+
+# Width of a tally bucket in seconds
+BUCKET_SECONDS = 60
+
+
+def bucket_of(timestamp):
+    """Start of the bucket holding an epoch-second timestamp"""
+    return int(timestamp) - int(timestamp) % BUCKET_SECONDS
+
+
+class TimelineSnapshot:
+    """Immutable merged view of a TallyTimeline.
+
+    `version` is the number of votes it covers and `built_at` the epoch
+    time it was merged. Buckets are sorted by start time; `cumulative`
+    holds the running totals per candidate up to and including each one.
+    A snapshot of the open minutes extends `base`, the snapshot of the
+    minutes already folded, without copying it, so rebuilding one costs
+    only the open minutes. Snapshots are never modified once published,
+    so any number of readers can use one without locking.
+    """
+
+    __slots__ = ("version", "built_at", "size", "eligible", "base", "buckets", "cumulative", "totals")
+
+    def __init__(self, size, buckets=(), counts=(), eligible=None, built_at=None, base=None):
+        self.size = size
+        self.base = base
+        self.buckets = tuple(buckets)
+        running = base.totals if base is not None else (0,) * size
+        cumulative = []
+        for bucket_counts in counts:
+            running = tuple(total + count for total, count in zip(running, bucket_counts))
+            cumulative.append(running)
+        self.cumulative = tuple(cumulative)
+        self.totals = running
+        self.version = sum(running)
+        self.eligible = eligible
+        self.built_at = time.time() if built_at is None else built_at
+
+    def extend(self, buckets, counts):
+        """A snapshot without a base of these buckets followed by later `buckets`"""
+        extended = TimelineSnapshot(self.size, buckets, counts, self.eligible, self.built_at, base=self)
+        extended.base = None
+        extended.buckets = self.buckets + extended.buckets
+        extended.cumulative = self.cumulative + extended.cumulative
+        return extended
+
+    def rows(self):
+        """Yield (bucket start, counts per candidate) for the buckets of a snapshot without a base"""
+        previous = (0,) * self.size
+        for bucket, totals in zip(self.buckets, self.cumulative):
+            yield bucket, [total - before for total, before in zip(totals, previous)]
+            previous = totals
+
+    def span(self):
+        """(first, last) bucket start, or (None, None) before any vote"""
+        folded = self.base.buckets if self.base is not None else ()
+        first = folded[0] if folded else self.buckets[0] if self.buckets else None
+        last = self.buckets[-1] if self.buckets else folded[-1] if folded else None
+        return first, last
+
+    def _through(self, timestamp):
+        """Counts per candidate of the buckets starting at or before `timestamp`"""
+        index = bisect.bisect_right(self.buckets, timestamp) - 1
+        if index >= 0:
+            return self.cumulative[index]
+        if self.base is not None:
+            return self.base._through(timestamp)
+        return (0,) * self.size
+
+    def totals_at(self, timestamp):
+        """Counts per candidate of the buckets that ended by `timestamp`; never a later vote"""
+        return self._through(timestamp - BUCKET_SECONDS)
+
+    def series(self, start, end, step):
+        """Yield (bucket start, votes in the step, counts per candidate up to its end) every `step` seconds"""
+        previous = sum(self._through(start - 1))
+        for step_start in range(start, end + 1, step):
+            totals = self._through(step_start + step - 1)
+            votes = sum(totals)
+            yield step_start, votes - previous, totals
+            previous = votes
+
+
+class TallyTimeline:
+    """Per-minute vote counts per candidate for one election, read through snapshots.
+
+    Writers add to per-shard buckets without a lock of their own, using
+    the lock stripe they already hold (as with ShardedTally), so the vote
+    path pays one dict lookup and an array increment. Readers never touch
+    the shards directly. They get the current TimelineSnapshot, which is
+    rebuilt when votes have arrived since it was built, at most once per
+    `refresh_interval` seconds. The rebuild happens in whichever reader
+    finds it due first; readers arriving meanwhile keep the previous
+    snapshot rather than waiting. Historical and time-series queries
+    therefore cost a bisect and never contend with vote ingestion.
+
+    Each rebuild first folds the minutes that have ended out of the shards
+    into `closed`, a snapshot extended once per minute, taking each shard's
+    stripe from `locks` while it moves that shard's buckets. The shards
+    then hold only the current minute, so a rebuild merges just that
+    minute on top of `closed` and memory stays bounded by one bucket per
+    minute of history. Votes for a minute already folded (replayed, or
+    after the clock was set back) are folded into it on the next rebuild.
+    """
+
+    __slots__ = (
+        "size", "shards", "locks", "closed", "folding", "dirty", "refresh_interval", "next_refresh",
+        "eligible", "current", "refresh_lock"
+    )
+
+    def __init__(self, size, shards=64, refresh_interval=1.0, eligible=None, locks=None):
+        self.size = size
+        # Per shard: bucket start -> array of counts per candidate index
+        self.shards = [None] * shards
+        # The writers' lock stripes, one per shard; None if the caller excludes writers itself
+        self.locks = locks
+        # Snapshot of the minutes folded out of the shards
+        self.closed = TimelineSnapshot(size)
+        # Buckets taken out of the shards by a fold that has not published them yet
+        self.folding = {}
+        self.dirty = False
+        self.refresh_interval = refresh_interval
+        # Monotonic time before which the snapshot is not rebuilt again
+        self.next_refresh = 0.0
+        # Optional callable returning the number of eligible voters, captured per snapshot
+        self.eligible = eligible
+        self.current = TimelineSnapshot(size, eligible=eligible() if eligible else None)
+        self.refresh_lock = threading.Lock()
+
+    def add(self, shard, timestamp, index, amount=1):
+        """Count a vote cast at `timestamp` in a shard the caller has exclusive use of"""
+        buckets = self.shards[shard]
+        if buckets is None:
+            buckets = self.shards[shard] = {}
+        bucket = timestamp - timestamp % BUCKET_SECONDS
+        counts = buckets.get(bucket)
+        if counts is None:
+            counts = buckets[bucket] = array('Q', bytes(8 * self.size))
+        counts[index] += amount
+        # Set after the add, so a rebuild that clears the flag first never misses it
+        self.dirty = True
+
+    def _lock(self, shard):
+        return self.locks[shard] if self.locks is not None else nullcontext()
+
+    def snapshot(self):
+        """Return the latest snapshot, rebuilding it first if it is stale and due"""
+        current = self.current
+        if not self.dirty or time.monotonic() < self.next_refresh:
+            return current
+        if not self.refresh_lock.acquire(blocking=False):
+            return current
+        try:
+            if self.dirty:
+                self.dirty = False
+                self.next_refresh = time.monotonic() + self.refresh_interval
+                # Ended minutes, and any late votes for minutes already folded
+                horizon = bucket_of(time.time())
+                if self.closed.buckets:
+                    horizon = max(horizon, self.closed.buckets[-1] + BUCKET_SECONDS)
+                self.fold(horizon)
+                buckets, counts = self.merge()
+                self.current = TimelineSnapshot(
+                    self.size, buckets, counts, eligible=self.eligible() if self.eligible else None,
+                    base=self.closed
+                )
+            return self.current
+        finally:
+            self.refresh_lock.release()
+
+    def fold(self, horizon):
+        """Move the buckets that start before `horizon` out of the shards into `closed`"""
+        folding = self.folding
+        for shard, buckets in enumerate(self.shards):
+            if not buckets or min(list(buckets)) >= horizon:
+                continue
+            with self._lock(shard):
+                for bucket in [bucket for bucket in buckets if bucket < horizon]:
+                    counts = buckets.pop(bucket)
+                    total = folding.get(bucket)
+                    folding[bucket] = list(counts) if total is None else [a + b for a, b in zip(total, counts)]
+        if not folding:
+            return
+
+        ordered = sorted(folding)
+        closed = self.closed
+        if closed.buckets and ordered[0] <= closed.buckets[-1]:
+            # Late votes for minutes already folded: merge everything again
+            merged = dict(closed.rows())
+            for bucket, counts in folding.items():
+                total = merged.get(bucket)
+                merged[bucket] = counts if total is None else [a + b for a, b in zip(total, counts)]
+            ordered = sorted(merged)
+            closed = TimelineSnapshot(self.size, ordered, [merged[bucket] for bucket in ordered])
+        else:
+            closed = closed.extend(ordered, [folding[bucket] for bucket in ordered])
+        # Published under a stripe, so to_sections (holding every stripe) sees
+        # the buckets in exactly one of `closed` and `folding`
+        with self._lock(0):
+            self.closed = closed
+            self.folding = {}
+
+    def merge(self):
+        """Sum the shards into (sorted bucket starts, counts per bucket) for the minutes after `closed`"""
+        merged = {}
+        for buckets in self.shards:
+            if buckets is None:
+                continue
+            for bucket, counts in list(buckets.items()):
+                total = merged.get(bucket)
+                merged[bucket] = list(counts) if total is None else [a + b for a, b in zip(total, counts)]
+        ordered = sorted(merged)
+        if ordered and self.closed.buckets and ordered[0] <= self.closed.buckets[-1]:
+            # A vote for a folded minute arrived after the fold; it is folded on the next rebuild
+            self.dirty = True
+            ordered = [bucket for bucket in ordered if bucket > self.closed.buckets[-1]]
+        return ordered, [merged[bucket] for bucket in ordered]
+
+    def to_sections(self, prefix):
+        """Every bucket as (name, bytes) snapshot sections; the caller excludes writers"""
+        merged = dict(self.closed.rows())
+        for buckets in [self.folding] + self.shards:
+            if buckets is None:
+                continue
+            for bucket, counts in buckets.items():
+                total = merged.get(bucket)
+                merged[bucket] = list(counts) if total is None else [a + b for a, b in zip(total, counts)]
+        ordered = sorted(merged)
+        return [
+            (f"{prefix}.buckets", array('q', ordered).tobytes()),
+            (f"{prefix}.counts", array('Q', [count for bucket in ordered for count in merged[bucket]]).tobytes())
+        ]
+
+    def restore(self, prefix, sections):
+        """Load buckets written by to_sections; ended minutes are folded, later ones stay open"""
+        buckets = array('q')
+        buckets.frombytes(sections[f"{prefix}.buckets"])
+        counts = array('Q')
+        counts.frombytes(sections[f"{prefix}.counts"])
+        rows = [counts[i * self.size:(i + 1) * self.size] for i in range(len(buckets))]
+        ended = bisect.bisect_left(buckets, bucket_of(time.time()))
+        self.shards = [None] * len(self.shards)
+        self.shards[0] = dict(zip(buckets[ended:], rows[ended:]))
+        self.folding = {}
+        self.closed = TimelineSnapshot(self.size, buckets[:ended], rows[:ended])
+        self.dirty = True
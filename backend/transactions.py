@@ -0,0 +1,85 @@
+import threading
+import time
+import logging
+
+from locks import StripedLock
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+class NonceManager:
+    """Hand out transaction nonces per sender without asking the node each time.
+
+    The first nonce for an address comes from the node's pending
+    transaction count; after that nonces are allocated locally, so
+    concurrent requests from one address get distinct, consecutive nonces.
+    Call release() when a reserved nonce was never sent and resync() when
+    the node reports a nonce error or a gap.
+    """
+
+    def __init__(self, fetch_count, stripes=64):
+        self.fetch_count = fetch_count
+        self.stripes = StripedLock(stripes)
+        self.next_nonce = {}
+
+    def reserve(self, address):
+        """Allocate the next nonce for an address"""
+        with self.stripes.hold(address):
+            nonce = self.next_nonce.get(address)
+            if nonce is None:
+                CACHE_REQUESTS.inc("nonce", "miss")
+                nonce = self.fetch_count(address)
+            else:
+                CACHE_REQUESTS.inc("nonce", "hit")
+            self.next_nonce[address] = nonce + 1
+            return nonce
+
+    def release(self, address, nonce):
+        """Return an unsent nonce; anything but the latest one leaves a gap, so resync"""
+        with self.stripes.hold(address):
+            if self.next_nonce.get(address) == nonce + 1:
+                self.next_nonce[address] = nonce
+            else:
+                self.next_nonce.pop(address, None)
+
+    def resync(self, address):
+        """Forget the local nonce so the next reservation reads it from the node"""
+        with self.stripes.hold(address):
+            self.next_nonce.pop(address, None)
+        logger.info(f"Nonce for {address} will be resynchronized with the node")
+
+
+class GasPriceOracle:
+    """Gas price refreshed by a background thread.
+
+    Transaction building reads the cached value; until the first
+    successful refresh (or while the node is unreachable) the configured
+    default is used.
+    """
+
+    def __init__(self, fetch, default, breaker, interval=15.0):
+        self.fetch = fetch
+        self.price = default
+        self.breaker = breaker
+        self.interval = interval
+        self.thread = threading.Thread(target=self._run, name="gas-price", daemon=True)
+        self.thread.start()
+
+    def get(self):
+        return self.price
+
+    def refresh(self):
+        if not self.breaker.allow():
+            return self.price
+        try:
+            self.price = self.fetch()
+            self.breaker.record_success()
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.debug(f"Gas price refresh failed: {str(e)}")
+        return self.price
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
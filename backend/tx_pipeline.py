@@ -0,0 +1,304 @@
+import itertools
+import queue
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+
+from metrics import RPC_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Votes are sent from the voter's address for the node to sign; see BlockchainHandler
+NODE_CANNOT_SIGN = "Blockchain node holds no voter keys; on-chain vote submission is disabled"
+
+def to_rpc_transaction(transaction):
+    """Hex-encode integer fields for eth_sendTransaction"""
+    return {key: hex(value) if isinstance(value, int) else value for key, value in transaction.items()}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SubmissionPipeline:
+    """Background submission of prepared transactions in JSON-RPC batches.
+
+    submit() only enqueues. A sender thread drains up to `batch_size`
+    transactions at a time and posts them as one JSON-RPC batch of
+    eth_sendTransaction calls (eth_sendRawTransaction for transactions
+    signed locally); a receipt thread polls outstanding hashes
+    with batched eth_getTransactionReceipt calls. At most `max_in_flight`
+    transactions may be sent but unconfirmed; once that window and the
+    queue are full, submit() refuses new work so callers can push back on
+    their own clients. Callers that must not accept work they cannot
+    queue (a vote is counted locally before it is submitted) claim space
+    up front with reserve() and then submit(..., reserved=True), which
+    cannot be refused. A transaction with no receipt `receipt_timeout`
+    seconds after it was sent (dropped by the node, or stuck behind a
+    nonce gap) is marked expired and gives its window slot back, and its
+    sender's nonce is resynchronized with the node.
+
+    A batch that cannot be posted at all is queued again after
+    `retry_delay` seconds, doubling per attempt; its transactions keep
+    their nonces, so a later attempt fills the same slots. After
+    `send_attempts` tries, or when the node rejects a transaction, it is
+    marked failed and its sender's nonce is resynchronized, since the
+    unused nonce would otherwise leave a gap.
+    """
+
+    def __init__(self, url, session, nonces, breaker, queue_size=10000, batch_size=100,
+                 max_in_flight=1000, poll_interval=0.5, timeout=10.0, history=10000, receipt_timeout=120.0,
+                 send_attempts=3, retry_delay=1.0):
+        self.url = url
+        self.session = session
+        self.nonces = nonces
+        self.breaker = breaker
+        # A batch waits for a window slot per transaction, so it must fit in the window
+        self.batch_size = min(batch_size, max_in_flight)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.receipt_timeout = receipt_timeout
+        self.send_attempts = max(send_attempts, 1)
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue()
+        self.capacity = queue_size
+        # Transactions queued plus space reserved for ones about to be submitted
+        self.backlog = 0
+        self.window = threading.BoundedSemaphore(max_in_flight)
+        self.tickets = itertools.count(1)
+        self.lock = threading.Lock()
+        # tx hash -> (ticket, queued_at, sent_at, sender)
+        self.in_flight = {}
+        # ticket -> status dict, bounded to the most recent `history` tickets
+        self.results = OrderedDict()
+        self.history = history
+        self.latencies = deque(maxlen=history)
+        self.counts = {"submitted": 0, "sent": 0, "confirmed": 0, "failed": 0, "expired": 0, "rejected": 0, "retried": 0}
+        self.threads = []
+
+    def start(self):
+        """Start the sender and receipt threads"""
+        if self.threads:
+            return
+        for target, name in ((self._send_loop, "tx-sender"), (self._receipt_loop, "tx-receipts")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def reserve(self, count=1):
+        """Claim queue space for `count` submissions; return False, claiming nothing, if it does not fit"""
+        with self.lock:
+            if self.backlog + count > self.capacity:
+                self.counts["rejected"] += count
+                return False
+            self.backlog += count
+            return True
+
+    def unreserve(self, count=1):
+        """Give back reserved space that will not be submitted"""
+        if count:
+            with self.lock:
+                self.backlog -= count
+
+    def submit(self, transaction, reserved=False, raw=None):
+        """Queue a prepared transaction; return its ticket, or None if the queue is full.
+
+        With `reserved` the space was claimed by reserve(), so the
+        transaction is always queued. `raw` is the hex encoding of the
+        transaction signed locally; without it the node signs it.
+        """
+        if not reserved and not self.reserve():
+            return None
+        ticket = next(self.tickets)
+        with self.lock:
+            self.counts["submitted"] += 1
+            self._record(ticket, {"status": "queued"})
+        self.queue.put((ticket, transaction, raw, time.monotonic(), 0))
+        return ticket
+
+    def status(self, ticket):
+        """Get the status of a ticket, or None if unknown or expired"""
+        with self.lock:
+            return self.results.get(ticket)
+
+    def stats(self):
+        """Counters, queue depth and submit-to-confirmation latency percentiles (seconds)"""
+        with self.lock:
+            latencies = list(self.latencies)
+            return dict(
+                self.counts,
+                queued=self.queue.qsize(),
+                in_flight=len(self.in_flight),
+                latency_p50=percentile(latencies, 0.50),
+                latency_p95=percentile(latencies, 0.95),
+                latency_p99=percentile(latencies, 0.99)
+            )
+
+    def _record(self, ticket, status):
+        self.results[ticket] = status
+        self.results.move_to_end(ticket)
+        while len(self.results) > self.history:
+            self.results.popitem(last=False)
+
+    def _rpc_batch(self, calls):
+        """POST a JSON-RPC batch and return responses ordered like `calls`"""
+        payload = [
+            {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+            for index, (method, params) in enumerate(calls)
+        ]
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        finally:
+            RPC_LATENCY.observe(time.perf_counter() - started, f"batch:{calls[0][0]}")
+        response.raise_for_status()
+        by_id = {item.get("id"): item for item in response.json()}
+        return [by_id.get(index, {"error": {"message": "missing response"}}) for index in range(len(calls))]
+
+    def _send_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.lock:
+                self.backlog -= len(batch)
+
+            # Each transaction takes a slot in the in-flight window until confirmed
+            for _ in batch:
+                self.window.acquire()
+
+            while not self.breaker.allow():
+                time.sleep(self.poll_interval)
+
+            try:
+                responses = self._rpc_batch([
+                    ("eth_sendRawTransaction", [raw]) if raw else ("eth_sendTransaction", [to_rpc_transaction(transaction)])
+                    for _, transaction, raw, _, _ in batch
+                ])
+                self.breaker.record_success()
+            except Exception as e:
+                self.breaker.record_failure()
+                logger.error(f"Transaction batch submission error: {str(e)}")
+                self._retry(batch, str(e))
+                continue
+
+            sent_at = time.monotonic()
+            failed = []
+            with self.lock:
+                for (ticket, transaction, _, queued_at, attempts), response in zip(batch, responses):
+                    if "result" in response:
+                        self.in_flight[response["result"]] = (ticket, queued_at, sent_at, transaction["from"])
+                        self.counts["sent"] += 1
+                        self._record(ticket, {"status": "pending", "tx_hash": response["result"]})
+                        continue
+
+                    error = response.get("error", {}).get("message", "unknown error")
+                    if attempts:
+                        error += f" (after {attempts} failed send attempts; an earlier one may have reached the node)"
+                    failed.append((ticket, transaction, error))
+                self._fail(failed)
+
+    def _retry(self, batch, error):
+        """Queue the transactions of a batch that could not be posted again, or fail them once out of attempts"""
+        retries = {}
+        failed = []
+        with self.lock:
+            for ticket, transaction, raw, queued_at, attempts in batch:
+                attempts += 1
+                if attempts < self.send_attempts:
+                    retries.setdefault(attempts, []).append((ticket, transaction, raw, queued_at, attempts))
+                    self.counts["retried"] += 1
+                    self._record(ticket, {"status": "queued", "attempts": attempts, "error": error})
+                    self.window.release()
+                else:
+                    failed.append((ticket, transaction, error))
+            # Queued again later, so they count against the queue until then
+            self.backlog += sum(len(items) for items in retries.values())
+            self._fail(failed)
+
+        for attempts, items in retries.items():
+            timer = threading.Timer(self.retry_delay * 2 ** (attempts - 1), self._requeue, [items])
+            timer.daemon = True
+            timer.start()
+
+    def _requeue(self, items):
+        for item in items:
+            self.queue.put(item)
+
+    def _fail(self, failed):
+        """Mark sent-but-refused transactions failed; the caller holds the lock"""
+        for ticket, transaction, error in failed:
+            self.counts["failed"] += 1
+            self._record(ticket, {"status": "failed", "error": error})
+            self.window.release()
+            # The nonce it held is unused and would leave a gap; start again from the node's count
+            self.nonces.resync(transaction["from"])
+
+    def _receipt_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                hashes = list(self.in_flight)
+            if hashes and self.breaker.allow():
+                self._poll_receipts(hashes)
+            self._expire()
+
+    def _poll_receipts(self, hashes):
+        for start in range(0, len(hashes), self.batch_size):
+            chunk = hashes[start:start + self.batch_size]
+            try:
+                responses = self._rpc_batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in chunk])
+                self.breaker.record_success()
+            except Exception as e:
+                self.breaker.record_failure()
+                logger.error(f"Receipt polling error: {str(e)}")
+                break
+
+            now = time.monotonic()
+            with self.lock:
+                for tx_hash, response in zip(chunk, responses):
+                    receipt = response.get("result")
+                    if not receipt:
+                        continue
+                    entry = self.in_flight.pop(tx_hash, None)
+                    if entry is None:
+                        # Expired while this batch was being polled
+                        continue
+                    ticket, queued_at, _, _ = entry
+                    succeeded = receipt.get("status") in ("0x1", 1)
+                    self.counts["confirmed" if succeeded else "failed"] += 1
+                    self.latencies.append(now - queued_at)
+                    self._record(ticket, {
+                        "status": "confirmed" if succeeded else "reverted",
+                        "tx_hash": tx_hash,
+                        "block_number": receipt.get("blockNumber")
+                    })
+                    self.window.release()
+
+    def _expire(self):
+        """Give up on transactions with no receipt after receipt_timeout, freeing their window slots"""
+        deadline = time.monotonic() - self.receipt_timeout
+        senders = set()
+        with self.lock:
+            for tx_hash, (ticket, _, sent_at, sender) in list(self.in_flight.items()):
+                if sent_at > deadline:
+                    continue
+                del self.in_flight[tx_hash]
+                self.counts["expired"] += 1
+                self._record(ticket, {
+                    "status": "expired",
+                    "tx_hash": tx_hash,
+                    "error": f"No receipt within {self.receipt_timeout:g}s; the transaction was dropped or is stuck"
+                })
+                self.window.release()
+                senders.add(sender)
+        # Later nonces of these senders may sit behind a gap; start again from the node's count
+        for sender in senders:
+            self.nonces.resync(sender)
@@ -202,15 +202,35 @@ const DigitalBallotSystem = () => {
     }
   };
 
+  // Subscribe to live results pushed by the backend instead of polling
   useEffect(() => {
     checkBackendConnection();
-    const interval = setInterval(checkBackendConnection, 10000);
-    return () => clearInterval(interval);
+    const source = new EventSource(`${BACKEND_URL}/stream/results/1`);
+
+    source.onopen = () => {
+      setBackendConnected(true);
+    };
+    source.onerror = () => {
+      // EventSource reconnects by itself; show the outage until it does
+      setBackendConnected(false);
+    };
+    source.addEventListener('snapshot', (event) => {
+      const data = JSON.parse(event.data);
+      setVotes(data.results);
+    });
+    source.addEventListener('delta', (event) => {
+      const data = JSON.parse(event.data);
+      setVotes(prev => ({
+        ...prev,
+        ...data.delta
+      }));
+    });
+
+    return () => source.close();
   }, []);
 
   useEffect(() => {
     if (backendConnected) {
-      loadElectionResults();
       getBlockchainInfo();
     }
   }, [backendConnected]);